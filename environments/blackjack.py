@@ -1,37 +1,78 @@
-import random
-from typing import Callable
-
-import numpy as np
+from typing import Callable, NamedTuple
 
+from utils.rng import RandomStream
 from utils.type_aliases import TypeBlackjackActions, TypeBlackjackAction
 
 
+class HandScore(NamedTuple):
+    score: int     # highest score of hand, hard total if bust
+    soft: bool     # an ace is counted as 11 in score
+    bust: bool
+
+
+def create_score_table(bust_limit: int, soft_ace_bonus: int,
+                       max_hard_total: int) -> tuple[tuple[HandScore, HandScore], ...]:
+    """Scores of hands by hard total, without and with an ace"""
+
+    def get_score(hard_total: int, has_ace: bool) -> HandScore:
+
+        if has_ace and hard_total + soft_ace_bonus <= bust_limit:
+            return HandScore(hard_total + soft_ace_bonus, True, False)
+
+        return HandScore(hard_total, False, hard_total > bust_limit)
+
+    return tuple((get_score(hard_total, False), get_score(hard_total, True))
+                 for hard_total in range(max_hard_total + 1))
+
+
 class Player:
+    """Hand of a player kept as hard total, number of aces and number of cards
+
+    Labels of cards drawn are kept only with record_cards
+    """
 
     def __init__(self, *, name: str|None = None,
-                 decision_handle: Callable[[],TypeBlackjackAction]|None = None):
+                 decision_handle: Callable[[],TypeBlackjackAction]|None = None,
+                 draw_card: Callable[[], int]|None = None,
+                 record_cards: bool = False):
 
         self._name: str|None = name
         self._decision_handle: Callable[[],TypeBlackjackAction]|None = decision_handle
+        self._draw_card: Callable[[], int]|None = draw_card
+
+        self._hard_total: int = 0    # aces counted as 1
+        self._aces: int = 0
+        self._card_count: int = 0
 
-        self._hand = Blackjack.EMPTY_HAND.copy()
+        self._record_cards: bool = record_cards
         self._cards: list[str] = []
 
 
     def __repr__(self) -> str:
-        return f"Player {self._name } with hand: {self._hand}, cards: {self._cards}"
+        return f"Player {self._name } with hand: {self.get_hand()}, cards: {self._cards}"
 
 
     def initialize(self) -> None:
-        self._hand = Blackjack.EMPTY_HAND.copy()
+        self._hard_total = 0
+        self._aces = 0
+        self._card_count = 0
         self._cards = []
 
 
     def hit(self) -> str:
-        card = Blackjack.draw_card()
 
-        self._hand[card] += 1
-        self._cards.append(Blackjack.card_labels[card])
+        if self._draw_card is None:
+            raise SystemExit(f"Blackjack; No card source defined for player {self._name}")
+
+        card = self._draw_card()
+
+        self._hard_total += Blackjack.card_hard_values[card]
+        self._card_count += 1
+        if card == Blackjack.ACE:
+            self._aces += 1
+
+        if self._record_cards:
+            self._cards.append(Blackjack.card_labels[card])
 
         return Blackjack.card_labels[card]
 
@@ -59,45 +100,30 @@ class Player:
                     return final_max_score
 
 
-    def is_bust(self) -> bool:
+    def get_score(self) -> HandScore:
+        return Blackjack.score_table[self._hard_total][self._aces > 0]
 
-        scores = Blackjack.get_current_score(self._hand)
 
-        if not scores:
-            return True
-        else:
-            return False
+    def is_bust(self) -> bool:
+        return self._hard_total > Blackjack.BUST_LIMIT
 
 
     def is_blackjack(self) -> bool:
-
-        if sum(self._hand) == 2:
-            scores = Blackjack.get_current_score(self._hand)
-
-            assert scores is not None
-
-            if max(scores) == 21:
-                return True
-
-        return False
+        return self._card_count == 2 and self.get_score().score == Blackjack.BUST_LIMIT
 
 
     def get_current_max_score(self) -> tuple[int, bool]:
 
-        scores = Blackjack.get_current_score(self._hand)
+        score, soft_ace, bust = self.get_score()
 
-        assert scores is not None
+        assert not bust
 
-        if len(scores) > 1:
-            soft_ace = True
-        else:
-            soft_ace = False
+        return score, soft_ace
 
-        return ( max(scores), soft_ace )
 
-
-    def get_hand(self) -> list[int]:
-        return self._hand
+    def get_hand(self) -> tuple[int, int, int]:
+        """Hard total, number of aces and number of cards"""
+        return self._hard_total, self._aces, self._card_count
 
 
     def get_cards(self) -> list[str]:
@@ -108,6 +134,10 @@ class Player:
         self._decision_handle = decision_handle
 
 
+    def set_draw_card(self, draw_card: Callable[[], int]|None) -> None:
+        self._draw_card = draw_card
+
+
     def decide_action(self) -> TypeBlackjackAction:
 
         if self._decision_handle is None:
@@ -131,22 +161,31 @@ class Blackjack:
     #    index  =   [   0,   1,   2,   3,   4,   5,   6,   7,   8,    9,  10,  11,  12  ]
     card_labels =   [ "A", "2", "3", "4", "5", "6", "7", "8", "9", "10", "J", "Q", "K" ]
     card_values =   [ None,  2,   3,   4,   5,   6,   7,   8,   9,   10,  10,  10,  10  ]
-    EMPTY_HAND  =   [    0,  0,   0,   0,   0,   0,   0,   0,   0,    0,   0,   0,   0  ]
+    card_hard_values = (   1,  2,   3,   4,   5,   6,   7,   8,   9,   10,  10,  10,  10  )
 
+    ACE = 0
 
     BUST_LIMIT = 21
     HIT_LIMIT_DEALER = 17
+    SOFT_ACE_BONUS = 10
+
+    # a hand is hit only below bust limit, the highest hard total is bust limit and a ten
+    score_table = create_score_table(BUST_LIMIT, SOFT_ACE_BONUS, BUST_LIMIT + max(card_hard_values))
 
     HIT = True
     STAND = False
     ACTIONS = (HIT, STAND)
 
-    def __init__(self) -> None:
-        self.dealer = Player(name="Dealer", decision_handle=self._dealer_policy)
+    def __init__(self, random_stream: RandomStream) -> None:
+
+        self._random_stream: RandomStream = random_stream
+
+        self.dealer = Player(name="Dealer", decision_handle=self._dealer_policy, draw_card=self.draw_card)
         self.players: list[Player] = []
 
 
     def register_player(self, player: Player) -> None:
+        player.set_draw_card(self.draw_card)
         self.players.append(player)
 
 
@@ -159,32 +198,8 @@ class Blackjack:
         return Blackjack.ACTIONS
 
 
-    @classmethod
-    def draw_card(cls) -> int:
-        card = random.randint(0,12)
-        return card
-
-
-    @classmethod
-    def get_current_score(cls, hand: list[int]) -> list[int]|None:
-
-        # get result of dot product as type int
-        without_aces = np.dot(Blackjack.card_values[1:], hand[1:]).item() # type: ignore[arg-type]
-
-        min_aces = hand[0]
-        if min_aces + without_aces > Blackjack.BUST_LIMIT:
-            return None
-        else:
-            scores = [ min_aces + without_aces ]
-
-            for i in range(1,hand[0] + 1):
-
-                score_to_add = min_aces + i * 10 + without_aces
-                if score_to_add > Blackjack.BUST_LIMIT:
-                    break
-                else:
-                    scores += [ score_to_add ]
-            return scores
+    def draw_card(self) -> int:
+        return self._random_stream.integer(len(Blackjack.card_labels))
 
 
     def deal_new_game(self) -> None:
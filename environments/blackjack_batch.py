@@ -0,0 +1,142 @@
+import numpy as np
+
+from environments.blackjack import Blackjack
+
+from utils.rng import RandomStream
+from utils.type_aliases import TypeNDarrayBool, TypeNDarrayInt
+
+
+class BatchHands:  # pylint: disable=too-few-public-methods
+    """Hands of one seat (dealer or player) over a batch of games
+
+    hands: card-count matrix, one row per game and one column per card rank
+    totals: hard totals, aces counted as 1
+    aces: number of aces in hand
+    """
+
+    def __init__(self, batch_size: int) -> None:
+
+        self.hands: TypeNDarrayInt = np.zeros((batch_size, len(Blackjack.card_labels)), dtype=np.int64)
+        self.totals: TypeNDarrayInt = np.zeros(batch_size, dtype=np.int64)
+        self.aces: TypeNDarrayInt = np.zeros(batch_size, dtype=np.int64)
+
+
+    def reset(self, rows: TypeNDarrayInt) -> None:
+
+        self.hands[rows] = 0
+        self.totals[rows] = 0
+        self.aces[rows] = 0
+
+
+    def add_cards(self, rows: TypeNDarrayInt, cards: TypeNDarrayInt) -> None:
+
+        # rows are unique, plain fancy indexing is safe for increments
+        self.hands[rows, cards] += 1
+        self.totals[rows] += BatchBlackjack.card_hard_values[cards]
+        self.aces[rows] += cards == 0
+
+
+    def get_card_counts(self) -> TypeNDarrayInt:
+
+        card_counts: TypeNDarrayInt = self.hands.sum(axis=1)
+
+        return card_counts
+
+
+    def get_scores(self) -> tuple[TypeNDarrayInt, TypeNDarrayBool]:
+        return BatchBlackjack.get_scores(self.totals, self.aces)
+
+
+    def is_bust(self) -> TypeNDarrayBool:
+        return self.totals > Blackjack.BUST_LIMIT
+
+
+class BatchBlackjack:
+    """Blackjack with infinite deck for a batch of games, one player against dealer in each game
+
+    Rules follow Blackjack: dealer gets one card and player two cards at deal,
+    dealer hits below Blackjack.HIT_LIMIT_DEALER during dealers turn
+    """
+
+    card_hard_values: TypeNDarrayInt = np.array(Blackjack.card_hard_values, dtype=np.int64)
+
+    SOFT_ACE_BONUS = Blackjack.SOFT_ACE_BONUS
+
+    def __init__(self, batch_size: int, random_stream: RandomStream) -> None:
+
+        self.batch_size: int = batch_size
+        self._random_stream: RandomStream = random_stream
+
+        self.dealer: BatchHands = BatchHands(batch_size)
+        self.player: BatchHands = BatchHands(batch_size)
+
+
+    def draw_cards(self, count: int) -> TypeNDarrayInt:
+        return self._random_stream.generator.integers(0, len(Blackjack.card_labels), size=count)
+
+
+    @classmethod
+    def get_scores(cls, totals: TypeNDarrayInt,
+                   aces: TypeNDarrayInt) -> tuple[TypeNDarrayInt, TypeNDarrayBool]:
+        """Max non-busting score and soft ace flag for hard totals and ace counts"""
+
+        soft_ace = (aces > 0) & (totals + cls.SOFT_ACE_BONUS <= Blackjack.BUST_LIMIT)
+        scores = totals + cls.SOFT_ACE_BONUS * soft_ace
+
+        return scores, soft_ace
+
+
+    def _hit(self, seat: BatchHands, mask: TypeNDarrayBool) -> None:
+
+        rows = np.flatnonzero(mask)
+
+        if len(rows) > 0:
+            seat.add_cards(rows, self.draw_cards(len(rows)))
+
+
+    def hit_players(self, mask: TypeNDarrayBool) -> None:
+        self._hit(self.player, mask)
+
+
+    def is_player_blackjack(self) -> TypeNDarrayBool:
+
+        scores, _ = self.player.get_scores()
+        blackjack: TypeNDarrayBool = ((self.player.get_card_counts() == 2) &
+                                      (scores == Blackjack.BUST_LIMIT))
+
+        return blackjack
+
+
+    def deal_new_games(self, mask: TypeNDarrayBool|None = None) -> None:
+
+        if mask is None:
+            mask = np.full(self.batch_size, True)
+
+        rows = np.flatnonzero(mask)
+
+        self.dealer.reset(rows)
+        self.player.reset(rows)
+
+        self._hit(self.dealer, mask)
+
+        self._hit(self.player, mask)
+        self._hit(self.player, mask)
+
+
+    def dealers_turn(self, mask: TypeNDarrayBool) -> TypeNDarrayInt:
+        """Play dealer hands in mask to the end, returns final scores with -1 for bust"""
+
+        to_hit = mask.copy()
+
+        while True:
+            scores, _ = self.dealer.get_scores()
+            to_hit &= ~self.dealer.is_bust() & (scores < Blackjack.HIT_LIMIT_DEALER)
+
+            if not to_hit.any():
+                break
+
+            self._hit(self.dealer, to_hit)
+
+        final_scores = np.where(self.dealer.is_bust(), -1, scores)
+
+        return final_scores
@@ -1,12 +1,17 @@
 from abc import ABC, abstractmethod
 
+from environments.environment_batch import BatchEnvironment
+from planning.environment_model import EnvironmentModel
+
+from utils.rng import RandomStream, random_streams
+
 from utils.type_aliases import TypeState, TypeValidState, TypeActions, TypeAction
 
 class Environment(ABC):
 
     @abstractmethod
     def __init__(self, variant: str|None = None) -> None:
-        pass
+        self.random_stream: RandomStream = random_streams.get_stream("environment")
 
     @abstractmethod
     def initialize(self) -> None:
@@ -36,3 +41,16 @@ class Environment(ABC):
 
     def get_report_base_states(self) -> list[TypeValidState]:
         pass
+
+
+    def create_batch_environment(self, batch_size: int) -> BatchEnvironment:
+        """Vectorized counterpart of the environment with the same variant, if there is one"""
+
+        raise SystemExit(f"{type(self).__name__}: no vectorized counterpart, "
+                         f"use evaluation engine 'serial' or 'pool'")
+
+
+    def create_model(self) -> EnvironmentModel:
+        """Known transition model of the environment with the same variant, if there is one"""
+
+        raise SystemExit(f"{type(self).__name__}: no known model, use a sampling evaluation engine")
@@ -0,0 +1,57 @@
+from abc import ABC, abstractmethod
+
+from utils.rng import RandomStream, random_streams
+from utils.type_aliases import (TypeValidState, TypeActions,
+                                TypeNDarray64, TypeNDarrayBool, TypeNDarrayInt)
+
+
+class BatchEnvironment(ABC):
+    """Steps a batch of independent episodes at once
+
+    States of the batch are kept as an integer array with one row per episode and
+    one column per state component, in the order given by get_column_names()
+    """
+
+    @abstractmethod
+    def __init__(self, *, variant: str|None = None, batch_size: int) -> None:
+        self.random_stream: RandomStream = random_streams.get_stream("batch_environment")
+
+
+    @abstractmethod
+    def initialize(self) -> None:
+        pass
+
+
+    @abstractmethod
+    def get_states(self) -> TypeNDarrayInt:
+        pass
+
+
+    @abstractmethod
+    def get_active(self) -> TypeNDarrayBool:
+        pass
+
+
+    @abstractmethod
+    def do_actions(self, actions: TypeNDarrayInt|TypeNDarrayBool
+                   ) -> tuple[TypeNDarray64, TypeNDarrayInt, TypeNDarrayBool]:
+        pass
+
+
+    @abstractmethod
+    def get_actions(self) -> TypeActions:
+        pass
+
+
+    @abstractmethod
+    def get_column_names(self) -> list[str]:
+        pass
+
+
+    @abstractmethod
+    def get_report_base_states(self) -> list[TypeValidState]:
+        pass
+
+
+    def get_batch_size(self) -> int:
+        return len(self.get_active())
@@ -2,7 +2,9 @@ import itertools
 from math import inf
 
 from environments.environment import Environment
+from environments.environment_blackjack_batch import EnvironmentBlackjackBatch
 from environments.blackjack import Blackjack, Player
+from planning.model_blackjack import ModelBlackjack
 
 from utils.scaler import scaler
 import utils.constants as constants
@@ -19,7 +21,7 @@ class EnvironmentBlackjack(Environment):
 
         self._variant: str = variant
 
-        self._game: Blackjack = Blackjack()
+        self._game: Blackjack = Blackjack(self.random_stream)
         self._player: Player = Player()
         self._game.register_player(self._player)
 
@@ -124,3 +126,15 @@ class EnvironmentBlackjack(Environment):
 
     def get_column_names(self) -> list[str]:
         return ['dealer', 'player', 'soft']
+
+
+    def create_batch_environment(self, batch_size: int) -> EnvironmentBlackjackBatch:
+        return EnvironmentBlackjackBatch(variant=self._variant, batch_size=batch_size)
+
+
+    def create_model(self) -> ModelBlackjack:
+
+        if self._variant != "simple":
+            raise SystemExit(f"EnvironmentBlackjack: no known model for variant {self._variant}")
+
+        return ModelBlackjack()
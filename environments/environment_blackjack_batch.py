@@ -0,0 +1,99 @@
+import itertools
+
+import numpy as np
+
+from environments.environment_batch import BatchEnvironment
+from environments.blackjack import Blackjack
+from environments.blackjack_batch import BatchBlackjack
+
+from utils.scaler import scaler
+from utils.type_aliases import (TypeValidState, TypeBlackjackActions,
+                                TypeNDarray64, TypeNDarrayBool, TypeNDarrayInt)
+
+
+class EnvironmentBlackjackBatch(BatchEnvironment):
+    """Vectorized counterpart of EnvironmentBlackjack, plays batch_size games at once
+
+    State rows are (dealer, player, soft) with soft as 0/1, actions are booleans
+    with True for HIT and False for STAND
+    """
+
+    def __init__(self, *, variant: str="simple", batch_size: int=1000):
+
+        super().__init__(variant=variant, batch_size=batch_size)
+
+        if variant != "simple":
+            raise SystemExit(f"EnvironmentBlackjackBatch: unknown environment type {variant}")
+
+        self._variant: str = variant
+
+        self._game: BatchBlackjack = BatchBlackjack(batch_size, self.random_stream)
+        self._active: TypeNDarrayBool = np.full(batch_size, False)
+
+        self._actions: TypeBlackjackActions = Blackjack.get_actions()
+
+        scaler.register_scale("player", 4, 21)
+        scaler.register_scale("dealer", 2, 11)
+
+
+    def get_actions(self) -> TypeBlackjackActions:
+        return self._actions
+
+
+    def initialize(self) -> None:
+
+        to_deal = np.full(self._game.batch_size, True)
+
+        while to_deal.any():
+            self._game.deal_new_games(to_deal)
+            to_deal = self._game.is_player_blackjack()
+
+        self._active[:] = True
+
+
+    def get_active(self) -> TypeNDarrayBool:
+        return self._active
+
+
+    def get_states(self) -> TypeNDarrayInt:
+
+        dealer_scores, _ = self._game.dealer.get_scores()
+        player_scores, soft_ace = self._game.player.get_scores()
+
+        return np.column_stack((dealer_scores, player_scores, soft_ace.astype(np.int64)))
+
+
+    def do_actions(self, actions: TypeNDarrayInt|TypeNDarrayBool
+                   ) -> tuple[TypeNDarray64, TypeNDarrayInt, TypeNDarrayBool]:
+        """Apply actions to active games, returns rewards, new states and terminated flags"""
+
+        hit = self._active & (actions == Blackjack.HIT)
+        stand = self._active & (actions == Blackjack.STAND)
+
+        rewards: TypeNDarray64 = np.zeros(self._game.batch_size, dtype=np.float64)
+
+        self._game.hit_players(hit)
+        bust = hit & self._game.player.is_bust()
+        rewards[bust] = -1
+
+        if stand.any():
+            player_scores, _ = self._game.player.get_scores()
+            dealer_scores = self._game.dealers_turn(stand)
+
+            rewards[stand] = np.sign(player_scores[stand] - dealer_scores[stand])
+
+        self._active &= ~(bust | stand)
+
+        return rewards, self.get_states(), ~self._active
+
+
+    def get_report_base_states(self) -> list[TypeValidState]:
+
+        soft_false = itertools.product(range(2,12), range(4,22), (False, ))
+        soft_true = itertools.product(range(2,12), range(12,22), (True, ))
+
+        return list(soft_false) + list(soft_true)
+
+
+    def get_column_names(self) -> list[str]:
+        return ['dealer', 'player', 'soft']
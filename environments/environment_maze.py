@@ -1,10 +1,11 @@
 import itertools
-import random
 
 from environments.environment import Environment
+from environments.environment_maze_batch import EnvironmentMazeBatch
 from environments.maze import Maze, Movement
 
 from environments.maze_configs import configurations
+from planning.model_maze import ModelMaze
 
 from utils.scaler import scaler
 from utils.type_aliases import (TypeMazeStructure, TypeMazeState, TypeValidState,
@@ -19,6 +20,8 @@ class EnvironmentMaze(Environment):  # pylint: disable=too-many-instance-attribu
 
         super().__init__()
 
+        self._variant: str = variant
+
         self.maze_structure: TypeMazeStructure =  configurations[variant]['maze_structure']
 
         self._noise = configurations[variant]['noise']
@@ -29,7 +32,11 @@ class EnvironmentMaze(Environment):  # pylint: disable=too-many-instance-attribu
         self._current_state: TypeValidMazeState = self._initial_state
 
         self._maze = Maze(self.maze_structure)
-        self._movement = Movement(self._maze, noise=self._noise)
+        self._start_cells: list[TypeValidMazeState] = [
+            cell for cell in itertools.product(range(self._maze.size[0]), range(self._maze.size[1]))
+            if not (self._maze.walls[cell] or self._maze.terminal[cell])]
+
+        self._movement = Movement(self._maze, noise=self._noise, random_stream=self.random_stream)
 
         self._actions: TypeMazeActions = Movement.actions
 
@@ -43,16 +50,7 @@ class EnvironmentMaze(Environment):  # pylint: disable=too-many-instance-attribu
 
     def initialize(self) -> None:
 
-        initial_state = (random.randrange(self._maze.size[0]),
-                         random.randrange(self._maze.size[1]))
-
-        while (self._maze.walls[initial_state] or
-               self._maze.terminal[initial_state]):
-
-            initial_state = (random.randrange(self._maze.size[0]),
-                             random.randrange(self._maze.size[1]))
-
-        self._initial_state = initial_state
+        self._initial_state = self.random_stream.choice(self._start_cells)
         self._is_terminated = False
         self._current_state = self._initial_state
 
@@ -97,3 +95,11 @@ class EnvironmentMaze(Environment):  # pylint: disable=too-many-instance-attribu
 
     def get_column_names(self) -> list[str]:
         return ['row', 'col']
+
+
+    def create_batch_environment(self, batch_size: int) -> EnvironmentMazeBatch:
+        return EnvironmentMazeBatch(variant=self._variant, batch_size=batch_size)
+
+
+    def create_model(self) -> ModelMaze:
+        return ModelMaze(configurations[self._variant])
@@ -0,0 +1,103 @@
+import itertools
+
+import numpy as np
+
+from environments.environment_batch import BatchEnvironment
+from environments.maze import Maze, Movement
+
+from environments.maze_configs import configurations
+
+from utils.scaler import scaler
+from utils.type_aliases import (TypeMazeStructure, TypeValidState, TypeMazeActions,
+                                TypeNDarray64, TypeNDarrayBool, TypeNDarrayInt)
+
+
+class EnvironmentMazeBatch(BatchEnvironment):  # pylint: disable=too-many-instance-attributes
+    """Vectorized counterpart of EnvironmentMaze, moves batch_size independent walkers at once
+
+    Walkers are kept as flat row-major cell indices and moved with a precomputed
+    (cell, action, noisy move) -> cell transition table. State rows are (row, col)
+    """
+
+    def __init__(self, *, variant: str="simple", batch_size: int=1000):
+
+        super().__init__(variant=variant, batch_size=batch_size)
+
+        self.maze_structure: TypeMazeStructure =  configurations[variant]['maze_structure']
+
+        self._noise = configurations[variant]['noise']
+        self._living_cost = configurations[variant]['living_cost']
+
+        self._maze = Maze(self.maze_structure)
+        self._movement = Movement(self._maze, noise=self._noise)
+
+        self._actions: TypeMazeActions = Movement.actions
+
+        self._transitions: TypeNDarrayInt = self._movement.get_transition_table()
+        self._cumulative_probs: TypeNDarray64 = np.cumsum(self._movement.noisy_move_probs)
+
+        self._rewards: TypeNDarray64 = self._maze.rewards.ravel() + self._living_cost
+        self._terminal: TypeNDarrayBool = self._maze.terminal.ravel()
+
+        self._start_cells: TypeNDarrayInt = np.flatnonzero(~self._maze.walls.ravel() & ~self._terminal)
+
+        self._cells: TypeNDarrayInt = np.zeros(batch_size, dtype=np.int64)
+        self._active: TypeNDarrayBool = np.full(batch_size, False)
+
+        scaler.register_scale("row", 0, self._maze.size[0] - 1)
+        scaler.register_scale("col", 0, self._maze.size[1] - 1)
+
+
+    def get_actions(self) -> TypeMazeActions:
+        return self._actions
+
+
+    def initialize(self) -> None:
+
+        starts = self.random_stream.generator.integers(0, len(self._start_cells), size=len(self._cells))
+
+        self._cells[:] = self._start_cells[starts]
+        self._active[:] = True
+
+
+    def get_active(self) -> TypeNDarrayBool:
+        return self._active
+
+
+    def get_states(self) -> TypeNDarrayInt:
+
+        rows, cols = np.divmod(self._cells, self._maze.size[1])
+
+        return np.column_stack((rows, cols))
+
+
+    def do_actions(self, actions: TypeNDarrayInt|TypeNDarrayBool
+                   ) -> tuple[TypeNDarray64, TypeNDarrayInt, TypeNDarrayBool]:
+        """Move active walkers, returns rewards, new states and terminated flags"""
+
+        rows = np.flatnonzero(self._active)
+
+        # same rule as Movement.do_noisy_move: first noisy move whose cumulative prob reaches the draw
+        noisy_moves = np.searchsorted(self._cumulative_probs, self.random_stream.generator.random(len(rows)))
+        noisy_moves = np.minimum(noisy_moves, len(self._cumulative_probs) - 1)
+
+        next_cells = self._transitions[self._cells[rows], actions[rows], noisy_moves]
+
+        rewards: TypeNDarray64 = np.zeros(len(self._cells), dtype=np.float64)
+        rewards[rows] = self._rewards[next_cells]
+
+        self._cells[rows] = next_cells
+        self._active[rows] = ~self._terminal[next_cells]
+
+        return rewards, self.get_states(), ~self._active
+
+
+    def get_report_base_states(self) -> list[TypeValidState]:
+
+        report_states = itertools.product(range(0, self._maze.size[0]), range(0, self._maze.size[1]))
+
+        return list(report_states)
+
+
+    def get_column_names(self) -> list[str]:
+        return ['row', 'col']
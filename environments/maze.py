@@ -1,8 +1,9 @@
 import numpy as np
 
+from utils.rng import RandomStream
 from utils.type_aliases import (TypeMazeStructure,
                                 TypeValidMazeState, TypeMazeAction,
-                                TypeNDarray64, TypeNDarrayBool)
+                                TypeNDarray64, TypeNDarrayBool, TypeNDarrayInt)
 
 
 class Maze:  # pylint: disable=too-few-public-methods
@@ -51,13 +52,18 @@ class Movement:
     action_names = ( "NORTH", "EAST", "SOUTH", "WEST" )
     direction_arrows = ( '\u2191','\u2192','\u2193','\u2190', '\u25aa', '')
                        #  up, right, down, left, small square, empty
+    direction_offsets = ( (-1, 0), (0, 1), (1, 0), (0, -1) )
+                       #  (row, col) change for north, east, south, west
 
 
-    def __init__(self, maze: Maze, *, noise: float =0.2):
+    def __init__(self, maze: Maze, *, noise: float =0.2, random_stream: RandomStream|None = None):
 
         self.maze = maze
         self.noise = noise
 
+        # draws for do_noisy_move, not needed for the transition table
+        self._random_stream: RandomStream|None = random_stream
+
         self.noisy_moves = [
             self._adjust_left,
             self._adjust_none,
@@ -94,6 +100,45 @@ class Movement:
         return dirs
 
 
+    def get_transition_table(self) -> TypeNDarrayInt:
+        """Target cell for every (cell, action, noisy move) triple
+
+        Cells are flat row-major grid indices, noisy moves are ordered as noisy_moves,
+        i.e. the last axis matches noisy_move_probs. Moves outside the maze or against a
+        wall stay in the current cell, as in move_from()
+        """
+
+        rows, cols = np.indices(self.maze.size)
+        rows = rows.ravel()
+        cols = cols.ravel()
+
+        from_cells = rows * self.maze.size[1] + cols
+
+        moved = np.empty((len(from_cells), len(Movement.actions)), dtype=np.int64)
+
+        for direction in Movement.actions:
+            d_row, d_col = Movement.direction_offsets[direction]
+
+            target_rows = rows + d_row
+            target_cols = cols + d_col
+
+            valid = ((0 <= target_rows) & (target_rows < self.maze.size[0]) &
+                     (0 <= target_cols) & (target_cols < self.maze.size[1]))
+            valid[valid] = ~self.maze.walls[target_rows[valid], target_cols[valid]]
+
+            moved[:, direction] = np.where(valid, target_rows * self.maze.size[1] + target_cols,
+                                           from_cells)
+
+        table: TypeNDarrayInt = np.empty((len(from_cells), len(Movement.actions), len(self.noisy_moves)),
+                                         dtype=np.int64)
+
+        for action in Movement.actions:
+            for j, adjusted_move in enumerate(self.noisy_moves):
+                table[:, action, j] = moved[:, adjusted_move(action)]
+
+        return table
+
+
     def _get_move_target(self, from_state: TypeValidMazeState, action: TypeMazeAction) -> TypeValidMazeState:
 
         target_state: tuple[int, int]
@@ -128,8 +173,11 @@ class Movement:
 
     def do_noisy_move(self, from_state: TypeValidMazeState, action: TypeMazeAction) -> TypeValidMazeState:
 
+        if self._random_stream is None:
+            raise SystemExit("Movement: do_noisy_move needs a random stream")
+
         cum_prob: float = 0
-        random_p = np.random.random()
+        random_p = self._random_stream.random()
 
         for i, p_lim in enumerate(self.noisy_move_probs):
             cum_prob += p_lim
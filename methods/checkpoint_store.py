@@ -0,0 +1,106 @@
+import os
+import pickle
+import tempfile
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+from utils.reporting import reporter, TypeReportList
+from utils.type_aliases import TypeRewardsAtIterations, TypeEpisodeLenghts, TypeAgentResult
+import utils.constants as constants  # pylint: disable=consider-using-from-import
+
+if TYPE_CHECKING:
+    from methods.method import Method
+
+
+class LearnProgress(NamedTuple):
+    iteration: int                       # completed episodes, or completed batch iterations
+    rewards: TypeRewardsAtIterations     # rewards at reporting points so far
+    received_reward: float
+    episode_lengths: TypeEpisodeLenghts
+    reports: list[int]|None              # reporting points not yet reached
+    completed: bool                      # learning completed, only evaluation remains
+
+
+class CheckpointStore:
+    """Checkpoints and results of one agent in folder, file names prefixed with key
+
+    A checkpoint pickles the method with its value representation, the learning progress,
+    and reports so far. Random streams of the components are pickled with the method, so a
+    resumed agent continues as if it had not been interrupted. Files are written to a
+    temporary file and renamed, so an interruption while writing leaves the previous
+    checkpoint in place
+    """
+
+    def __init__(self, folder: Path, key: str,
+                 interval_seconds: float = constants.CHECKPOINT_INTERVAL_SECONDS) -> None:
+
+        self.checkpoint_path: Path = folder / f"{key}.checkpoint.pik"
+        self.result_path: Path = folder / f"{key}.result.pik"
+
+        self.interval_seconds: float = interval_seconds
+        self._saved_at: float = time.monotonic()
+
+
+    def is_due(self) -> bool:
+        """More than interval_seconds since the last checkpoint"""
+        return time.monotonic() - self._saved_at >= self.interval_seconds
+
+
+    def has_checkpoint(self) -> bool:
+        return self.checkpoint_path.exists()
+
+
+    def save_checkpoint(self, method: "Method", progress: LearnProgress) -> None:
+
+        checkpoint = {
+            'method': method,
+            'progress': progress,
+            'reports': reporter.get_reporting_instance().get_reports_list()
+        }
+
+        self._write(self.checkpoint_path, checkpoint)
+        self._saved_at = time.monotonic()
+
+
+    def load_checkpoint(self) -> tuple["Method", LearnProgress]:
+        """Method with its random streams, its progress and reports are restored"""
+
+        checkpoint = self._read(self.checkpoint_path)
+
+        reporter.get_reporting_instance().add_reports(checkpoint['reports'])
+
+        self._saved_at = time.monotonic()
+
+        return checkpoint['method'], checkpoint['progress']
+
+
+    def has_result(self) -> bool:
+        return self.result_path.exists()
+
+
+    def save_result(self, agent_result: TypeAgentResult, report_list: TypeReportList) -> None:
+        self._write(self.result_path, (agent_result, report_list))
+
+
+    def load_result(self) -> tuple[TypeAgentResult, TypeReportList]:
+
+        result: tuple[TypeAgentResult, TypeReportList] = self._read(self.result_path)
+
+        return result
+
+
+    def _write(self, path: Path, content: Any) -> None:
+
+        file_handle, temp_name = tempfile.mkstemp(prefix=f"{path.name}.", dir=path.parent)
+
+        with os.fdopen(file_handle, 'wb') as file:
+            pickle.dump(content, file)
+
+        os.replace(temp_name, path)
+
+
+    def _read(self, path: Path) -> Any:
+
+        with open(path, 'rb') as file:
+            return pickle.load(file)
@@ -0,0 +1,54 @@
+from utils.type_aliases import TypeValidState, TypeAction
+import utils.constants as constants  # pylint: disable=consider-using-from-import
+
+
+class EpisodeBuffer:  # pylint: disable=too-many-instance-attributes
+    """Steps of one episode, reused from episode to episode
+
+    Steps are kept in preallocated lists, one per field, so recording a step allocates nothing
+    new. Capacity is doubled when full. Without record, only length and total reward of the
+    episode are tracked, for methods that do not go through the episode afterwards
+    """
+
+    def __init__(self, record: bool = True, capacity: int = constants.EPISODE_BUFFER_CAPACITY) -> None:
+
+        self.record: bool = record
+
+        self.length: int = 0
+        self.total_reward: float = 0
+
+        self.states: list[TypeValidState] = [()] * capacity
+        self.actions: list[TypeAction] = [0] * capacity
+        self.rewards: list[float] = [0.0] * capacity
+        self.probs: list[float] = [1.0] * capacity   # behavior policy probabilities of actions
+
+
+    def reset(self) -> None:
+        self.length = 0
+        self.total_reward = 0
+
+
+    def append(self, state: TypeValidState, action: TypeAction, reward: float, prob: float = 1.0) -> None:
+
+        if self.record:
+
+            if self.length == len(self.rewards):
+                self._grow()
+
+            self.states[self.length] = state
+            self.actions[self.length] = action
+            self.rewards[self.length] = reward
+            self.probs[self.length] = prob
+
+        self.length += 1
+        self.total_reward += reward
+
+
+    def _grow(self) -> None:
+
+        capacity = len(self.rewards)
+
+        self.states.extend([()] * capacity)
+        self.actions.extend([0] * capacity)
+        self.rewards.extend([0.0] * capacity)
+        self.probs.extend([1.0] * capacity)
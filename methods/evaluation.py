@@ -0,0 +1,188 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from math import nan, sqrt
+from typing import Any, NamedTuple
+
+import numpy as np
+
+from environments.environment import Environment
+from planning.environment_model import greedy_probabilities
+from valuereps.value_representation import ValueRepresentation
+
+from utils.rng import RandomStream
+from utils.state_indexer import StateIndexer
+from utils.type_aliases import (TypeValidState, TypeAction, TypeActions, TypeEpisodeLenghts,
+                                TypeNDarray64, TypeNDarrayInt, is_valid_state_tg)
+import utils.constants as constants  # pylint: disable=consider-using-from-import
+
+
+EVALUATION_ENGINES = ("serial", "vectorized", "pool", "exact")
+
+
+class EvaluationResult(NamedTuple):
+    rewards: float                        # sum of rewards over evaluation episodes
+    episode_lengths: TypeEpisodeLenghts   # min, mean and max length, and standard error of the mean
+    reward_se: float                      # standard error of the sum of rewards
+
+
+class GreedyActionTable:
+    """Greedy actions for all states in the bounding box of given states, a frozen greedy policy
+
+    Values of all state-action pairs are queried once with one batched call. Ties between
+    best actions are broken randomly with draws from random_stream when the table is built,
+    not at each step
+    """
+
+    def __init__(self, valuerep: ValueRepresentation, states: list[TypeValidState],
+                 actions: TypeActions, random_stream: RandomStream) -> None:
+
+        self.indexer: StateIndexer = StateIndexer(states)
+
+        box_states = [self.indexer.get_state(i) for i in range(self.indexer.state_count)]
+
+        values = valuerep.get_values([state for state in box_states for _ in actions],
+                                     [action for _ in box_states for action in actions])
+        values = values.reshape(len(box_states), len(actions))
+
+        best = values == values.max(axis=1, keepdims=True)
+        best_indexes = np.argmax(random_stream.generator.random(best.shape) * best, axis=1)
+
+        self.actions: np.ndarray[Any, Any] = np.array(actions)[best_indexes]
+        self._action_list: list[TypeAction] = [actions[i] for i in best_indexes.tolist()]
+
+
+    def get_action(self, state: TypeValidState) -> TypeAction:
+        return self._action_list[self.indexer.get_index(state)]
+
+
+    def get_actions(self, states: TypeNDarrayInt) -> np.ndarray[Any, Any]:
+        """Greedy actions for an array of states, one state per row"""
+        return self.actions[self.indexer.get_indices(states)]
+
+
+def summarize_episodes(episode_rewards: TypeNDarray64, episode_lengths: TypeNDarrayInt) -> EvaluationResult:
+
+    count = len(episode_rewards)
+
+    if count > 1:
+        reward_se = sqrt(count) * float(episode_rewards.std(ddof=1))
+        mean_length_se = float(episode_lengths.std(ddof=1)) / sqrt(count)
+    else:
+        reward_se = mean_length_se = nan
+
+    lengths: TypeEpisodeLenghts = {
+        'min_length': int(episode_lengths.min()),
+        'mean_length': float(episode_lengths.mean()),
+        'max_length': int(episode_lengths.max()),
+        'mean_length_se': mean_length_se
+    }
+
+    return EvaluationResult(float(episode_rewards.sum()), lengths, reward_se)
+
+
+def evaluate_vectorized(table: GreedyActionTable, environment: Environment, episodes: int,
+                        batch_size: int = constants.EVALUATION_BATCH_SIZE) -> EvaluationResult:
+    """Play episodes in batches in the vectorized counterpart of environment"""
+
+    episode_rewards: list[TypeNDarray64] = []
+    episode_lengths: list[TypeNDarrayInt] = []
+
+    batch_environment = None
+
+    for start in range(0, episodes, batch_size):
+
+        size = min(batch_size, episodes - start)
+
+        if batch_environment is None or batch_environment.get_batch_size() != size:
+            batch_environment = environment.create_batch_environment(size)
+            batch_environment.random_stream.reseed(environment.random_stream.draw_seed())
+
+        batch_environment.initialize()
+
+        rewards: TypeNDarray64 = np.zeros(size, dtype=np.float64)
+        lengths: TypeNDarrayInt = np.zeros(size, dtype=np.int64)
+
+        actions = np.zeros(size, dtype=table.actions.dtype)
+        states = batch_environment.get_states()
+        rows = np.flatnonzero(batch_environment.get_active())
+
+        while len(rows) > 0:
+
+            # states of terminated episodes may be outside the table
+            actions[rows] = table.get_actions(states[rows])
+            lengths[rows] += 1
+
+            step_rewards, states, _ = batch_environment.do_actions(actions)
+            rewards += step_rewards
+
+            rows = np.flatnonzero(batch_environment.get_active())
+
+        print(f"Evaluation round {start + size}: {rewards.sum()}")
+
+        episode_rewards.append(rewards)
+        episode_lengths.append(lengths)
+
+    return summarize_episodes(np.concatenate(episode_rewards), np.concatenate(episode_lengths))
+
+
+def _evaluate_episodes(environment: Environment, table: GreedyActionTable, episodes: int,
+                       seed: int) -> tuple[TypeNDarray64, TypeNDarrayInt]:
+    """Rewards and lengths of episodes played one step at a time, in a worker process"""
+
+    environment.random_stream.reseed(seed)
+
+    rewards: TypeNDarray64 = np.zeros(episodes, dtype=np.float64)
+    lengths: TypeNDarrayInt = np.zeros(episodes, dtype=np.int64)
+
+    for i in range(episodes):
+
+        environment.initialize()
+        state = environment.get_state()
+
+        while True:
+
+            reward, next_state = environment.do_action(table.get_action(state))
+
+            rewards[i] += reward
+            lengths[i] += 1
+
+            if next_state == constants.TERMINAL_STATE:
+                break
+
+            assert is_valid_state_tg(next_state) # -> TypeGuard[TypeValidState]
+            state = next_state
+
+    return rewards, lengths
+
+
+def evaluate_in_pool(table: GreedyActionTable, environment: Environment, episodes: int,
+                     workers: int|None = None) -> EvaluationResult:
+    """Split episodes over worker processes, each with its own copy of environment
+
+    Worker seeds are drawn from the random stream of environment, so a seeded run evaluates the same
+    """
+
+    worker_count = workers or os.cpu_count() or 1
+
+    episode_counts = [len(part) for part in np.array_split(np.arange(episodes), worker_count) if len(part)]
+    seeds = [environment.random_stream.draw_seed() for _ in episode_counts]
+
+    with ProcessPoolExecutor(max_workers=worker_count) as executor:
+        results = list(executor.map(_evaluate_episodes, repeat(environment), repeat(table),
+                                    episode_counts, seeds))
+
+    return summarize_episodes(np.concatenate([rewards for rewards, _ in results]),
+                              np.concatenate([lengths for _, lengths in results]))
+
+
+def evaluate_exact(table: GreedyActionTable, environment: Environment, episodes: int) -> EvaluationResult:
+    """Expected results of episodes from the known model of environment, without sampling"""
+
+    model = environment.create_model()
+
+    evaluation = model.evaluate_policy(greedy_probabilities(environment.get_actions(), table.get_action))
+
+    print(f"Exact evaluation: expected return {evaluation.expected_return}")
+
+    return EvaluationResult(episodes * evaluation.expected_return, evaluation.episode_lengths, 0.0)
@@ -1,10 +1,17 @@
 from abc import ABC, abstractmethod
-from math import inf
-from typing import Callable
+from pathlib import Path
+from typing import Any, Callable
+
+import numpy as np
 
 from agent.agent import Agent
+from methods.checkpoint_store import CheckpointStore, LearnProgress
+from methods.evaluation import (EVALUATION_ENGINES, EvaluationResult, GreedyActionTable,
+                                summarize_episodes, evaluate_vectorized, evaluate_in_pool,
+                                evaluate_exact)
 from valuereps.value_representation import ValueRepresentation
 
+from utils.array_store import save_arrays, load_arrays, load_meta
 from utils.type_aliases import TypeLearnResult, TypeAction, TypeValidState, is_valid_state_tg
 import utils.constants as constants  # pylint: disable=consider-using-from-import
 
@@ -22,27 +29,72 @@ class Method(ABC):
 
         self._valuerep: ValueRepresentation
 
+        self.checkpoint_store: CheckpointStore|None = None
+
+        # learning iterations completed, schedules continue from here when learning again
+        self.completed_iterations: int = 0
+
+        # target iterations of step-size and epsilon schedules, saved with the method so that
+        # a loaded method continues on the same schedules
+        self.schedule_target_iterations: dict[str, int] = {}
+
+
+    def set_checkpoint_store(self, checkpoint_store: CheckpointStore) -> None:
+        self.checkpoint_store = checkpoint_store
+
 
     @abstractmethod
-    def learn(self, iterations: int, reporting_points: list[int]|None) -> TypeLearnResult:
+    def learn(self, iterations: int, reporting_points: list[int]|None,
+              progress: LearnProgress|None = None) -> TypeLearnResult:
         pass
 
 
-    def evaluate(self, iterations: int) -> tuple[float, dict[str,int|float]]:
+    def evaluate(self, iterations: int, engine: str = "serial", workers: int|None = None) -> EvaluationResult:
+        """Play iterations episodes with the greedy target policy
+
+        Engine 'serial' plays one step at a time with the policy of the agent. As the policy does
+        not change during evaluation, 'vectorized' and 'pool' first build a table of greedy actions,
+        and play the episodes in the vectorized counterpart of the environment, or split over
+        workers processes. 'exact' computes expected results of the table from the known model
+        of the environment
+        """
+
+        if engine == "serial":
+            return self._evaluate_serial(iterations)
+
+        if engine not in EVALUATION_ENGINES:
+            raise SystemExit(f"Unknown evaluation engine {engine}, expected one of {EVALUATION_ENGINES}")
+
+        environment = self.agent.environment
+
+        table = GreedyActionTable(self._valuerep, environment.get_report_base_states(),
+                                  environment.get_actions(), environment.random_stream)
 
-        episode_lengths =  { 'min_length': inf, 'mean_length' : 0, 'max_length': -inf }
-        rewards: float = 0.0
+        if engine == "vectorized":
+            return evaluate_vectorized(table, environment, iterations)
+
+        if engine == "exact":
+            return evaluate_exact(table, environment, iterations)
+
+        return evaluate_in_pool(table, environment, iterations, workers)
+
+
+    def _evaluate_serial(self, iterations: int) -> EvaluationResult:
+
+        episode_rewards: list[float] = []
+        episode_lengths: list[int] = []
+        total_reward: float = 0.0
 
         for current_iter in range(iterations):
 
             if current_iter % 1000 == 0:
-                print(f"Evaluation round {current_iter}: {rewards}, {episode_lengths}")
+                print(f"Evaluation round {current_iter}: {total_reward}")
 
             self.agent.initialize()
             current_state: TypeValidState = self.agent.get_state()
 
             episode_len = 0
-
+            rewards: float = 0.0
 
             while True:
 
@@ -54,22 +106,66 @@ class Method(ABC):
                 rewards += reward
 
                 if next_state == constants.TERMINAL_STATE:
-
-                    if episode_len > episode_lengths['max_length']:
-                        episode_lengths['max_length'] = episode_len
-                    if episode_len < episode_lengths['min_length']:
-                        episode_lengths['min_length'] = episode_len
-
-                    current_mean = episode_lengths['mean_length']
-                    episode_lengths['mean_length'] = (current_mean +
-                                                     1/(current_iter+1) * (episode_len - current_mean))
-
                     break
 
                 assert is_valid_state_tg(next_state) # -> TypeGuard[TypeValidState]
                 current_state = next_state
 
-        return rewards, episode_lengths
+            episode_rewards.append(rewards)
+            episode_lengths.append(episode_len)
+            total_reward += rewards
+
+        return summarize_episodes(np.array(episode_rewards, dtype=np.float64),
+                                  np.array(episode_lengths, dtype=np.int64))
+
+
+    def save(self, path: Path) -> None:
+        """Value representation to folder path/valuerep, method state to folder path/method"""
+
+        self._valuerep.save(path / "valuerep")
+
+        save_arrays(path / "method", self._get_state_arrays(),
+                    {'class': type(self).__name__, 'name': self.method_name,
+                     'completed_iterations': self.completed_iterations,
+                     'schedule_target_iterations': self.schedule_target_iterations})
+
+
+    def load(self, path: Path, mmap: bool = True) -> None:
+        """State saved with save, to continue learning or to evaluate without learning"""
+
+        arrays, meta = load_arrays(path / "method", mmap)
+
+        if meta['class'] != type(self).__name__:
+            raise SystemExit(f"Cannot load {meta['class']} saved in '{path}' to {type(self).__name__}")
+
+        self._valuerep.load(path / "valuerep", mmap)
+
+        self.completed_iterations = meta['completed_iterations']
+        self._set_state_arrays(arrays)
+
+
+    @staticmethod
+    def load_schedule_target_iterations(path: Path) -> dict[str, int]:
+        """Target iterations of schedules of a method saved with save, to create its schedules"""
+
+        target_iterations: dict[str, int] = load_meta(path / "method").get('schedule_target_iterations', {})
+
+        return target_iterations
+
+
+    def _get_state_arrays(self) -> dict[str, np.ndarray[Any, Any]]:
+        # methods with state of their own beyond the value representation override
+        return {}
+
+
+    def _set_state_arrays(self, arrays: dict[str, np.ndarray[Any, Any]]) -> None:
+        pass
+
+
+    def _checkpoint(self, progress: LearnProgress) -> None:
+
+        if self.checkpoint_store is not None:
+            self.checkpoint_store.save_checkpoint(self, progress)
 
 
     def _report(self, iteration: int) -> None:
@@ -1,68 +1,154 @@
 from abc import abstractmethod
 from math import inf
+from typing import Callable
 
+import numpy as np
+
+from agent.agent import Agent
 from methods.method import Method
+from methods.checkpoint_store import LearnProgress
+from methods.sample_store import SampleChunk, SampleStore
+from valuereps.value_representation import ValueRepresentation
 
-from utils.type_aliases import TypeLearnResult, TypeSample, is_valid_state_tg
+from utils.state_indexer import StateIndexer
+from utils.type_aliases import TypeLearnResult, TypeAction, TypeEpisodeLenghts, is_valid_state_tg
 import utils.constants as constants  # pylint: disable=consider-using-from-import
 
 
 class MethodBatch(Method):
+    """Batch method sampling the environment in chunks of episodes
+
+    Each chunk of samples is handed to _add_samples as columnar arrays, so memory used by
+    sampling is bounded by the chunk size, not by the number of sampled episodes. With a
+    sample store set, chunks are written to disk, or read from it if the batch exists
+    """
+
+    def __init__(self, *, name: str, agent: Agent, valuerep: ValueRepresentation|None = None,
+                 alpha_getter: Callable[..., float]|None, gamma: float):
+
+        super().__init__(name=name, agent=agent, valuerep=valuerep, alpha_getter=alpha_getter, gamma=gamma)
+
+        self.chunk_episodes: int = constants.SAMPLE_CHUNK_EPISODES
+        self.sample_store: SampleStore|None = None
+
+        self._progress: LearnProgress = LearnProgress(0, [], 0, {}, None, False)
+
+        self.state_indexer = StateIndexer(agent.environment.get_report_base_states())
+
+        self.actions: tuple[TypeAction, ...] = tuple(agent.environment.get_actions())
+        self._action_indexes: dict[TypeAction, int] = {action: i for i, action in enumerate(self.actions)}
+
+
+    def set_sample_store(self, sample_store: SampleStore) -> None:
+        self.sample_store = sample_store
+
+
+    def learn(self, iterations: int, reporting_points: list[int]|None,
+              progress: LearnProgress|None = None) -> TypeLearnResult:
+        """Sample a batch and learn from it, or continue batch iterations from progress of a checkpoint
+
+        Sampled transitions are a part of the checkpointed method, so a resumed method does
+        not sample again. A loaded method adds the new samples to those it was saved with
+        """
+
+        if progress is None:
+
+            reports: list[int]|None
+
+            if reporting_points is not None:
+                reports = reporting_points[:] # dont want to modify the original list
+            else:
+                reports = None
+
+            rewards: list[list[object]] = []
+
+            print(f"Method {self.method_name} learning with batch of {iterations} samples")
 
-    def learn(self, iterations: int, reporting_points: list[int]|None) -> TypeLearnResult:
+            episode_lengths, received_reward = self._sample_environment(iterations)
 
-        reports: list[int]|None
+            if reports:
+                print("Learning round intial")
+                self._report(0)
+                rewards.append([self.method_name, 0, received_reward])
+
+            progress = LearnProgress(0, rewards, received_reward, episode_lengths, reports, False)
+            self._checkpoint(progress)
+
+        elif progress.completed:
+            self.completed_iterations += progress.iteration
+            return progress.rewards, progress.episode_lengths
 
-        if reporting_points is not None:
-            reports = reporting_points[:] # dont want to modify the original list
         else:
-            reports = None
+            print(f"Method {self.method_name} continuing from batch iteration {progress.iteration}")
+
+        self._progress = progress
+
+        _completed_iterations = self._learn_batch(progress.reports, progress.iteration + 1)
+
+        self._checkpoint(self._progress._replace(completed=True))
 
-        rewards = []
+        self.completed_iterations += self._progress.iteration
 
-        print(f"Method {self.method_name} learning with batch of {iterations} samples")
+        return progress.rewards, progress.episode_lengths
 
-        samples, episode_lengths, received_reward = self._sample_environment(iterations)
 
-        if reports:
-            print("Learning round intial")
-            self._report(0)
-            rewards.append([self.method_name, 0, received_reward])
+    def _checkpoint_iteration(self, iteration: int, reports: list[int]|None, converged: bool) -> None:
+        """Checkpoint after a completed batch iteration, called by _learn_batch"""
 
-        _completed_iterations = self._learn_batch(samples, reports)
+        self._progress = self._progress._replace(iteration=iteration, reports=reports, completed=converged)
+        self._checkpoint(self._progress)
 
-        return rewards, episode_lengths
 
+    def _sample_environment(self, sample_episodes: int) -> tuple[TypeEpisodeLenghts, float]:
 
-    def _sample_environment(self, sample_episodes: int) -> tuple[TypeSample, dict[str,int|float], float]:
+        if self.sample_store is not None and self.sample_store.exists():
+            print(f"Method {self.method_name} reading batch from {self.sample_store.path}")
 
-        episode_lengths =  { 'min_length': inf, 'mean_length' : 0, 'max_length': -inf }
+            for chunk in self.sample_store.get_chunks():
+                self._add_samples(chunk)
+
+            return self.sample_store.get_episode_statistics()
+
+        episode_lengths: TypeEpisodeLenghts =  { 'min_length': inf, 'mean_length' : 0, 'max_length': -inf }
         received_reward: float = 0
 
-        samples = []
+        get_index = self.state_indexer.get_index
 
-        for i in range(sample_episodes): # pylint: disable=unused-variable
+        states: list[int] = []
+        actions: list[int] = []
+        rewards: list[float] = []
+        next_states: list[int] = []
+        terminal: list[bool] = []
 
-            episode = []
+        for i in range(sample_episodes):
 
             self.agent.initialize()
             current_state = self.agent.get_state()
 
+            episode_len = 0
+
             while True:
 
                 sars = self.agent.do_sars(current_state, 0) # random policy, iteration not used
-                episode.append(sars)
+                episode_len += 1
+                received_reward += sars['reward']
+
+                states.append(get_index(current_state))
+                actions.append(self._action_indexes[sars['action']])
+                rewards.append(sars['reward'])
 
                 if sars['next_state'] == constants.TERMINAL_STATE:
+                    next_states.append(0)
+                    terminal.append(True)
                     break
 
                 if is_valid_state_tg(sars['next_state']): # -> TypeGuard[TypeValidState]
                     current_state = sars['next_state']
+                    next_states.append(get_index(current_state))
+                    terminal.append(False)
                 else:
                     raise SystemExit("MethodBatch: sample_environment: Assumed valid state")
 
-            episode_len = len(episode)
-
             if episode_len > episode_lengths['max_length']:
                 episode_lengths['max_length'] = episode_len
             if episode_len < episode_lengths['min_length']:
@@ -71,14 +157,33 @@ class MethodBatch(Method):
             current_mean = episode_lengths['mean_length']
             episode_lengths['mean_length'] = current_mean + 1 / (i+1) * (episode_len - current_mean)
 
+            if (i + 1) % self.chunk_episodes == 0 or i + 1 == sample_episodes:
+
+                chunk = SampleChunk(np.array(states, dtype=np.int64),
+                                    np.array(actions, dtype=np.int64),
+                                    np.array(rewards, dtype=np.float64),
+                                    np.array(next_states, dtype=np.int64),
+                                    np.array(terminal, dtype=np.bool_))
+
+                if self.sample_store is not None:
+                    self.sample_store.write_chunk(chunk)
+
+                self._add_samples(chunk)
 
-            received_reward += sum([step['reward'] for step in episode])
+                for column in (states, actions, rewards, next_states, terminal):
+                    column.clear()
 
-            samples.extend(episode)
+        if self.sample_store is not None:
+            self.sample_store.finish_writing(episode_lengths, received_reward)
 
-        return samples, episode_lengths, received_reward
+        return episode_lengths, received_reward
+
+
+    @abstractmethod
+    def _add_samples(self, chunk: SampleChunk) -> None:
+        pass
 
 
     @abstractmethod
-    def _learn_batch(self, samples: TypeSample, reports: list[int]|None) -> int:
+    def _learn_batch(self, reports: list[int]|None, first_iteration: int) -> int:
         pass
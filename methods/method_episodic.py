@@ -2,39 +2,74 @@ from abc import abstractmethod
 from math import inf
 
 from methods.method import Method
+from methods.checkpoint_store import LearnProgress
+from methods.episode_buffer import EpisodeBuffer
 
-from utils.type_aliases import TypeEpisode, TypeLearnResult
+from utils.type_aliases import TypeLearnResult, TypeEpisodeLenghts
 
 
 class MethodEpisodic(Method):
 
-    def learn(self, iterations: int, reporting_points: list[int]|None) -> TypeLearnResult:
+    CHECKPOINT_CHECK_INTERVAL = 1000  # episodes between checks if a timed checkpoint is due
+
+    def learn(self, iterations: int, reporting_points: list[int]|None,
+              progress: LearnProgress|None = None) -> TypeLearnResult:
+        """Learn for iterations, or continue from progress of a checkpoint
+
+        Iterations and reporting points count from completed_iterations, so a loaded method
+        continues learning from where it was saved. With a checkpoint store set, a checkpoint
+        is saved at each reporting point, between reporting points when one is due, and when
+        learning is completed
+        """
+
+        start = self.completed_iterations
 
         reports: list[int]|None
+        rewards: list[list[object]] # a list of lists: [[str, int, float],... ]
+        episode_lengths: TypeEpisodeLenghts
+
+        if progress is not None:
+
+            if progress.completed:
+                self.completed_iterations = progress.iteration
+                return progress.rewards, progress.episode_lengths
+
+            print(f"\nMethod {self.method_name} continuing from iteration {progress.iteration} "
+                  f"to {start + iterations} iterations")
+
+            first_iteration = progress.iteration + 1
+            reports = progress.reports
+            rewards = progress.rewards
+            received_reward = progress.received_reward
+            episode_lengths = progress.episode_lengths
 
-        if reporting_points is not None:
-            reports = reporting_points[:] # dont want to modify the original list
         else:
-            reports = None
 
-        rewards = [] # a list of lists: [[str, int, float],... ]
-        received_reward: float = 0
+            if reporting_points is not None:
+                reports = reporting_points[:] # dont want to modify the original list
+            else:
+                reports = None
 
-        print(f"\nMethod {self.method_name} learning for {iterations} iterations")
+            rewards = []
+            received_reward = 0
 
-        episode_lengths =  { 'min_length': inf, 'mean_length' : 0, 'max_length': -inf }
+            print(f"\nMethod {self.method_name} learning for {iterations} iterations")
 
-        if reports:
-            print("Learning round intial")
-            self._report(0)
-            rewards.append([self.method_name, 0, received_reward])
+            episode_lengths =  { 'min_length': inf, 'mean_length' : 0, 'max_length': -inf }
 
-        for iteration in range(1,iterations+1):
+            if reports:
+                print("Learning round intial")
+                self._report(start)
+                rewards.append([self.method_name, start, received_reward])
+
+            first_iteration = start + 1
+
+        for iteration in range(first_iteration, start+iterations+1):
 
             self.agent.initialize()
             episode = self._learn_episode(iteration) # _learn_episode to be overridden by concrete class
 
-            episode_len = len(episode)
+            episode_len = episode.length
 
             if episode_len > episode_lengths['max_length']:
                 episode_lengths['max_length'] = episode_len
@@ -42,20 +77,35 @@ class MethodEpisodic(Method):
                 episode_lengths['min_length'] = episode_len
 
             current_mean = episode_lengths['mean_length']
-            episode_lengths['mean_length'] = current_mean + 1 / iteration * (episode_len - current_mean)
+            episode_lengths['mean_length'] = current_mean + 1 / (iteration-start) * (episode_len - current_mean)
 
-            received_reward += sum([step['reward'] for step in episode])
+            received_reward += episode.total_reward
 
-            if reports and iteration == reports[0]:
+            if reports and iteration - start == reports[0]:
                 print(f"Learning round {iteration}: {received_reward}, {episode_lengths}")
 
                 self._report(iteration)
                 rewards.append([self.method_name, iteration, received_reward])
                 reports.pop(0)
 
+                self._checkpoint(LearnProgress(iteration, rewards, received_reward, episode_lengths,
+                                               reports, False))
+
+            elif (self.checkpoint_store is not None and
+                  iteration % MethodEpisodic.CHECKPOINT_CHECK_INTERVAL == 0 and
+                  self.checkpoint_store.is_due()):
+
+                self._checkpoint(LearnProgress(iteration, rewards, received_reward, episode_lengths,
+                                               reports, False))
+
+        self._checkpoint(LearnProgress(start + iterations, rewards, received_reward, episode_lengths,
+                                       reports, True))
+
+        self.completed_iterations = start + iterations
+
         return rewards, episode_lengths
 
 
     @abstractmethod
-    def _learn_episode(self, iteration: int) -> TypeEpisode:
+    def _learn_episode(self, iteration: int) -> EpisodeBuffer:
         pass
@@ -1,15 +1,40 @@
+from typing import Any, NamedTuple
+
 import numpy as np
 
 from agent.agent import Agent
 from methods.method_batch import MethodBatch
-from valuereps.vr_approximate import VrApproximateLinear
+from methods.sample_store import SampleChunk
+from valuereps.vr_approximate import VrApproximateLinear, SparseFeatures
+
+from utils.type_aliases import TypeValidState, TypeNDarray64, TypeNDarrayInt
+
+
+class FeatureGroup(NamedTuple):
+    indices: TypeNDarrayInt  # indices of non-zero features shared by the group
+    rows: TypeNDarrayInt     # state-action pairs in the group
+    values: TypeNDarray64    # non-zero features, one row per pair
+
 
-from utils.type_aliases import TypeSample, TypeNDarray64, is_valid_state_tg
-import utils.constants as constants  # pylint: disable=consider-using-from-import
+class LstdqBatch(NamedTuple):
+    features: list[SparseFeatures]      # features of sampled state-action pairs, one per unique pair
+    feature_groups: list[FeatureGroup]  # unique pairs grouped by indices of their non-zero features
+    pair_counts: TypeNDarray64          # number of samples per unique pair
+    pair_rewards: TypeNDarray64         # sum of rewards per unique pair
+    pair_starts: TypeNDarrayInt         # first transition of each pair, transitions are ordered by pair
+    feature_rows: TypeNDarrayInt        # pair per transition
+    counts: TypeNDarray64               # number of samples per transition
+    rewards: TypeNDarray64              # sum of rewards per transition
+    next_states: list[TypeValidState]   # unique non-terminal next states
+    next_state_indexes: TypeNDarrayInt  # index to next_states per transition, len(next_states) if terminal
+    sample_transitions: TypeNDarrayInt  # transition per sample in sample order, kept with refresh interval
+    sample_rewards: TypeNDarray64       # reward per sample in sample order, kept with refresh interval
 
 
 class MethodLspi(MethodBatch):
 
+    SOLVERS = ("pinv", "sherman_morrison")
+
     def __init__(self, *, name: str, agent: Agent, valuerep: VrApproximateLinear,
                  alpha_getter: None = None, gamma: float):
 
@@ -22,15 +47,39 @@ class MethodLspi(MethodBatch):
         self.max_iterations = 30    #arbitary defaults, use set_batch_learning_parameters
         self.stopping_limit = 0.005
 
+        self.solver = "pinv"
+        self.regularization = 0.001
+        self.refresh_interval: int|None = None
+
         self.fdim: int = self._valuerep.get_feature_dimension()
         self.matrix_a: TypeNDarray64  = np.zeros((self.fdim, self.fdim), dtype=np.float64)
         # np.fill_diagonal(self.matrix_a, 0.001) #0.000000001
 
-        self.vector_b: TypeNDarray64 = np.zeros((self.fdim, 1), dtype=np.float64)
+        self.vector_b: TypeNDarray64 = np.zeros(self.fdim, dtype=np.float64)
+
+        self.matrix_a_inv: TypeNDarray64 = np.zeros((self.fdim, self.fdim), dtype=np.float64)
+
+        # sampled transitions aggregated over chunks, keyed by state-action id and next state id
+        self._transition_keys: TypeNDarrayInt = np.zeros(0, dtype=np.int64)
+        self._transition_counts: TypeNDarray64 = np.zeros(0, dtype=np.float64)
+        self._transition_rewards: TypeNDarray64 = np.zeros(0, dtype=np.float64)
+
+        # order of samples, for Sherman-Morrison updates per sample when weights are refreshed
+        self._sample_transitions: TypeNDarrayInt = np.zeros(0, dtype=np.int64)
+        self._sample_rewards: TypeNDarray64 = np.zeros(0, dtype=np.float64)
 
 
-    def set_batch_learning_parameters(self, *, max_iterations: int|None = None,
-                                      stopping_limit: float|None = None) -> None:
+    def set_batch_learning_parameters(self, *, max_iterations: int|None = None,  # pylint: disable=too-many-arguments
+                                      stopping_limit: float|None = None,
+                                      solver: str|None = None,
+                                      regularization: float|None = None,
+                                      refresh_interval: int|None = None,
+                                      chunk_episodes: int|None = None) -> None:
+        """solver 'pinv' solves A w = b with pseudo-inverse of the accumulated A, 'sherman_morrison'
+        keeps inverse of A updated per sampled transition, starting from regularization * I. With
+        the latter, if refresh_interval is given, the order of samples is kept, the inverse is
+        updated per sample in sample order, and weights are refreshed every refresh_interval samples.
+        Set refresh_interval before sampling"""
 
         if max_iterations is not None:
             self.max_iterations = max_iterations
@@ -38,17 +87,94 @@ class MethodLspi(MethodBatch):
         if stopping_limit is not None:
             self.stopping_limit = stopping_limit
 
+        if solver is not None:
+            if solver not in MethodLspi.SOLVERS:
+                raise SystemExit(f"MethodLspi: unknown solver {solver}, expected one of {MethodLspi.SOLVERS}")
+            self.solver = solver
+
+        if regularization is not None:
+            self.regularization = regularization
+
+        if refresh_interval is not None:
+            self.refresh_interval = refresh_interval
+
+        if chunk_episodes is not None:
+            self.chunk_episodes = chunk_episodes
+
+
+    def _add_samples(self, chunk: SampleChunk) -> None:
+        """Merge a chunk of samples to sample counts and reward sums per unique transition
+
+        Terminal next states get id state_count, one past the ids of states. With a refresh
+        interval, the transition and reward of each sample are also kept in sample order
+        """
+
+        next_state_count = self.state_indexer.state_count + 1
+
+        next_states = np.where(chunk.terminal, self.state_indexer.state_count, chunk.next_states)
+        state_actions = chunk.states * len(self.actions) + chunk.actions
+
+        keys = np.concatenate((self._transition_keys, state_actions * next_state_count + next_states))
+        counts = np.concatenate((self._transition_counts, np.ones(len(chunk.states), dtype=np.float64)))
+        rewards = np.concatenate((self._transition_rewards, chunk.rewards))
+
+        previous_count = len(self._transition_keys)
 
-    def _learn_batch(self, samples: TypeSample, reports: list[int]|None) -> int:
-        return self._lspi(samples, reports)
+        self._transition_keys, inverse = np.unique(keys, return_inverse=True)
+        self._transition_counts = np.bincount(inverse, weights=counts).astype(np.float64, copy=False)
+        self._transition_rewards = np.bincount(inverse, weights=rewards).astype(np.float64, copy=False)
 
+        if self.refresh_interval:
+            # earlier samples point to transitions of the previous keys, renumbered by unique
+            self._sample_transitions = np.concatenate((inverse[:previous_count][self._sample_transitions],
+                                                       inverse[previous_count:]))
+            self._sample_rewards = np.concatenate((self._sample_rewards, chunk.rewards))
 
-    def _lspi(self, samples: TypeSample, reports: list[int]|None) -> int:
 
-        i = 1
+    def _get_state_arrays(self) -> dict[str, np.ndarray[Any, Any]]:
+
+        return {
+            'matrix_a': self.matrix_a,
+            'vector_b': self.vector_b,
+            'matrix_a_inv': self.matrix_a_inv,
+            'transition_keys': self._transition_keys,
+            'transition_counts': self._transition_counts,
+            'transition_rewards': self._transition_rewards,
+            'sample_transitions': self._sample_transitions,
+            'sample_rewards': self._sample_rewards
+        }
+
+
+    def _set_state_arrays(self, arrays: dict[str, np.ndarray[Any, Any]]) -> None:
+
+        if arrays['vector_b'].shape != self.vector_b.shape:
+            raise SystemExit(f"MethodLspi: cannot load state of feature dimension {len(arrays['vector_b'])}, "
+                             f"expected {self.fdim}")
+
+        self.matrix_a = arrays['matrix_a']
+        self.vector_b = arrays['vector_b']
+        self.matrix_a_inv = arrays['matrix_a_inv']
+
+        self._transition_keys = arrays['transition_keys']
+        self._transition_counts = arrays['transition_counts']
+        self._transition_rewards = arrays['transition_rewards']
+
+        self._sample_transitions = arrays['sample_transitions']
+        self._sample_rewards = arrays['sample_rewards']
+
+
+    def _learn_batch(self, reports: list[int]|None, first_iteration: int) -> int:
+        return self._lspi(reports, first_iteration)
+
+
+    def _lspi(self, reports: list[int]|None, first_iteration: int = 1) -> int:
+
+        batch = self._get_batch_features()
+
+        i = first_iteration
 
         while i <= self.max_iterations:
-            change = self._lstdq(samples)
+            change = self._lstdq(batch)
 
             if reports and i == reports[0]:
                 print(f"Learning round {i}: change is {change}")
@@ -56,43 +182,177 @@ class MethodLspi(MethodBatch):
                 self._report(i)
                 reports.pop(0)
 
+            converged = change < self.stopping_limit
 
-            if change < self.stopping_limit:
+            self._checkpoint_iteration(i, reports, converged)
+
+            if converged:
                 return i
             i += 1
 
         return i
 
 
-    def _lstdq(self, samples: TypeSample) -> float:
+    def _get_batch_features(self) -> LstdqBatch:
+        """Features of sampled state-action pairs, next states indexed for greedy lookups
+
+        States and actions of the samples do not change between LSPI iterations, only the
+        greedy actions in next states do
+        """
+
+        action_count = len(self.actions)
+        state_actions, next_state_ids = np.divmod(self._transition_keys, self.state_indexer.state_count + 1)
+
+        # transition keys are sorted, so transitions of a state-action pair are consecutive
+        unique_state_actions, pair_starts, feature_rows = np.unique(state_actions, return_index=True,
+                                                                    return_inverse=True)
+
+        features = [self._valuerep.get_sparse_features(self.state_indexer.get_state(state_action // action_count),
+                                                       self.actions[state_action % action_count])
+                    for state_action in unique_state_actions.tolist()]
+
+        # terminal id is the largest, so terminal next states get index len(next_states)
+        unique_next_states, next_state_indexes = np.unique(next_state_ids, return_inverse=True)
+
+        next_states = [self.state_indexer.get_state(next_state) for next_state in unique_next_states.tolist()
+                       if next_state != self.state_indexer.state_count]
 
-        for sample in samples:
-            current_state = sample['state']
-            current_action = sample['action']
-            reward = sample['reward']
-            next_state = sample['next_state']
+        return LstdqBatch(features, self._get_feature_groups(features),
+                          np.add.reduceat(self._transition_counts, pair_starts),
+                          np.add.reduceat(self._transition_rewards, pair_starts),
+                          pair_starts, feature_rows, self._transition_counts, self._transition_rewards,
+                          next_states, next_state_indexes, self._sample_transitions, self._sample_rewards)
 
-            current_features: TypeNDarray64 = np.array([
-                self._valuerep.get_features(current_state, current_action) ], dtype=np.float64).T
 
-            if next_state == constants.TERMINAL_STATE:
-                next_features: TypeNDarray64 = np.zeros((self.fdim, 1), dtype=np.float64)
-            else:
-                assert is_valid_state_tg(next_state) # -> TypeGuard[TypeValidState]
-                next_action = self._valuerep.get_greedy_action(next_state)
-                next_features = np.array([ self._valuerep.get_features(next_state, next_action) ],
-                                                            dtype=np.float64).T
+    def _get_feature_groups(self, features: list[SparseFeatures]) -> list[FeatureGroup]:
+        """Group state-action pairs by indices of their non-zero features
 
-            self.matrix_a = (self.matrix_a
-                             + current_features
-                             @ ( current_features - self.gamma * next_features).T)
+        Products over pairs in a group are dense products of the non-zero features only
+        """
 
-            self.vector_b = self.vector_b + current_features * reward
+        group_rows: dict[tuple[int, ...], list[int]] = {}
+
+        for row, pair_features in enumerate(features):
+            group_rows.setdefault(tuple(pair_features.indices.tolist()), []).append(row)
+
+        groups = []
+
+        for indices, rows in group_rows.items():
+            groups.append(FeatureGroup(np.array(indices, dtype=np.int64),
+                                       np.array(rows, dtype=np.int64),
+                                       np.array([features[row].values for row in rows],
+                                                dtype=np.float64).reshape(len(rows), len(indices))))
+
+        return groups
+
+
+    def _get_next_features(self, batch: LstdqBatch) -> list[SparseFeatures]:
+        """Features of greedy actions in next states, and empty features for terminal state last"""
+
+        next_features = []
+
+        for next_state in batch.next_states:
+            next_action = self._valuerep.get_greedy_action(next_state)
+            next_features.append(self._valuerep.get_sparse_features(next_state, next_action))
+
+        next_features.append(SparseFeatures(np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float64)))
+
+        return next_features
+
+
+    def _lstdq(self, batch: LstdqBatch) -> float:
+
+        if self.solver == "sherman_morrison":
+            return self._lstdq_sherman_morrison(batch)
+
+        next_state_features = np.zeros((len(batch.next_states) + 1, self.fdim), dtype=np.float64)
+
+        for i, next_features in enumerate(self._get_next_features(batch)):
+            next_state_features[i, next_features.indices] = next_features.values
+
+        # sum of next features over samples of each state-action pair
+        pair_next_features = np.add.reduceat(batch.counts[:, np.newaxis]
+                                             * next_state_features[batch.next_state_indexes],
+                                             batch.pair_starts)
+
+        # A = sum over pairs of features (count features - gamma next features)^T
+        self.matrix_a = np.zeros((self.fdim, self.fdim), dtype=np.float64)
+        self.vector_b = np.zeros(self.fdim, dtype=np.float64)
+
+        for group in batch.feature_groups:
+            counted_values = batch.pair_counts[group.rows, np.newaxis] * group.values
+
+            self.matrix_a[np.ix_(group.indices, group.indices)] += group.values.T @ counted_values
+            self.matrix_a[group.indices] -= self.gamma * (group.values.T @ pair_next_features[group.rows])
+            self.vector_b[group.indices] += group.values.T @ batch.pair_rewards[group.rows]
 
         #weights = np.linalg.inv(self.matrix_a) @ self.vector_b
         #weights = np.linalg.solve(self.matrix_a, self.vector_b)
 
         weights = np.linalg.pinv(self.matrix_a) @ self.vector_b
-        change = self._valuerep.set_weights_to(weights[:,0].tolist())
+        change = self._valuerep.set_weights_to(weights)
+
+        return change
+
+
+    def _lstdq_sherman_morrison(self, batch: LstdqBatch) -> float:
+        """LSTDQ keeping the inverse of A, updated with a rank-one Sherman-Morrison step per transition
+
+        A starts from regularization * I, so the inverse stays defined for a singular A. Repeated
+        samples of a transition are a single update scaled by the sample count. With a refresh
+        interval, the inverse is updated per sample in sample order instead, and weights and greedy
+        next actions are refreshed every refresh_interval samples. Products with the inverse use
+        the non-zero features only
+        """
+
+        if self.refresh_interval:
+            if len(batch.sample_transitions) != batch.counts.sum():
+                raise SystemExit("MethodLspi: order of samples not kept, set refresh interval before sampling")
+
+            # one update of count one per sample
+            transitions = batch.sample_transitions.tolist()
+            counts = [1.0] * len(transitions)
+            rewards = batch.sample_rewards.tolist()
+        else:
+            transitions = list(range(len(batch.counts)))
+            counts = batch.counts.tolist()
+            rewards = batch.rewards.tolist()
+
+        initial_weights = self._valuerep.get_weights().copy()
+
+        matrix_a_inv = np.identity(self.fdim, dtype=np.float64) / self.regularization
+        self.vector_b = np.zeros(self.fdim, dtype=np.float64)
+
+        next_features = self._get_next_features(batch)
+
+        feature_rows = batch.feature_rows.tolist()
+        next_state_indexes = batch.next_state_indexes.tolist()
+
+        for i, (transition, count, reward) in enumerate(zip(transitions, counts, rewards)):
+
+            # A += count features (features - gamma next_features)^T
+            features = batch.features[feature_rows[transition]]
+            next_state_features = next_features[next_state_indexes[transition]]
+
+            a_inv_features = count * (matrix_a_inv[:, features.indices] @ features.values)
+            difference_a_inv = (features.values @ matrix_a_inv[features.indices]
+                                - self.gamma * (next_state_features.values
+                                                @ matrix_a_inv[next_state_features.indices]))
+
+            denominator = 1 + count * (difference_a_inv[features.indices] @ features.values)
+
+            matrix_a_inv -= np.outer(a_inv_features / denominator, difference_a_inv)
+            self.vector_b[features.indices] += reward * features.values
+
+            if self.refresh_interval and (i + 1) % self.refresh_interval == 0:
+                self._valuerep.set_weights_to(matrix_a_inv @ self.vector_b)
+                next_features = self._get_next_features(batch)
+
+        self.matrix_a_inv = matrix_a_inv
+
+        weights = matrix_a_inv @ self.vector_b
+        self._valuerep.set_weights_to(weights)
+
+        change: float = np.linalg.norm(weights - initial_weights, ord=np.inf).item()
 
         return change
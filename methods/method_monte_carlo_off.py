@@ -1,10 +1,9 @@
 from agent.agent import Agent
 from methods.method_episodic import MethodEpisodic
+from methods.episode_buffer import EpisodeBuffer
 from valuereps.vr_tabular import VrTabular
 
-from utils.type_aliases import (TypeAction, TypeValidState,
-                                TypeEpisode, TypeWeightedSars, TypeWeightedEpisode,
-                                is_valid_state_tg)
+from utils.type_aliases import TypeAction, TypeValidState, is_valid_state_tg
 import utils.constants as constants  # pylint: disable=consider-using-from-import
 
 
@@ -18,17 +17,20 @@ class MonteCarloOff(MethodEpisodic):
         self._valuerep: VrTabular = valuerep
         self._get_alpha: None = None # overrides Optional[Callable] from Method, no alpha for MC
 
+        self._episode: EpisodeBuffer = EpisodeBuffer()
 
-    def _learn_episode(self, iteration: int) -> TypeEpisode:
+
+    def _learn_episode(self, iteration: int) -> EpisodeBuffer:
         episode = self._generate_mc_episode_off_policy(iteration)
         self._iterate_episode_mc_off_policy(episode)
 
         return episode
 
 
-    def _generate_mc_episode_off_policy(self, iteration: int) -> TypeWeightedEpisode:
+    def _generate_mc_episode_off_policy(self, iteration: int) -> EpisodeBuffer:
 
-        episode = []
+        episode = self._episode
+        episode.reset()
 
         current_state: TypeValidState = self.agent.get_state()
 
@@ -38,14 +40,7 @@ class MonteCarloOff(MethodEpisodic):
 
             reward, next_state = self.agent.do_action(action)
 
-            wsars: TypeWeightedSars = {
-                'state': current_state,
-                'action': action,
-                'reward': reward,
-                'next_state': next_state,
-                'prob': prob
-            }
-            episode.append(wsars)
+            episode.append(current_state, action, reward, prob)
 
             if next_state == constants.TERMINAL_STATE:
                 return episode
@@ -54,17 +49,17 @@ class MonteCarloOff(MethodEpisodic):
             current_state = next_state
 
 
-    def _iterate_episode_mc_off_policy(self, episode: TypeWeightedEpisode) -> None:
+    def _iterate_episode_mc_off_policy(self, episode: EpisodeBuffer) -> None:
 
         returns_g: float = 0
         weighted_w: float = 1
 
-        for step in reversed(episode):
+        for step in reversed(range(episode.length)):
 
-            current_state = step['state']
-            current_action = step['action']
-            current_prob_b = step['prob']
-            current_r = step['reward']
+            current_state = episode.states[step]
+            current_action = episode.actions[step]
+            current_prob_b = episode.probs[step]
+            current_r = episode.rewards[step]
 
             returns_g = self.gamma * returns_g + current_r
 
@@ -1,8 +1,9 @@
 from methods.method_episodic import MethodEpisodic
+from methods.episode_buffer import EpisodeBuffer
 from agent.agent import Agent
 from valuereps.vr_tabular import VrTabular
 
-from utils.type_aliases import TypeEpisode, is_valid_state_tg
+from utils.type_aliases import TypeValidState, is_valid_state_tg
 import utils.constants as constants  # pylint: disable=consider-using-from-import
 
 
@@ -16,8 +17,10 @@ class MonteCarloOn(MethodEpisodic):
         self._valuerep: VrTabular = valuerep
         self._get_alpha: None = None # overrides Optional[Callable] from Method, no alpha for MC
 
+        self._episode: EpisodeBuffer = EpisodeBuffer()
 
-    def _learn_episode(self, iteration: int) -> TypeEpisode:
+
+    def _learn_episode(self, iteration: int) -> EpisodeBuffer:
 
         episode = self._generate_mc_episode(iteration)
         self._iterate_episode_mc_on_policy(episode)
@@ -25,33 +28,36 @@ class MonteCarloOn(MethodEpisodic):
         return episode
 
 
-    def _generate_mc_episode(self, iteration: int) -> TypeEpisode:
+    def _generate_mc_episode(self, iteration: int) -> EpisodeBuffer:
 
-        episode = []
+        episode = self._episode
+        episode.reset()
 
-        current_state = self.agent.get_state()
+        current_state: TypeValidState = self.agent.get_state()
 
         while True:
 
-            sars = self.agent.do_sars(current_state, iteration)
-            episode.append(sars)
+            action = self.agent.select_action_by_behavior_policy(current_state, iteration)
+            reward, next_state = self.agent.do_action(action)
+
+            episode.append(current_state, action, reward)
 
-            if sars['next_state'] == constants.TERMINAL_STATE:
+            if next_state == constants.TERMINAL_STATE:
                 return episode
 
-            assert is_valid_state_tg(sars['next_state']) # -> TypeGuard[TypeValidState]
-            current_state = sars['next_state']
+            assert is_valid_state_tg(next_state) # -> TypeGuard[TypeValidState]
+            current_state = next_state
 
 
-    def _iterate_episode_mc_on_policy(self, episode: TypeEpisode) -> None:
+    def _iterate_episode_mc_on_policy(self, episode: EpisodeBuffer) -> None:
 
         returns_g: float = 0
 
-        for step in reversed(episode):
+        for step in reversed(range(episode.length)):
 
-            current_state = step['state']
-            current_action = step['action']
-            current_r = step['reward']
+            current_state = episode.states[step]
+            current_action = episode.actions[step]
+            current_r = episode.rewards[step]
 
             returns_g = self.gamma * returns_g + current_r
 
@@ -1,10 +1,11 @@
 from typing import Callable
 
 from methods.method_episodic import MethodEpisodic
+from methods.episode_buffer import EpisodeBuffer
 from agent.agent import Agent
 from valuereps.vr_tabular import VrTabular
 
-from utils.type_aliases import TypeState, TypeValidState, TypeAction, TypeEpisode, is_valid_state_tg
+from utils.type_aliases import TypeState, TypeValidState, TypeAction, is_valid_state_tg
 import utils.constants as constants  # pylint: disable=consider-using-from-import
 
 
@@ -18,28 +19,31 @@ class Qlearning(MethodEpisodic):
         self._valuerep: VrTabular = valuerep
         self._get_alpha: Callable[..., float] = alpha_getter # overrides Optional[Callable] from Method
 
+        self._episode: EpisodeBuffer = EpisodeBuffer(record=False)
 
-    def _learn_episode(self, iteration: int) -> TypeEpisode:
 
-        episode = []
+    def _learn_episode(self, iteration: int) -> EpisodeBuffer:
+
+        episode = self._episode
+        episode.reset()
 
         current_state: TypeValidState = self.agent.get_state()
 
         while True:
 
-            sars = self.agent.do_sars(current_state, iteration)
+            action = self.agent.select_action_by_behavior_policy(current_state, iteration)
+            reward, next_state = self.agent.do_action(action)
 
-            self._q_update(current_state=sars['state'], current_action=sars['action'],
-                           reward=sars['reward'], next_state=sars['next_state'],
-                           iteration=iteration)
+            self._q_update(current_state=current_state, current_action=action,
+                           reward=reward, next_state=next_state, iteration=iteration)
 
-            episode.append(sars)
+            episode.append(current_state, action, reward)
 
-            if sars['next_state'] == constants.TERMINAL_STATE:
+            if next_state == constants.TERMINAL_STATE:
                 return episode
 
-            assert is_valid_state_tg(sars['next_state']) # -> TypeGuard[TypeValidState]
-            current_state = sars['next_state']
+            assert is_valid_state_tg(next_state) # -> TypeGuard[TypeValidState]
+            current_state = next_state
 
 
     def _q_update(self, *, current_state: TypeValidState, current_action: TypeAction,
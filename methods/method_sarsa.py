@@ -1,11 +1,11 @@
 from typing import Callable
 
 from methods.method_episodic import MethodEpisodic
+from methods.episode_buffer import EpisodeBuffer
 from agent.agent import Agent
 from valuereps.vr_tabular import VrTabular
 
-from utils.type_aliases import (TypeAction, TypeState, TypeValidState,
-                                TypeEpisode, TypeSarsa, is_valid_state_tg)
+from utils.type_aliases import TypeAction, TypeState, TypeValidState, is_valid_state_tg
 import utils.constants as constants  # pylint: disable=consider-using-from-import
 
 
@@ -19,10 +19,13 @@ class Sarsa(MethodEpisodic):
         self._valuerep: VrTabular = valuerep
         self._get_alpha: Callable[..., float] = alpha_getter # overrides Optional[Callable] from Method
 
+        self._episode: EpisodeBuffer = EpisodeBuffer(record=False)
 
-    def _learn_episode(self, iteration: int) -> TypeEpisode:
 
-        episode = []
+    def _learn_episode(self, iteration: int) -> EpisodeBuffer:
+
+        episode = self._episode
+        episode.reset()
 
         current_state = self.agent.get_state()
         action = self.agent.select_action_by_behavior_policy(current_state, iteration)
@@ -39,15 +42,7 @@ class Sarsa(MethodEpisodic):
             self.sarsa_update(current_state=current_state, current_action=action, reward=reward,
                               next_state=next_state, next_action=next_action, iteration=iteration)
 
-            sarsa: TypeSarsa = {
-                'state': current_state,
-                'action': action,
-                'reward': reward,
-                'next_state': next_state,
-                'next_action': next_action
-            }
-
-            episode.append(sarsa)
+            episode.append(current_state, action, reward)
 
             if next_state == constants.TERMINAL_STATE:
                 return episode
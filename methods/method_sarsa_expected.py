@@ -1,10 +1,11 @@
 from typing import Callable
 
 from methods.method_episodic import MethodEpisodic
+from methods.episode_buffer import EpisodeBuffer
 from agent.agent import Agent
 from valuereps.vr_tabular import VrTabular
 
-from utils.type_aliases import TypeAction, TypeValidState, TypeEpisode, TypeSarsaE, is_valid_state_tg
+from utils.type_aliases import TypeAction, TypeValidState, is_valid_state_tg
 import utils.constants as constants  # pylint: disable=consider-using-from-import
 
 
@@ -19,10 +20,13 @@ class SarsaExpected(MethodEpisodic):
 
         self._get_alpha: Callable[..., float] = alpha_getter # overrides Optional[Callable] from Method
 
+        self._episode: EpisodeBuffer = EpisodeBuffer(record=False)
 
-    def _learn_episode(self, iteration: int) -> TypeEpisode:
 
-        episode = []
+    def _learn_episode(self, iteration: int) -> EpisodeBuffer:
+
+        episode = self._episode
+        episode.reset()
 
         current_state = self.agent.get_state()
 
@@ -42,15 +46,7 @@ class SarsaExpected(MethodEpisodic):
                                        reward=reward, next_state_value=next_state_value,
                                        iteration=iteration)
 
-            sarsa_e: TypeSarsaE = {
-                'state': current_state,
-                'action': action,
-                'reward': reward,
-                'next_state': next_state,
-                'next_state_value': next_state_value
-            }
-
-            episode.append(sarsa_e)
+            episode.append(current_state, action, reward)
 
             if next_state == constants.TERMINAL_STATE:
                 return episode
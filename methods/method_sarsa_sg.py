@@ -1,13 +1,11 @@
 from typing import Callable
 
-import numpy as np
-
 from methods.method_episodic import MethodEpisodic
+from methods.episode_buffer import EpisodeBuffer
 from agent.agent import Agent
 from valuereps.vr_approximate import VrApproximateLinear
 
-from utils.type_aliases import (TypeAction, TypeState, TypeValidState, TypeEpisode, TypeSarsa,
-                                is_valid_state_tg)
+from utils.type_aliases import TypeAction, TypeState, TypeValidState, is_valid_state_tg
 import utils.constants as constants  # pylint: disable=consider-using-from-import
 
 
@@ -21,9 +19,12 @@ class SarsaSemigradient(MethodEpisodic):
         self._valuerep: VrApproximateLinear = valuerep
         self._get_alpha: Callable[..., float] = alpha_getter # overrides Optional[Callable] from Method
 
-    def _learn_episode(self, iteration: int) -> TypeEpisode:
+        self._episode: EpisodeBuffer = EpisodeBuffer(record=False)
+
+    def _learn_episode(self, iteration: int) -> EpisodeBuffer:
 
-        episode = []
+        episode = self._episode
+        episode.reset()
 
         current_state = self.agent.get_state()
         action = self.agent.select_action_by_behavior_policy(current_state, iteration)
@@ -41,14 +42,7 @@ class SarsaSemigradient(MethodEpisodic):
             self._sarsa_sg_update(current_state=current_state, current_action=action, reward=reward,
                               next_state=next_state, next_action=next_action, iteration=iteration)
 
-            sarsa: TypeSarsa = {
-                'state': current_state,
-                'action': action,
-                'reward': reward,
-                'next_state': next_state,
-                'next_action': next_action
-            }
-            episode.append(sarsa)
+            episode.append(current_state, action, reward)
 
             if next_state == constants.TERMINAL_STATE:
                 return episode
@@ -78,8 +72,6 @@ class SarsaSemigradient(MethodEpisodic):
 
         alpha = self._get_alpha(iteration=iteration)
 
-        gradient = self._valuerep.get_gradient(current_state, current_action)
         change = alpha * ( reward + self.gamma*next_node_q -  current_q)
-        update = np.multiply(change, gradient)
 
-        self._valuerep.update_weights_by(update)
+        self._valuerep.update_weights_along_gradient(current_state, current_action, change)
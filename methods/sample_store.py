@@ -0,0 +1,95 @@
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Iterator, NamedTuple
+
+import numpy as np
+
+from utils.type_aliases import TypeNDarray64, TypeNDarrayInt, TypeNDarrayBool, TypeEpisodeLenghts
+
+
+class SampleChunk(NamedTuple):
+    states: TypeNDarrayInt       # state ids of a StateIndexer
+    actions: TypeNDarrayInt      # action indexes to environment actions
+    rewards: TypeNDarray64
+    next_states: TypeNDarrayInt  # state ids, 0 for terminal next states
+    terminal: TypeNDarrayBool
+
+
+class SampleStore:
+    """Batch samples stored on disk in folder/key, one .npy file per column and chunk
+
+    Stored chunks are memory-mapped when read. A batch is written to a temporary folder
+    and renamed when complete, so agents running in parallel never read a partial batch.
+    If another process completed the same batch first, the copy being written is dropped
+    """
+
+    META_FILE = "meta.json"
+
+    def __init__(self, folder: Path, key: str) -> None:
+
+        self.path: Path = folder / key
+
+        self._writing_path: Path|None = None
+        self._chunk_count: int = 0
+
+
+    def exists(self) -> bool:
+        return (self.path / SampleStore.META_FILE).exists()
+
+
+    def get_chunks(self) -> Iterator[SampleChunk]:
+
+        with open(self.path / SampleStore.META_FILE, "r", encoding="utf-8") as file:
+            chunk_count = json.load(file)['chunks']
+
+        for i in range(chunk_count):
+            yield SampleChunk(*[np.load(self.path / f"{column}_{i:05d}.npy", mmap_mode='r')
+                                for column in SampleChunk._fields])
+
+
+    def get_episode_statistics(self) -> tuple[TypeEpisodeLenghts, float]:
+
+        with open(self.path / SampleStore.META_FILE, "r", encoding="utf-8") as file:
+            meta = json.load(file)
+
+        return meta['episode_lengths'], meta['received_reward']
+
+
+    def write_chunk(self, chunk: SampleChunk) -> None:
+
+        if self._writing_path is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._writing_path = Path(tempfile.mkdtemp(prefix=f"{self.path.name}.", dir=self.path.parent))
+            self._chunk_count = 0
+
+        for column, values in zip(SampleChunk._fields, chunk):
+            np.save(self._writing_path / f"{column}_{self._chunk_count:05d}.npy", values)
+
+        self._chunk_count += 1
+
+
+    def finish_writing(self, episode_lengths: TypeEpisodeLenghts, received_reward: float) -> None:
+
+        if self._writing_path is None:
+            raise SystemExit(f"SampleStore: no chunks written for {self.path}")
+
+        meta = {
+            'chunks': self._chunk_count,
+            'episode_lengths': episode_lengths,
+            'received_reward': received_reward
+        }
+
+        with open(self._writing_path / SampleStore.META_FILE, "w", encoding="utf-8") as file:
+            json.dump(meta, file)
+
+        try:
+            os.rename(self._writing_path, self.path)
+        except OSError:
+            if not self.exists():
+                raise
+            shutil.rmtree(self._writing_path)
+
+        self._writing_path = None
@@ -0,0 +1,53 @@
+from abc import ABC, abstractmethod
+from typing import Callable, NamedTuple, Sequence
+
+import numpy as np
+
+from utils.type_aliases import (TypeValidState, TypeAction, TypeActions, TypeEpisodeLenghts,
+                                TypeNDarray64)
+
+
+# probabilities of actions in a state, in the order of environment actions
+TypeActionProbabilities = Callable[[TypeValidState], Sequence[float]]
+
+
+class PolicyEvaluation(NamedTuple):
+    actions: TypeActions
+    q_values: dict[TypeValidState, tuple[float, ...]]   # value of each action in a state
+    state_values: dict[TypeValidState, float]           # value of a state under the policy
+    expected_return: float                              # expected return of an episode
+    episode_lengths: TypeEpisodeLenghts                 # min, expected and max length of an episode
+
+
+    def get_values(self, states: Sequence[TypeValidState], actions: Sequence[TypeAction]) -> TypeNDarray64:
+        """Values of state-action pairs, with the signature of ValueRepresentation.get_values"""
+
+        action_indexes = {action: index for index, action in enumerate(self.actions)}
+
+        return np.array([self.q_values[state][action_indexes[action]]
+                         for state, action in zip(states, actions)], dtype=np.float64)
+
+
+def greedy_probabilities(actions: TypeActions,
+                         get_action: Callable[[TypeValidState], TypeAction]) -> TypeActionProbabilities:
+    """Action probabilities of a deterministic policy"""
+
+    def probabilities(state: TypeValidState) -> tuple[float, ...]:
+        action = get_action(state)
+        return tuple(1.0 if action == candidate else 0.0 for candidate in actions)
+
+    return probabilities
+
+
+class EnvironmentModel(ABC):
+    """Known transition model of an environment, to evaluate and solve policies without sampling"""
+
+    @abstractmethod
+    def evaluate_policy(self, action_probabilities: TypeActionProbabilities) -> PolicyEvaluation:
+        pass
+
+
+    @abstractmethod
+    def solve(self) -> PolicyEvaluation:
+        """Optimal values and evaluation of an optimal policy"""
+        pass
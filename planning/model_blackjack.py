@@ -0,0 +1,212 @@
+import itertools
+from typing import Callable
+
+import numpy as np
+
+from environments.blackjack import Blackjack
+from planning.environment_model import EnvironmentModel, PolicyEvaluation, TypeActionProbabilities
+
+from utils.type_aliases import TypeValidState, TypeBlackjackActions, TypeEpisodeLenghts, TypeNDarray64
+
+
+# a hand is (max score, soft ace), as in the simple blackjack state
+TypeHand = tuple[int, bool]
+
+# chooses action probabilities in a state given values of the actions
+TypeActionChooser = Callable[[TypeValidState, tuple[float, ...]], tuple[float, ...]]
+
+
+class ModelBlackjack(EnvironmentModel):
+    """Exact model of the infinite deck blackjack of EnvironmentBlackjack, variant simple
+
+    Cards are drawn uniformly from the 13 ranks. Final score distribution of the dealer is
+    computed once for each up-card, and values of a policy are backed up from hands with the
+    highest hard total, as a hit always increases the hard total. Returns are undiscounted
+    """
+
+    def __init__(self) -> None:
+
+        self._actions: TypeBlackjackActions = Blackjack.get_actions()
+
+        # card values with ace as 1, and their probabilities
+        values = [1 if value is None else value for value in Blackjack.card_values]
+        self._card_values: list[int] = sorted(set(values))
+        self._card_probs: list[float] = [values.count(value) / len(values) for value in self._card_values]
+
+        self._dealer_scores: list[int] = list(range(2, 12))
+        self._final_scores: list[int] = list(range(Blackjack.HIT_LIMIT_DEALER, Blackjack.BUST_LIMIT + 1))
+
+        # probabilities of final scores in _final_scores, and of bust as the last element
+        self._dealer_memo: dict[TypeHand, TypeNDarray64] = {}
+        self.dealer_outcomes: dict[int, TypeNDarray64] = {
+            dealer: self._get_dealer_outcomes(self._get_up_card_hand(dealer)) for dealer in self._dealer_scores
+        }
+
+        hands = [(player, False) for player in range(4, Blackjack.BUST_LIMIT + 1)] + \
+                [(player, True) for player in range(12, Blackjack.BUST_LIMIT + 1)]
+
+        self._hands: list[TypeHand] = sorted(hands, key=self._get_hard_total, reverse=True)
+
+        self.initial_distribution: dict[TypeValidState, float] = self._get_initial_distribution()
+
+
+    def _get_hard_total(self, hand: TypeHand) -> int:
+        return hand[0] - 10 * hand[1]
+
+
+    def _get_up_card_hand(self, dealer: int) -> TypeHand:
+        return (dealer, dealer == 11)
+
+
+    def _add_card(self, hand: TypeHand, card_value: int) -> TypeHand|None:
+        """Hand after drawing a card, None if bust"""
+
+        hard_total = self._get_hard_total(hand) + card_value
+
+        if hard_total > Blackjack.BUST_LIMIT:
+            return None
+
+        # a hard hand with an ace counted as one cannot become soft again
+        soft = (hand[1] or card_value == 1) and hard_total + 10 <= Blackjack.BUST_LIMIT
+
+        return (hard_total + 10 * soft, soft)
+
+
+    def _get_dealer_outcomes(self, hand: TypeHand) -> TypeNDarray64:
+
+        if hand in self._dealer_memo:
+            return self._dealer_memo[hand]
+
+        outcomes = np.zeros(len(self._final_scores) + 1, dtype=np.float64)
+
+        if hand[0] >= Blackjack.HIT_LIMIT_DEALER:
+            outcomes[self._final_scores.index(hand[0])] = 1.0
+        else:
+            for card_value, card_prob in zip(self._card_values, self._card_probs):
+                next_hand = self._add_card(hand, card_value)
+                if next_hand is None:
+                    outcomes[-1] += card_prob
+                else:
+                    outcomes += card_prob * self._get_dealer_outcomes(next_hand)
+
+        self._dealer_memo[hand] = outcomes
+
+        return outcomes
+
+
+    def _get_stand_value(self, dealer: int, player: int) -> float:
+
+        outcomes = self.dealer_outcomes[dealer]
+
+        signs = np.sign(player - np.array(self._final_scores))
+
+        return float(outcomes[-1] + np.dot(signs, outcomes[:-1]))
+
+
+    def _get_initial_distribution(self) -> dict[TypeValidState, float]:
+        """Probabilities of initial states, deals with a player blackjack are dealt again"""
+
+        ranks = [1 if value is None else value for value in Blackjack.card_values]
+
+        player_probs: dict[TypeHand, float] = {}
+
+        for first, second in itertools.product(ranks, ranks):
+
+            first_hand = self._add_card((0, False), first)
+            assert first_hand is not None
+
+            hand = self._add_card(first_hand, second)
+            assert hand is not None
+
+            if hand == (Blackjack.BUST_LIMIT, True):
+                continue  # blackjack
+
+            player_probs[hand] = player_probs.get(hand, 0.0) + 1.0
+
+        player_total = sum(player_probs.values())
+
+        distribution: dict[TypeValidState, float] = {}
+
+        for dealer_rank in ranks:
+            dealer = 11 if dealer_rank == 1 else dealer_rank
+            for (player, soft), count in player_probs.items():
+                state = (dealer, player, soft)
+                distribution[state] = distribution.get(state, 0.0) + count / player_total / len(ranks)
+
+        return distribution
+
+
+    def evaluate_policy(self, action_probabilities: TypeActionProbabilities) -> PolicyEvaluation:
+        """Exact values of a greedy or stochastic policy"""
+
+        return self._back_up(lambda state, _: tuple(action_probabilities(state)))
+
+
+    def solve(self) -> PolicyEvaluation:
+        """Optimal values, ties between actions broken by order of actions"""
+
+        def choose_greedy(_: TypeValidState, q_values: tuple[float, ...]) -> tuple[float, ...]:
+            best = q_values.index(max(q_values))
+            return tuple(float(index == best) for index in range(len(q_values)))
+
+        return self._back_up(choose_greedy)
+
+
+    def _back_up(self, choose: TypeActionChooser) -> PolicyEvaluation:
+
+        hit_index = self._actions.index(Blackjack.HIT)
+        stand_index = self._actions.index(Blackjack.STAND)
+
+        q_values: dict[TypeValidState, tuple[float, ...]] = {}
+        state_values: dict[TypeValidState, float] = {}
+
+        # expected, min and max number of actions to the end of episode
+        lengths: dict[TypeValidState, tuple[float, int, int]] = {}
+
+        for dealer in self._dealer_scores:
+            for hand in self._hands:
+
+                state: TypeValidState = (dealer, *hand)
+
+                hit_value = 0.0
+                bust_prob = 0.0
+                next_lengths: list[tuple[float, tuple[float, int, int]]] = []
+
+                for card_value, card_prob in zip(self._card_values, self._card_probs):
+                    next_hand = self._add_card(hand, card_value)
+                    if next_hand is None:
+                        hit_value -= card_prob
+                        bust_prob += card_prob
+                    else:
+                        next_state = (dealer, *next_hand)
+                        hit_value += card_prob * state_values[next_state]
+                        next_lengths.append((card_prob, lengths[next_state]))
+
+                action_values = [0.0, 0.0]
+                action_values[hit_index] = hit_value
+                action_values[stand_index] = self._get_stand_value(dealer, hand[0])
+                q_values[state] = tuple(action_values)
+
+                probs = choose(state, q_values[state])
+                hit_prob, stand_prob = probs[hit_index], probs[stand_index]
+
+                state_values[state] = hit_prob * hit_value + stand_prob * action_values[stand_index]
+
+                # episode ends after this action if standing or going bust
+                ends_now = [1] if stand_prob > 0 or (hit_prob > 0 and bust_prob > 0) else []
+                hits = next_lengths if hit_prob > 0 else []
+
+                lengths[state] = (1 + hit_prob * sum(prob * length[0] for prob, length in next_lengths),
+                                  min(ends_now + [1 + length[1] for _, length in hits]),
+                                  max(ends_now + [1 + length[2] for _, length in hits]))
+
+        expected_return = sum(prob * state_values[state] for state, prob in self.initial_distribution.items())
+
+        episode_lengths: TypeEpisodeLenghts = {
+            'min_length': min(lengths[state][1] for state in self.initial_distribution),
+            'mean_length': sum(prob * lengths[state][0] for state, prob in self.initial_distribution.items()),
+            'max_length': max(lengths[state][2] for state in self.initial_distribution),
+            'mean_length_se': 0.0
+        }
+
+        return PolicyEvaluation(self._actions, q_values, state_values, expected_return, episode_lengths)
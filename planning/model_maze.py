@@ -0,0 +1,297 @@
+from math import inf
+
+import numpy as np
+
+from environments.maze import Maze, Movement
+from planning.environment_model import EnvironmentModel, PolicyEvaluation, TypeActionProbabilities
+
+from utils.type_aliases import (TypeMazeConfiguration, TypeValidState, TypeMazeActions, TypeEpisodeLenghts,
+                                TypeNDarray64, TypeNDarrayBool, TypeNDarrayInt)
+import utils.constants as constants  # pylint: disable=consider-using-from-import
+
+
+PLANNING_SOLVERS = ("value_iteration", "policy_iteration")
+
+
+class ModelMaze(EnvironmentModel):  # pylint: disable=too-many-instance-attributes
+    """Exact model of a maze configuration, solved with vectorized value or policy iteration
+
+    States are flat row-major cells of the grid, including walls and terminal cells, which are
+    not decision states and have value 0. Transitions are kept in a fixed-width sparse form, the
+    target cell and probability of each noisy move of each state-action pair, and up to
+    PLANNING_DENSE_STATE_LIMIT states also as a dense (S x A x S') tensor
+    """
+
+    def __init__(self, configuration: TypeMazeConfiguration, gamma: float = 1.0) -> None:
+
+        self._maze: Maze = Maze(configuration['maze_structure'])
+        movement = Movement(self._maze, noise=configuration['noise'])
+
+        self._actions: TypeMazeActions = Movement.actions
+        self.gamma: float = gamma
+
+        self._states: list[TypeValidState] = [tuple(int(i) for i in cell) for cell in np.ndindex(self._maze.size)]
+
+        # target cells (S x A x K) of noisy moves, and probabilities (K) of noisy moves
+        self.targets: TypeNDarrayInt = movement.get_transition_table()
+        self.move_probs: TypeNDarray64 = np.array(movement.noisy_move_probs, dtype=np.float64)
+
+        self._terminal: TypeNDarrayBool = self._maze.terminal.ravel()
+        self._live: TypeNDarrayBool = ~self._maze.walls.ravel() & ~self._terminal
+
+        # reward of moving to a cell, walls are never moved to
+        cell_rewards = np.nan_to_num(self._maze.rewards.ravel()) + configuration['living_cost']
+
+        if gamma == 1.0 and (cell_rewards[self._live] >= 0).any():
+            raise SystemExit("ModelMaze: undiscounted values need a negative reward for moving to any "
+                             "non-terminal cell, use gamma below 1")
+
+        # expected reward of state-action pairs (S x A)
+        self.rewards: TypeNDarray64 = cell_rewards[self.targets] @ self.move_probs
+
+        self.transitions: TypeNDarray64|None = None
+        if len(self._states) <= constants.PLANNING_DENSE_STATE_LIMIT:
+            self.transitions = self.get_transition_tensor()
+
+
+    def get_transition_tensor(self) -> TypeNDarray64:
+        """Transition probabilities as a dense (S x A x S') tensor"""
+
+        state_count, action_count, move_count = self.targets.shape
+
+        transitions = np.zeros((state_count, action_count, state_count), dtype=np.float64)
+
+        states, actions, _ = np.indices(self.targets.shape)
+        np.add.at(transitions, (states, actions, self.targets),
+                  np.broadcast_to(self.move_probs, (state_count, action_count, move_count)))
+
+        return transitions
+
+
+    def _back_up(self, values: TypeNDarray64) -> TypeNDarray64:
+        """Action values (S x A) from values of next states, terminal and wall cells are 0"""
+
+        values = np.where(self._live, values, 0.0)
+
+        if self.transitions is not None and np.isfinite(values).all():
+            expected: TypeNDarray64 = self.transitions @ values
+        else:
+            # noisy moves with zero probability do not count, even to a state of infinite value
+            with np.errstate(invalid='ignore'):
+                expected = np.where(self.move_probs > 0, values[self.targets] * self.move_probs, 0.0).sum(axis=2)
+
+        return self.rewards + self.gamma * expected
+
+
+    def _get_policy_edges(self, policy: TypeNDarray64) -> tuple[TypeNDarrayInt, TypeNDarray64]:
+        """Target cells and probabilities (S x A*K) of transitions under policy (S x A)"""
+
+        state_count = len(self._states)
+
+        weights = policy[:, :, np.newaxis] * self.move_probs
+
+        return self.targets.reshape(state_count, -1), weights.reshape(state_count, -1)
+
+
+    def _propagate(self, targets: TypeNDarrayInt, edges: TypeNDarrayBool, marked: TypeNDarrayBool) -> TypeNDarrayBool:
+        """Marked states and live states with an edge to a marked state, repeated until no change"""
+
+        while True:
+            new_marked = marked | (self._live & (edges & marked[targets]).any(axis=1))
+            if (new_marked == marked).all():
+                return marked
+            marked = new_marked
+
+
+    def _get_proper_states(self, targets: TypeNDarrayInt, edges: TypeNDarrayBool) -> TypeNDarrayBool:
+        """Live states from which the policy terminates with probability one"""
+
+        reaches_terminal = self._propagate(targets, edges, self._terminal.copy())
+
+        improper = self._propagate(targets, edges, self._live & ~reaches_terminal)
+
+        proper: TypeNDarrayBool = self._live & ~improper
+        return proper
+
+
+    def _solve_linear(self, policy: TypeNDarray64, step_values: TypeNDarray64,
+                      proper: TypeNDarrayBool) -> TypeNDarray64:
+        """Values of proper states under policy, for rewards step_values (S x A) of each step"""
+
+        values = np.zeros(len(self._states), dtype=np.float64)
+        indexes = np.flatnonzero(proper)
+
+        step_policy = (policy * step_values).sum(axis=1)
+
+        if self.transitions is not None:
+
+            policy_transitions = np.einsum('sa,sat->st', policy, self.transitions)[np.ix_(indexes, indexes)]
+
+            values[indexes] = np.linalg.solve(np.eye(len(indexes)) - self.gamma * policy_transitions,
+                                              step_policy[indexes])
+            return values
+
+        targets, weights = self._get_policy_edges(policy)
+        targets, weights = targets[indexes], weights[indexes]
+
+        for _ in range(constants.PLANNING_MAX_ITERATIONS):
+
+            new_values = step_policy[indexes] + self.gamma * (weights * values[targets]).sum(axis=1)
+            delta = np.abs(new_values - values[indexes]).max(initial=0.0)
+            values[indexes] = new_values
+
+            if delta < constants.PLANNING_TOLERANCE:
+                break
+
+        return values
+
+
+    def _get_length_bounds(self, targets: TypeNDarrayInt, edges: TypeNDarrayBool) -> tuple[TypeNDarray64, TypeNDarray64]:
+        """Min and max number of steps to termination from each state, inf if not bounded"""
+
+        shortest = np.where(self._terminal, 0.0, inf)
+        longest = np.where(self._terminal, 0.0, inf)
+
+        edge_targets_live = np.where(edges, self._live[targets], False)
+
+        # shortest paths grow from terminal cells one step at a time
+        for _ in range(len(self._states)):
+            candidates = np.where(edges, shortest[targets], inf).min(axis=1, initial=inf) + 1
+            new_shortest = np.where(self._live, np.minimum(shortest, candidates), shortest)
+            if (new_shortest == shortest).all():
+                break
+            shortest = new_shortest
+
+        # longest paths are finite for states whose live successors all have finite longest paths,
+        # states on or leading to a cycle are never resolved
+        resolved = ~self._live
+        for _ in range(len(self._states)):
+            ready = self._live & ~resolved & ~(edge_targets_live & ~resolved[targets]).any(axis=1)
+            if not ready.any():
+                break
+            longest[ready] = np.where(edges[ready], longest[targets[ready]], -inf).max(axis=1) + 1
+            resolved = resolved | ready
+
+        return shortest, longest
+
+
+    def _evaluate(self, policy: TypeNDarray64) -> PolicyEvaluation:
+
+        targets, weights = self._get_policy_edges(policy)
+        edges = weights > 0
+
+        proper = self._get_proper_states(targets, edges)
+
+        values = self._solve_linear(policy, self.rewards, proper)
+        values[self._live & ~proper] = -inf
+
+        lengths = self._solve_linear(policy, np.ones_like(self.rewards), proper)
+        lengths[self._live & ~proper] = inf
+
+        shortest, longest = self._get_length_bounds(targets, edges)
+
+        q_values = self._back_up(values)
+        q_values[~self._live] = 0.0
+        q_values[self._maze.walls.ravel()] = np.nan
+
+        state_values = np.where(self._maze.walls.ravel(), np.nan, np.where(self._live, values, 0.0))
+
+        # episodes start uniformly in live cells
+        initial = self._live
+
+        episode_lengths: TypeEpisodeLenghts = {
+            'min_length': float(shortest[initial].min()),
+            'mean_length': float(lengths[initial].mean()),
+            'max_length': float(longest[initial].max()),
+            'mean_length_se': 0.0
+        }
+
+        return PolicyEvaluation(self._actions,
+                                dict(zip(self._states, map(tuple, q_values.tolist()))),
+                                dict(zip(self._states, state_values.tolist())),
+                                float(values[initial].mean()), episode_lengths)
+
+
+    def evaluate_policy(self, action_probabilities: TypeActionProbabilities) -> PolicyEvaluation:
+        """Exact values of a greedy or stochastic policy, -inf in states where it may not terminate"""
+
+        policy = np.zeros(self.rewards.shape, dtype=np.float64)
+
+        for index in np.flatnonzero(self._live):
+            policy[index] = action_probabilities(self._states[index])
+
+        return self._evaluate(policy)
+
+
+    def solve(self, solver: str = "value_iteration") -> PolicyEvaluation:
+        """Optimal values, ties between actions broken by order of actions"""
+
+        if solver == "value_iteration":
+            policy = self._value_iteration()
+        elif solver == "policy_iteration":
+            policy = self._policy_iteration()
+        else:
+            raise SystemExit(f"Unknown planning solver {solver}, expected one of {PLANNING_SOLVERS}")
+
+        return self._evaluate(policy)
+
+
+    def _get_greedy_policy(self, q_values: TypeNDarray64) -> TypeNDarray64:
+
+        policy = np.zeros(q_values.shape, dtype=np.float64)
+        policy[np.arange(len(q_values)), q_values.argmax(axis=1)] = 1.0
+
+        return policy
+
+
+    def _value_iteration(self) -> TypeNDarray64:
+
+        values = np.zeros(len(self._states), dtype=np.float64)
+
+        for iteration in range(1, constants.PLANNING_MAX_ITERATIONS + 1):
+
+            new_values = np.where(self._live, self._back_up(values).max(axis=1), 0.0)
+            delta = np.abs(new_values - values).max()
+            values = new_values
+
+            if delta < constants.PLANNING_TOLERANCE:
+                print(f"Value iteration converged after {iteration} iterations")
+                break
+
+        return self._get_greedy_policy(self._back_up(values))
+
+
+    def _policy_iteration(self) -> TypeNDarray64:
+        """Policy iteration, starting from a policy that terminates from all states
+
+        The initial policy takes in each state the action most likely to move closer to a
+        terminal cell. Improving a policy that terminates gives a policy that terminates
+        """
+
+        all_edges = np.broadcast_to(self.move_probs > 0, self.targets.shape).reshape(len(self._states), -1)
+        shortest, _ = self._get_length_bounds(self.targets.reshape(len(self._states), -1), all_edges)
+
+        closer = (shortest[self.targets] < shortest[:, np.newaxis, np.newaxis]) @ self.move_probs
+        actions = closer.argmax(axis=1)
+
+        for iteration in range(1, constants.PLANNING_MAX_ITERATIONS + 1):
+
+            policy = np.zeros(self.rewards.shape, dtype=np.float64)
+            policy[np.arange(len(actions)), actions] = 1.0
+
+            targets, weights = self._get_policy_edges(policy)
+            values = self._solve_linear(policy, self.rewards, self._get_proper_states(targets, weights > 0))
+
+            q_values = self._back_up(values)
+
+            # change action only if strictly better, to not cycle between equally good actions
+            current = q_values[np.arange(len(actions)), actions]
+            improved = self._live & (q_values.max(axis=1) > current + constants.PLANNING_TOLERANCE)
+
+            if not improved.any():
+                print(f"Policy iteration converged after {iteration} iterations")
+                break
+
+            actions = np.where(improved, q_values.argmax(axis=1), actions)
+
+        return policy
@@ -1,5 +1,3 @@
-from math import inf
-import random
 from typing import Callable
 
 from policies.policy import Policy
@@ -47,7 +45,7 @@ class EpsilonGreedy(Policy):
 
     def _get_action_epsilon_greedy(self, state: TypeValidState, epsilon: float) -> TypeAction:
 
-        random_value = random.random()
+        random_value = self._random_stream.random()
 
         if random_value <= epsilon:
             action = self._valuerep.get_random_action()  # explore
@@ -64,53 +62,34 @@ class EpsilonGreedy(Policy):
         return prob
 
 
-    def _get_action_probability(self, state: TypeValidState, action: TypeAction,
-                                epsilon: float) -> float:
-
-        label_best_action, label_tied_best, label_not_best = (0,1,2)
-
-        prob = - inf
-
-        my_value = self._valuerep.get_value(state, action)
-
-        action_type = label_best_action
-        tied_count = 1
+    def _get_action_probabilities(self, values: list[float], epsilon: float) -> list[float]:
+        """Probabilities of actions with given values, actions tied for the best value share
+        the greedy probability. Action sets are small, so values are a list rather than an array"""
 
-        for this_action in self._actions:
+        best_value = max(values)
+        tied_count = values.count(best_value)
 
-            if this_action == action:
-                continue
+        explore_probability = epsilon / len(values)
+        greedy_probability = (1 - epsilon) / tied_count + explore_probability
 
-            state_action_value_q = self._valuerep.get_value(state, this_action)
+        return [greedy_probability if value == best_value else explore_probability for value in values]
 
-            if state_action_value_q > my_value:
-                action_type = label_not_best
-                break
-            elif state_action_value_q == my_value:
-                action_type = label_tied_best
-                tied_count += 1
 
-        if action_type == label_best_action:
-            prob = 1 - epsilon + epsilon / len(self._actions)
-
-        elif action_type == label_tied_best:
-            prob = (1 - epsilon) / tied_count + epsilon / len(self._actions)
+    def _get_action_probability(self, state: TypeValidState, action: TypeAction,
+                                epsilon: float) -> float:
 
-        elif action_type == label_not_best:
-            prob = epsilon / len(self._actions)
+        values: list[float] = self._valuerep.get_action_values(state).tolist()
 
-        return prob
+        return self._get_action_probabilities(values, epsilon)[self._actions.index(action)]
 
 
     def get_state_value(self, state: TypeValidState, iteration: int) -> float:
 
-        expected_value: float = 0
-
         epsilon = self._get_state_epsilon(state, iteration)
 
-        for this_action in self._actions:
-            state_action_value_q = self._valuerep.get_value(state, this_action)
-            probability = self._get_action_probability(state, this_action, epsilon)
-            expected_value += probability * state_action_value_q
+        values: list[float] = self._valuerep.get_action_values(state).tolist()
+        probabilities = self._get_action_probabilities(values, epsilon)
+
+        expected_value: float = sum(probability * value for probability, value in zip(probabilities, values))
 
         return expected_value
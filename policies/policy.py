@@ -1,6 +1,7 @@
 from abc import ABC, abstractmethod
 
 from valuereps.value_representation import ValueRepresentation
+from utils.rng import RandomStream, random_streams
 from utils.type_aliases import TypeValidState, TypeActions, TypeAction
 
 
@@ -11,6 +12,8 @@ class Policy(ABC):
         self._valuerep = value_representation
         self._actions = actions
 
+        self._random_stream: RandomStream = random_streams.get_stream("policy")
+
         self._valuerep.set_actions(self._actions)
 
 
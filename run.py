@@ -1,22 +1,39 @@
 import argparse
+import json
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from math import nan
 from pathlib import Path
 from typing import Any
 
-import pickle
 import yaml # type: ignore[import]
 
 import numpy as np
 import pandas as pd # type: ignore[import]
 
 from methods.method import Method
+from methods.method_batch import MethodBatch
+from methods.checkpoint_store import CheckpointStore
+from methods.evaluation import EVALUATION_ENGINES
+from methods.sample_store import SampleStore
 
+from environments.environment import Environment
 from environments.maze_configs import configurations
 
 from utils.constants import Defaults
 
 from utils.factories import create_environment, create_method
-from utils.reporting import reporter
-from utils.type_aliases import TypeAgentConfig
+from utils.reporting import Reporting, reporter, TypeReportList
+from utils.results import RESULT_FORMATS, check_result_format, get_result_path, write_results
+from utils.rng import random_streams
+from utils.scaler import scaler
+from utils.type_aliases import TypeAgentConfig, TypeAgentResult
+
+
+RUN_DESCRIPTION_FILE = "run.json"
+REFERENCE_AGENT = "EXACT"
 
 
 def _read_config_file(filename: str) -> list[TypeAgentConfig]:
@@ -32,69 +49,294 @@ def _read_config_file(filename: str) -> list[TypeAgentConfig]:
         return agent_list
 
 
-def run(args: argparse.Namespace) -> None:  # pylint: disable=too-many-locals
+def _set_target_iterations(agent_def: TypeAgentConfig, iterations: int) -> None:
+
+    alpha_type = agent_def.get('alpha_type')
+
+    if alpha_type is not None and "TARGET_AT" in alpha_type:
+        agent_def["alpha_target_iterations"] = np.floor(
+            iterations * Defaults.TARGET_AT_PERCENTAGE)
+
+    epsilon_type = agent_def.get('epsilon_type')
+
+    if epsilon_type is not None and "TARGET_AT" in epsilon_type:
+        agent_def["epsilon_target_iterations"] = np.floor(
+            iterations * Defaults.TARGET_AT_PERCENTAGE)
+
+
+def _set_saved_target_iterations(agent_def: TypeAgentConfig, load_path: Path) -> TypeAgentConfig:
+    """Copy of agent_def with schedule target iterations of the method saved in load_path"""
+
+    target_iterations = Method.load_schedule_target_iterations(load_path)
+
+    agent_def = agent_def.copy()
+
+    if 'alpha_target_iterations' in target_iterations:
+        agent_def['alpha_target_iterations'] = target_iterations['alpha_target_iterations']
+
+    if 'epsilon_target_iterations' in target_iterations:
+        agent_def['epsilon_target_iterations'] = target_iterations['epsilon_target_iterations']
+
+    return agent_def
+
+
+def _train_and_evaluate(agent_def: TypeAgentConfig, environment: Environment, env_type: str,  # pylint: disable=too-many-arguments
+                        iterations: int, sample_store: SampleStore|None = None,
+                        checkpoint_store: CheckpointStore|None = None,
+                        load_path: Path|None = None, save_path: Path|None = None,
+                        evaluation_engine: str = Defaults.EVALUATION_ENGINE) -> TypeAgentResult:
+    """Train and evaluate a method, with zero iterations only evaluate a method loaded from load_path
+
+    A loaded method keeps the schedule target iterations it was saved with, instead of target
+    iterations set from iterations of this run
+    """
+
+    if load_path is not None:
+        agent_def = _set_saved_target_iterations(agent_def, load_path)
+
+    method: Method = create_method(agent_def, environment, env_type)
+
+    if load_path is not None:
+        print(f"Agent {agent_def['name']} loading method from {load_path}")
+        method.load(load_path)
+
+    progress = None
+    if checkpoint_store is not None:
+        if checkpoint_store.has_checkpoint():
+            print(f"Agent {agent_def['name']} resuming from {checkpoint_store.checkpoint_path}")
+            method, progress = checkpoint_store.load_checkpoint()
+        method.set_checkpoint_store(checkpoint_store)
+
+    if sample_store is not None and isinstance(method, MethodBatch):
+        method.set_sample_store(sample_store)
+
+    reporting_at: list[int] = []
+
+    method_type = agent_def.get("method")
+    if method_type is not None and "Batch" in method_type:
+
+        max_iterations =  Defaults.BATCH_MAX_ITERATIONS
+        if hasattr(method, 'set_batch_learning_parameters'):
+            method.set_batch_learning_parameters(max_iterations=max_iterations, # type: ignore
+                                                 stopping_limit=Defaults.BATCH_STOPPING_LIMIT,
+                                                 solver=agent_def.get("lspi_solver"),
+                                                 regularization=agent_def.get("lspi_regularization"),
+                                                 refresh_interval=agent_def.get("lspi_refresh_interval"),
+                                                 chunk_episodes=agent_def.get("batch_chunk_episodes"))
+        reporting_at = list(range(1,max_iterations+1))
+    elif iterations > 0:
+        reporting_at = list(np.floor(np.logspace(np.log10(Defaults.FIRST_REPORT),
+                                                 np.log10(iterations),
+                                                 num=Defaults.NUMBER_OF_REPORTS)))
+
+    if iterations > 0:
+        tr_reward, tr_episode_len = method.learn(iterations, reporting_at, progress)
+    else:
+        tr_reward, tr_episode_len = [], { 'min_length': nan, 'mean_length' : nan, 'max_length': nan }
+
+    if save_path is not None:
+        method.save(save_path)
+
+    ev_reward, ev_episode_len, ev_reward_se = method.evaluate(Defaults.EVALUATION_EPISODES,
+                                                              evaluation_engine)
+
+    return tr_reward, tr_episode_len, ev_reward, ev_episode_len, ev_reward_se
+
+
+def _get_replicate_seeds(seed: int|None, replicates: int) -> tuple[int, list[int]]:
+    """Base seed and independent seeds for each replicate, derived with numpy SeedSequence
+
+    If no seed is given, a base seed is drawn from OS entropy so that the run can be repeated
+    """
+
+    seed_sequence = np.random.SeedSequence(seed)
+    replicate_seeds = [int(child.generate_state(1)[0]) for child in seed_sequence.spawn(replicates)]
+
+    return int(seed_sequence.entropy), replicate_seeds  # type: ignore[arg-type]
+
+
+def _run_agent(agent_def: TypeAgentConfig, env_type: str, iterations: int, seed: int|None = None,  # pylint: disable=too-many-arguments
+               sample_folder: Path|None = None, checkpoint_store: CheckpointStore|None = None,
+               load_path: Path|None = None, save_path: Path|None = None,
+               evaluation_engine: str = Defaults.EVALUATION_ENGINE) -> tuple[TypeAgentResult, TypeReportList]:
+    """Train and evaluate one agent, in the current process or in a worker process
+
+    A process may run several agents one after another, so scales and reports left
+    from a previous agent are cleared by creating a fresh environment. Random streams of
+    the components of the agent are derived from the given seed, if any. Batch methods share samples
+    through sample_folder, keyed by environment, variant, episodes and seed. With a
+    checkpoint store, the agent is checkpointed while learning and its result is saved
+    when completed, a stored result is returned without running the agent again. The
+    method is loaded from load_path before learning and saved to save_path after it
+    """
+
+    if checkpoint_store is not None and checkpoint_store.has_result():
+        print(f"Agent {agent_def['name']} already completed, reading result from {checkpoint_store.result_path}")
+        return checkpoint_store.load_result()
+
+    random_streams.seed(seed)
+
+    scaler.clear()
+    environment = create_environment(env_type, Defaults.ENV_VARIANT)
+
+    sample_store = None
+    if sample_folder is not None:
+        seed_key = seed if seed is not None else 'unseeded'
+        sample_key = f"{env_type}_{Defaults.ENV_VARIANT}_{iterations}_{seed_key}"
+        sample_store = SampleStore(sample_folder, sample_key)
+
+    agent_result = _train_and_evaluate(agent_def, environment, env_type, iterations,
+                                       sample_store, checkpoint_store, load_path, save_path,
+                                       evaluation_engine)
+
+    report_list = reporter.get_reporting_instance().get_reports_list()
+
+    if checkpoint_store is not None:
+        checkpoint_store.save_result(agent_result, report_list)
+
+    return agent_result, report_list
+
+
+def _check_run_description(checkpoint_folder: Path, run_description: dict[str, Any]) -> int|None:
+    """Base seed of the interrupted run, if the run to resume was started with the same arguments"""
+
+    with open(checkpoint_folder / RUN_DESCRIPTION_FILE, "r", encoding="utf-8") as file:
+        stored_description = json.load(file)
+
+    base_seed: int|None = stored_description.pop('base_seed')
+
+    if stored_description != run_description:
+        raise SystemExit(f"Cannot resume, run in '{checkpoint_folder}' was started with different "
+                         f"arguments: {stored_description}")
+
+    return base_seed
+
+
+def _summarize(df_values: pd.DataFrame, keys: list[str], value_column: str) -> pd.DataFrame:
+    """Mean, standard deviation and quantiles of value_column over replicates"""
+
+    # frames without rows, as training rewards of evaluation only runs, have object columns
+    if df_values[value_column].dtype == object:
+        df_values = df_values.astype({value_column: np.float64})
+
+    grouped = df_values.groupby(keys, sort=False)[value_column]
+
+    df_summary = grouped.agg(['mean', 'std'])
+
+    df_quantiles = grouped.quantile(list(Defaults.SUMMARY_QUANTILES)).unstack()
+    df_quantiles.columns = [f"q{round(quantile * 100):02d}" for quantile in df_quantiles.columns]
+
+    return df_summary.join(df_quantiles).reset_index()
+
+
+def run(args: argparse.Namespace) -> None:  # pylint: disable=too-many-locals, too-many-statements
 
     training_rewards = []
     evaluation_rewards = []
     episode_lengths = []
 
-    environment = create_environment(args.environment, Defaults.ENV_VARIANT)
-
     agent_list = _read_config_file(args.configfile_as_path)
 
-    tr_episode_len: dict[str, int|float] = {}
-    ev_episode_len: dict[str, int|float] = {}
-
     for agent_def in agent_list:
+        _set_target_iterations(agent_def, args.iterations)
+
+    run_description = {
+        'environment': args.environment,
+        'variant': Defaults.ENV_VARIANT,
+        'iterations': args.iterations,
+        'configfile': str(args.configfile_as_path),
+        'agents': [agent_def['name'] for agent_def in agent_list],
+        'replicates': args.replicates,
+        'seed': args.seed
+    }
+
+    seed = args.seed
+    if args.resume:
+        seed = _check_run_description(args.checkpoint_folder, run_description)
+        print(f"Resuming run from checkpoints in {args.checkpoint_folder}")
+
+    if seed is None and args.replicates == 1:
+        base_seed = None
+        seeds: list[int|None] = [None]
+    else:
+        base_seed, replicate_seeds = _get_replicate_seeds(seed, args.replicates)
+        seeds = list(replicate_seeds)
 
-        alpha_type = agent_def.get('alpha_type')
+    # environments without a known model fail here rather than after training
+    model = None
+    if args.evaluation == "exact" or args.exact_reference:
+        model = create_environment(args.environment, Defaults.ENV_VARIANT).create_model()
 
-        if alpha_type is not None and "TARGET_AT" in alpha_type:
-            agent_def["alpha_target_iterations"] = np.floor(
-                args.iterations * Defaults.TARGET_AT_PERCENTAGE)
+    if not args.resume:
+        args.checkpoint_folder.mkdir()
+        with open(args.checkpoint_folder / RUN_DESCRIPTION_FILE, "w", encoding="utf-8") as file:
+            json.dump(run_description | {'base_seed': base_seed}, file, indent=2)
 
-        epsilon_type = agent_def.get('epsilon_type')
+    tasks = [(agent_def, replicate) for replicate in range(args.replicates) for agent_def in agent_list]
 
-        if epsilon_type is not None and "TARGET_AT" in epsilon_type:
-            agent_def["epsilon_target_iterations"] = np.floor(
-                args.iterations * Defaults.TARGET_AT_PERCENTAGE)
+    task_agents = [agent_def for agent_def, _ in tasks]
+    task_seeds = [seeds[replicate] for _, replicate in tasks]
+    task_keys = [f"{replicate:03d}_{agent_def['name']}" for agent_def, replicate in tasks]
 
-        method: Method = create_method(agent_def, environment, args.environment)
+    task_checkpoints = [CheckpointStore(args.checkpoint_folder, key) for key in task_keys]
+    task_load_paths = [args.load_methods / key if args.load_methods else None for key in task_keys]
+    task_save_paths = [args.save_methods / key if args.save_methods else None for key in task_keys]
 
-        method_type = agent_def.get("method")
-        if method_type is not None and "Batch" in method_type:
+    task_results: list[tuple[TypeAgentResult, TypeReportList]]
 
-            max_iterations =  Defaults.BATCH_MAX_ITERATIONS
-            if hasattr(method, 'set_batch_learning_parameters'):
-                method.set_batch_learning_parameters(max_iterations=max_iterations, # type: ignore
-                                                     stopping_limit=Defaults.BATCH_STOPPING_LIMIT)
-            reporting_at = list(range(1,max_iterations+1))
-        else:
-            reporting_at = list(np.floor(np.logspace(np.log10(Defaults.FIRST_REPORT),
-                                                     np.log10(args.iterations),
-                                                     num=Defaults.NUMBER_OF_REPORTS)))
+    workers = args.workers
+    if workers is None and args.replicates > 1:
+        workers = os.cpu_count()
 
-        tr_reward, tr_episode_len = method.learn(args.iterations, reporting_at)
-        ev_reward, ev_episode_len = method.evaluate(Defaults.EVALUATION_EPISODES)
+    if workers is None:
+        task_results = list(map(_run_agent, task_agents, repeat(args.environment),
+                                repeat(args.iterations), task_seeds, repeat(args.samples),
+                                task_checkpoints, task_load_paths, task_save_paths,
+                                repeat(args.evaluation)))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            task_results = list(executor.map(_run_agent, task_agents, repeat(args.environment),
+                                             repeat(args.iterations), task_seeds, repeat(args.samples),
+                                             task_checkpoints, task_load_paths, task_save_paths,
+                                             repeat(args.evaluation)))
+
+    # fresh reporting instance to collect reports from all agents
+    environment = create_environment(args.environment, Defaults.ENV_VARIANT)
+    rep_instance = reporter.get_reporting_instance()
+
+    tr_episode_len: dict[str, int|float] = {}
+    ev_episode_len: dict[str, int|float] = {}
+
+    tr_replicates = []
+    report_replicates = []
+
+    for (agent_def, replicate), (agent_result, report_list) in zip(tasks, task_results):
+
+        tr_reward, tr_episode_len, ev_reward, ev_episode_len, ev_reward_se = agent_result
+        agent_name = agent_def["name"]
 
         training_rewards.extend(tr_reward)
-        episode_lengths.append([method.method_name,
+        episode_lengths.append([agent_name,
                                 *list(tr_episode_len.values()),
                                 *list(ev_episode_len.values())])
-        evaluation_rewards.append([method.method_name, Defaults.EVALUATION_EPISODES, ev_reward])
+        evaluation_rewards.append([agent_name, Defaults.EVALUATION_EPISODES, ev_reward, ev_reward_se])
+
+        rep_instance.add_reports(report_list)
+
+        tr_replicates.extend([replicate] * len(tr_reward))
+        report_replicates.extend([replicate] * rep_instance.get_row_count(report_list))
 
     result_dict: dict[str, Any] = {}
 
     result_dict['agents'] = agent_list
 
-    rep_instance = reporter.get_reporting_instance()
     df_reports = rep_instance.get_reports_as_df()
     result_dict['report'] = df_reports
 
     df_tr_rewards = pd.DataFrame(training_rewards, columns=['agent', 'iteration', 'reward'])
     result_dict['tr_rewards'] = df_tr_rewards
 
-    df_ev_rewards = pd.DataFrame(evaluation_rewards, columns=['agent', 'episodes', 'reward'])
+    df_ev_rewards = pd.DataFrame(evaluation_rewards, columns=['agent', 'episodes', 'reward', 'reward_se'])
     result_dict['ev_rewards'] = df_ev_rewards
 
 
@@ -103,13 +345,46 @@ def run(args: argparse.Namespace) -> None:  # pylint: disable=too-many-locals
                                                     *["ev_"+k for k in ev_episode_len.keys()] ])
     result_dict['episode_lenghts'] = df_episode_lengths
 
+    if base_seed is not None:
+        result_dict['seed'] = base_seed
+
+    if args.replicates > 1:
+
+        ev_replicates = [replicate for _, replicate in tasks]
+
+        df_reports.insert(1, 'replicate', report_replicates)
+        df_tr_rewards.insert(1, 'replicate', tr_replicates)
+        df_ev_rewards.insert(1, 'replicate', ev_replicates)
+        df_episode_lengths.insert(1, 'replicate', ev_replicates)
+
+        state_columns = environment.get_column_names()
+
+        result_dict['report_summary'] = _summarize(df_reports,
+                                                   ['agent', 'iterations', *state_columns, 'action'],
+                                                   'value')
+        result_dict['tr_rewards_summary'] = _summarize(df_tr_rewards, ['agent', 'iteration'], 'reward')
+        result_dict['ev_rewards_summary'] = _summarize(df_ev_rewards, ['agent', 'episodes'], 'reward')
+
+    if args.exact_reference:
+        assert model is not None
+
+        solution = model.solve()
+        print(f"Exact reference: expected return of an optimal policy {solution.expected_return}")
+
+        reference_reporting = Reporting(environment)
+        reference_reporting.report_at(REFERENCE_AGENT, 0, solution.get_values)
+
+        result_dict['reference'] = reference_reporting.get_reports_as_df()
+        result_dict['reference_return'] = solution.expected_return
+
     if args.environment == 'maze':
         result_dict['maze_config'] = configurations[Defaults.ENV_VARIANT]
 
-    with open(args.report_as_path,'wb') as file:
-        pickle.dump(result_dict, file)
+    write_results(result_dict, args.result_path, args.format)
+
+    shutil.rmtree(args.checkpoint_folder)
 
-    print(f"\nTestrun completed, saved results to {args.report_as_path}")
+    print(f"\nTestrun completed, saved results to {args.result_path}")
 
 
 def main() -> None:
@@ -144,8 +419,80 @@ def main() -> None:
                              "If no extension is given, .pik is assumed. "
                              f"If no path is given, default path '{Defaults.REPORT_FOLDER}' is used")
 
+    parser.add_argument("-w", "--workers", type=int,
+                        help="number of worker processes. Each agent is trained and evaluated "
+                             "in its own process with its own environment. "
+                             "If not given, agents are run one after another in a single process, "
+                             "or with replicates, in one worker process per CPU")
+
+    parser.add_argument("-n", "--replicates", type=int, default=1,
+                        help="number of independently seeded replicates to run for each agent. "
+                             "Replicates are run in worker processes, see --workers. "
+                             "With more than one replicate, summary statistics over "
+                             "replicates are included in the report file")
+
+    parser.add_argument("-s", "--seed", type=int,
+                        help="base seed for random number generators. Seeds for each replicate "
+                             "are derived from the base seed. If not given with replicates, "
+                             "a base seed is drawn and stored in the report file")
+
+    parser.add_argument("-b", "--samples", type=Path,
+                        help="folder for batch samples. Batch methods store their sampled episodes "
+                             "in the folder, keyed by environment, variant, number of episodes and "
+                             "replicate seed, and reuse stored samples with the same key instead "
+                             "of sampling again")
+
+    parser.add_argument("-f", "--format", type=str, default="pickle", choices=RESULT_FORMATS,
+                        help="result format, 'pickle' for a single report file, 'parquet' or 'feather' "
+                             "for a run folder named after the report file, with a columnar file "
+                             "per result frame and a manifest. Columnar formats need pyarrow")
+
+    parser.add_argument("--save-methods", type=Path,
+                        help="folder to save learned methods in, one subfolder per agent and replicate "
+                             "with the value representation and method state as NumPy arrays")
+
+    parser.add_argument("--load-methods", type=Path,
+                        help="folder of methods saved with --save-methods. Each agent starts from its "
+                             "saved method and continues learning for the given iterations, "
+                             "with zero iterations the loaded methods are only evaluated")
+
+    parser.add_argument("--evaluation", type=str, default=Defaults.EVALUATION_ENGINE,
+                        choices=EVALUATION_ENGINES,
+                        help="evaluation engine, 'serial' plays episodes one step at a time with "
+                             "the target policy, 'vectorized' plays them in batches in a vectorized "
+                             "environment with a table of greedy actions, and 'pool' with the table "
+                             "in worker processes. 'exact' computes the expected results of the table "
+                             "from the known model of the environment, without sampling. "
+                             f"Default is '{Defaults.EVALUATION_ENGINE}'")
+
+    parser.add_argument("--exact-reference", action="store_true",
+                        help="include optimal action values solved from the known model of the "
+                             f"environment in the results, as agent {REFERENCE_AGENT} in frame "
+                             "'reference', and the expected return of an optimal policy as "
+                             "'reference_return'")
+
+    parser.add_argument("--resume", action="store_true",
+                        help="resume an interrupted run from its checkpoints. Run with the same "
+                             "arguments as the interrupted run. Completed agents are not run again, "
+                             "and a partially trained agent continues from its last checkpoint")
+
     args = parser.parse_args()
 
+    if args.workers is not None and args.workers < 1:
+        raise SystemExit(f"Number of workers must be at least 1, got {args.workers}")
+
+    if args.iterations < 0 or (args.iterations == 0 and args.load_methods is None):
+        raise SystemExit(f"Number of iterations must be at least 1, or 0 with --load-methods, "
+                         f"got {args.iterations}")
+
+    if args.load_methods is not None and not args.load_methods.exists():
+        raise SystemExit(f"Folder '{args.load_methods}' of methods to load does not exist")
+
+    if args.replicates < 1:
+        raise SystemExit(f"Number of replicates must be at least 1, got {args.replicates}")
+
+    check_result_format(args.format)
+
 
     # config file
 
@@ -187,6 +534,20 @@ def main() -> None:
         raise SystemExit(f"Path '{args.report_as_path.parents[0]}' does not exist. "
                           f"Will not be able to create results file '{args.report_as_path}'")
 
+    args.result_path = get_result_path(args.report_as_path, args.format)
+
+
+    # checkpoints of agents while running, removed when the run is completed
+
+    args.checkpoint_folder = args.report_as_path.with_suffix(".checkpoints")
+
+    if args.resume and not args.checkpoint_folder.exists():
+        raise SystemExit(f"Cannot resume, no checkpoints found in '{args.checkpoint_folder}'")
+
+    if not args.resume and args.checkpoint_folder.exists():
+        raise SystemExit(f"Checkpoints of an interrupted run found in '{args.checkpoint_folder}'. "
+                         f"Use --resume to continue the run, or remove the folder to start over")
+
     run(args)
 
 
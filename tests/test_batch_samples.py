@@ -0,0 +1,46 @@
+from pathlib import Path
+
+import numpy as np
+
+from methods.method_batch import MethodBatch
+from methods.sample_store import SampleChunk, SampleStore
+from utils.factories import create_environment, create_method
+from utils.rng import random_streams
+from utils.type_aliases import TypeAgentConfig
+
+
+def _sample(folder: Path, method_type: str) -> list[SampleChunk]:
+    """Chunks sampled by a batch method with seed 11, read back from its sample store"""
+
+    random_streams.seed(11)
+
+    agent_def: TypeAgentConfig = {'name': method_type, 'method': method_type,  # type: ignore[typeddict-item]
+                                  'epsilon_type': 'CONSTANT', 'epsilon_constant': 1,
+                                  'alpha_type': 'NOT_USED', 'gamma': 1.0}
+
+    environment = create_environment("blackjack", "simple")
+    method = create_method(agent_def, environment, "blackjack")
+
+    assert isinstance(method, MethodBatch)
+
+    sample_store = SampleStore(folder / method_type, "blackjack_simple_2000_11")
+    method.set_sample_store(sample_store)
+    method.set_batch_learning_parameters(max_iterations=1, chunk_episodes=500)  # type: ignore[attr-defined]
+    method.learn(2000, [1])
+
+    return list(sample_store.get_chunks())
+
+
+def test_batch_methods_sample_same_chunks_with_same_seed(tmp_path: Path) -> None:
+
+    expected = _sample(tmp_path, "LsFcBatch")
+
+    for method_type in ("LsTcBatch", "LsPolBatch"):
+
+        chunks = _sample(tmp_path, method_type)
+
+        assert len(chunks) == len(expected)
+
+        for chunk, expected_chunk in zip(chunks, expected):
+            for column, expected_column in zip(chunk, expected_chunk):
+                np.testing.assert_array_equal(column, expected_column)
@@ -0,0 +1,68 @@
+from pathlib import Path
+from typing import Any
+
+import pandas as pd # type: ignore[import]
+import pytest
+
+from methods.checkpoint_store import CheckpointStore, LearnProgress
+from methods.method import Method
+from methods.method_sarsa import Sarsa
+from utils.factories import create_environment, create_method
+from utils.reporting import reporter
+from utils.rng import random_streams
+from utils.type_aliases import TypeAgentConfig
+
+
+AGENT: TypeAgentConfig = {'name': 'SARSA', 'method': 'Sarsa',  # type: ignore[typeddict-item]
+                          'epsilon_type': 'EXPONENTIAL_TARGET_AT', 'epsilon_initial': 0.5,
+                          'epsilon_target': 0.05, 'epsilon_target_iterations': 1800,
+                          'alpha_type': 'EXPONENTIAL_TARGET_AT', 'alpha_initial': 0.2,
+                          'alpha_target': 0.01, 'alpha_target_iterations': 1800, 'gamma': 1.0}
+
+ITERATIONS = 2000
+REPORTS = [100, 1000, 1500, 2000]
+
+
+def _run(checkpoint_store: CheckpointStore|None) -> tuple[Any, Any, pd.DataFrame]:
+    """Learn and evaluate as run.py does, resuming from a checkpoint in checkpoint_store"""
+
+    random_streams.seed(3)
+
+    environment = create_environment("blackjack", "simple")
+    method: Method = create_method(AGENT, environment, "blackjack")
+
+    progress: LearnProgress|None = None
+    if checkpoint_store is not None:
+        if checkpoint_store.has_checkpoint():
+            method, progress = checkpoint_store.load_checkpoint()
+        method.set_checkpoint_store(checkpoint_store)
+
+    learn_result = method.learn(ITERATIONS, REPORTS, progress)
+    evaluation = method.evaluate(500)
+
+    return learn_result, evaluation, reporter.get_reporting_instance().get_reports_as_df()
+
+
+def test_resume_gives_uninterrupted_results(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+
+    expected = _run(None)
+
+    learn_episode = Sarsa._learn_episode  # pylint: disable=protected-access
+
+    def interrupted(self: Sarsa, iteration: int) -> Any:
+        if iteration == 1200:
+            raise KeyboardInterrupt
+        return learn_episode(self, iteration)
+
+    monkeypatch.setattr(Sarsa, "_learn_episode", interrupted)
+
+    with pytest.raises(KeyboardInterrupt):
+        _run(CheckpointStore(tmp_path, "sarsa", interval_seconds=0))
+
+    monkeypatch.undo()
+
+    result = _run(CheckpointStore(tmp_path, "sarsa", interval_seconds=0))
+
+    assert result[0] == expected[0]
+    assert result[1] == expected[1]
+    pd.testing.assert_frame_equal(result[2], expected[2])
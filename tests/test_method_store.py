@@ -0,0 +1,64 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from methods.method import Method
+from utils.factories import create_environment, create_method
+from utils.rng import random_streams
+from utils.type_aliases import TypeAgentConfig
+
+
+def _agent(name: str, method: str, storage: str|None = None) -> TypeAgentConfig:
+    return {'name': name, 'method': method, 'epsilon_type': 'EXPONENTIAL_TARGET_AT',  # type: ignore[typeddict-item]
+            'epsilon_initial': 0.5, 'epsilon_target': 0.05, 'epsilon_target_iterations': 900,
+            'alpha_type': 'INV_ROUNDS_TARGET_AT', 'alpha_initial': 0.2, 'alpha_target': 0.001,
+            'alpha_target_iterations': 900, 'gamma': 1.0, 'storage': storage}
+
+
+def _create(agent_def: TypeAgentConfig) -> Method:
+    environment = create_environment("blackjack", "simple")
+    return create_method(agent_def, environment, "blackjack")
+
+
+def _state_arrays(method: Method) -> dict[str, np.ndarray]:  # type: ignore[type-arg]
+    return {key: np.array(array) for key, array in method._valuerep.get_state_arrays().items()}  # pylint: disable=protected-access
+
+
+@pytest.mark.parametrize("agent_def", [_agent("SG_SARSA_FC", "SgFcSarsa"),
+                                       _agent("SARSA_DENSE", "Sarsa", storage="dense")])
+def test_save_to_folder_loaded_from(tmp_path: Path, agent_def: TypeAgentConfig) -> None:
+
+    random_streams.seed(1)
+
+    method = _create(agent_def)
+    method.learn(1000, None)
+    method.save(tmp_path)
+    saved = _state_arrays(method)
+
+    # arrays of the loaded method are memory-mapped from the files saved over
+    loaded = _create(agent_def)
+    loaded.load(tmp_path)
+    loaded.save(tmp_path)
+
+    for key, array in _state_arrays(loaded).items():
+        np.testing.assert_array_equal(array, saved[key])
+
+    reloaded = _create(agent_def)
+    reloaded.load(tmp_path)
+
+    for key, array in _state_arrays(reloaded).items():
+        np.testing.assert_array_equal(array, saved[key])
+
+    assert np.any(saved['weights' if 'weights' in saved else 'value'] != 0)
+
+
+def test_schedule_target_iterations_saved(tmp_path: Path) -> None:
+
+    agent_def = _agent("SARSA", "Sarsa")
+
+    method = _create(agent_def)
+    method.save(tmp_path)
+
+    assert Method.load_schedule_target_iterations(tmp_path) == {'alpha_target_iterations': 900,
+                                                                 'epsilon_target_iterations': 900}
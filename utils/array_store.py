@@ -0,0 +1,60 @@
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Literal
+
+import numpy as np
+
+
+META_FILE = "meta.json"
+
+
+def save_arrays(path: Path, arrays: dict[str, np.ndarray[Any, Any]], meta: dict[str, Any]) -> None:
+    """Arrays as .npy files in folder path, with JSON serializable meta and the array names in meta.json
+
+    Files are written to a temporary file and renamed, so arrays memory-mapped from the same
+    files, e.g. of a method loaded from path, keep their contents while being saved
+    """
+
+    path.mkdir(parents=True, exist_ok=True)
+
+    for name, array in arrays.items():
+
+        file_handle, temp_name = tempfile.mkstemp(prefix=f"{name}.", suffix=".npy", dir=path)
+
+        with os.fdopen(file_handle, 'wb') as file:
+            np.save(file, np.asarray(array))
+
+        os.replace(temp_name, path / f"{name}.npy")
+
+    with open(path / META_FILE, "w", encoding="utf-8") as file:
+        json.dump(meta | {'arrays': list(arrays)}, file, indent=2)
+
+
+def load_meta(path: Path) -> dict[str, Any]:
+    """Meta saved with save_arrays, without loading the arrays"""
+
+    if not (path / META_FILE).exists():
+        raise SystemExit(f"No saved arrays found in '{path}'")
+
+    with open(path / META_FILE, "r", encoding="utf-8") as file:
+        meta: dict[str, Any] = json.load(file)
+
+    return meta
+
+
+def load_arrays(path: Path, mmap: bool = True) -> tuple[dict[str, np.ndarray[Any, Any]], dict[str, Any]]:
+    """Arrays and meta saved with save_arrays
+
+    With mmap, arrays are memory-mapped copy-on-write: processes loading the same arrays
+    share their pages, and changes to a loaded array are not written back to the file
+    """
+
+    meta = load_meta(path)
+
+    mmap_mode: Literal['c']|None = 'c' if mmap else None
+
+    arrays = {name: np.load(path / f"{name}.npy", mmap_mode=mmap_mode) for name in meta.pop('arrays')}
+
+    return arrays, meta
@@ -6,6 +6,22 @@ INITIAL_WEIGHT = 0.0
 
 MAX_UPDATE_WARN_LIMIT = 1000
 
+SAMPLE_CHUNK_EPISODES = 10000
+
+EPISODE_BUFFER_CAPACITY = 64
+
+REPORT_SNAPSHOT_CAPACITY = 16
+
+CHECKPOINT_INTERVAL_SECONDS = 600
+
+EVALUATION_BATCH_SIZE = 10000
+
+RANDOM_BUFFER_SIZE = 4096
+
+PLANNING_TOLERANCE = 1e-10
+PLANNING_MAX_ITERATIONS = 100000
+PLANNING_DENSE_STATE_LIMIT = 1000   # up to this many states, transitions are also kept as a dense tensor
+
 # Default values used by run.py
 
 class Defaults:  # pylint: disable=too-few-public-methods
@@ -16,6 +32,7 @@ class Defaults:  # pylint: disable=too-few-public-methods
     BATCH_STOPPING_LIMIT = 0.01
 
     EVALUATION_EPISODES = 10000
+    EVALUATION_ENGINE = 'vectorized'
 
     CONFIGS_FOLDER = "configs/"
     REPORT_FOLDER = "../testruns/"
@@ -24,3 +41,5 @@ class Defaults:  # pylint: disable=too-few-public-methods
     FIRST_REPORT = 100
 
     ENV_VARIANT = 'simple'
+
+    SUMMARY_QUANTILES = (0.05, 0.5, 0.95)
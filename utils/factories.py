@@ -145,7 +145,14 @@ def create_method(agent_def: TypeAgentConfig, environment: Environment, env_type
     method_class = _get_method_class(method_str)
 
     value_rep_class = _get_value_rep(method_str, env_type)
-    valuerep = value_rep_class()
+
+    valuerep: ValueRepresentation
+
+    if issubclass(value_rep_class, VrTabular):
+        valuerep = value_rep_class(storage=agent_def.get("storage") or "dict",
+                                   states=environment.get_report_base_states())
+    else:
+        valuerep = value_rep_class()
 
     assert epsilon_getter is not None
 
@@ -161,4 +168,10 @@ def create_method(agent_def: TypeAgentConfig, environment: Environment, env_type
     method = method_class(name=agent_name, agent=agent, valuerep=valuerep,
                           alpha_getter=alpha_getter, gamma=gamma)
 
+    target_iterations = {'alpha_target_iterations': agent_def.get("alpha_target_iterations"),
+                         'epsilon_target_iterations': agent_def.get("epsilon_target_iterations")}
+
+    method.schedule_target_iterations = {key: int(value) for key, value in target_iterations.items()
+                                         if value is not None}
+
     return method
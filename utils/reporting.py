@@ -1,11 +1,83 @@
-from typing import Union, Callable
+from typing import Callable
 
+import numpy as np
 import pandas as pd # type: ignore[import]
 
 from environments.environment import Environment
 
-from utils.type_aliases import (TypeValidState, TypeActions,
-                                TypeReportList, TypeValueGetter, TypeVisitCountGetter)
+import utils.constants as constants  # pylint: disable=consider-using-from-import
+from utils.type_aliases import (TypeValidState, TypeActions, TypeAction, TypeNDarray64, TypeNDarrayInt,
+                                TypeValuesGetter, TypeVisitCountsGetter)
+
+
+class ReportSnapshots:
+    """Report snapshots of one agent, a row of values over report state-action pairs per snapshot
+
+    Rows are preallocated, capacity is doubled when full. Visit counts are allocated with
+    the first snapshot that has them
+    """
+
+    def __init__(self, agent: str, pair_count: int,
+                 capacity: int = constants.REPORT_SNAPSHOT_CAPACITY) -> None:
+
+        self.agent: str = agent
+        self.snapshot_count: int = 0
+
+        self._iterations: TypeNDarrayInt = np.zeros(capacity, dtype=np.int64)
+        self._values: TypeNDarray64 = np.zeros((capacity, pair_count), dtype=np.float64)
+        self._visit_counts: TypeNDarray64|None = None
+
+
+    def append(self, iteration: int, values: TypeNDarray64, visit_counts: TypeNDarrayInt|None) -> None:
+
+        if self.snapshot_count == len(self._iterations):
+            self._resize(2 * len(self._iterations))
+
+        self._iterations[self.snapshot_count] = iteration
+        self._values[self.snapshot_count] = values
+
+        if visit_counts is not None:
+            if self._visit_counts is None:
+                self._visit_counts = np.full(self._values.shape, np.nan, dtype=np.float64)
+
+            self._visit_counts[self.snapshot_count] = visit_counts
+
+        self.snapshot_count += 1
+
+
+    def _resize(self, capacity: int) -> None:
+
+        self._iterations = np.resize(self._iterations, capacity)
+        self._values = np.resize(self._values, (capacity, self._values.shape[1]))
+
+        if self._visit_counts is not None:
+            self._visit_counts = np.resize(self._visit_counts, (capacity, self._visit_counts.shape[1]))
+
+
+    def trim(self) -> None:
+        """Drop unused capacity, e.g. before passing snapshots to another process"""
+        self._resize(self.snapshot_count)
+
+
+    def get_iterations(self) -> TypeNDarrayInt:
+        return self._iterations[:self.snapshot_count]
+
+
+    def get_values(self) -> TypeNDarray64:
+        return self._values[:self.snapshot_count]
+
+
+    def get_visit_counts(self) -> TypeNDarray64:
+        """Visit counts per snapshot, NaN if not reported"""
+
+        if self._visit_counts is None:
+            return np.full((self.snapshot_count, self._values.shape[1]), np.nan, dtype=np.float64)
+
+        return self._visit_counts[:self.snapshot_count]
+
+
+TypeReportList = list[ReportSnapshots]
+
 
 class Reporting:
 
@@ -13,58 +85,90 @@ class Reporting:
 
         self._report_list: TypeReportList = []
 
-        state_headers = environment.get_column_names()
-        self._column_names = ['agent', 'iterations'] + state_headers + ['action', 'visit_count', 'value']
+        self._state_headers: list[str] = environment.get_column_names()
+        self._column_names = ['agent', 'iterations'] + self._state_headers + ['action', 'visit_count', 'value']
 
         self._report_states: list[TypeValidState] = environment.get_report_base_states()
         self._report_actions: TypeActions = environment.get_actions()
 
+        # report rows are state-action pairs, actions varying fastest
+        self._pair_states: list[TypeValidState] = [state for state in self._report_states
+                                                   for _ in self._report_actions]
+        self._pair_actions: list[TypeAction] = [action for _ in self._report_states
+                                                for action in self._report_actions]
+
+        self._state_columns: list[np.ndarray] = [np.array([state[i] for state in self._pair_states])  # type: ignore[type-arg]
+                                                 for i in range(len(self._state_headers))]
+        self._action_column: np.ndarray = np.array(self._pair_actions)  # type: ignore[type-arg]
+
 
     def get_column_names(self) -> list[str]:
         return self._column_names
 
 
     def get_reports_list(self) -> TypeReportList:
+
+        for snapshots in self._report_list:
+            snapshots.trim()
+
         return self._report_list
 
 
+    def add_reports(self, report_list: TypeReportList) -> None:
+        self._report_list.extend(report_list)
+
+
+    def get_row_count(self, report_list: TypeReportList) -> int:
+        return sum(snapshots.snapshot_count for snapshots in report_list) * len(self._pair_actions)
+
+
     def get_reports_as_df(self) -> pd.DataFrame:
 
-        reports = self._report_list
-        column_names = self._column_names
+        pair_count = len(self._pair_actions)
+        snapshot_counts = [snapshots.snapshot_count for snapshots in self._report_list]
+        snapshot_total = sum(snapshot_counts)
 
-        df_report = pd.DataFrame(reports, columns=column_names)
+        def concatenate(arrays: list[np.ndarray], dtype: type) -> np.ndarray:  # type: ignore[type-arg]
+            return np.concatenate(arrays).ravel() if arrays else np.zeros(0, dtype=dtype)
 
-        return df_report
+        agents = np.repeat(np.array([snapshots.agent for snapshots in self._report_list], dtype=object),
+                           np.array(snapshot_counts, dtype=np.int64) * pair_count)
 
+        iterations = np.repeat(concatenate([snapshots.get_iterations() for snapshots in self._report_list],
+                                           np.int64), pair_count)
 
-    def report_at(self, method_name: str, current_iteration: int,
-                  value_getter: TypeValueGetter,
-                  visit_count_getter: TypeVisitCountGetter|None = None) -> None:
+        visit_counts = concatenate([snapshots.get_visit_counts() for snapshots in self._report_list], np.float64)
+
+        if not np.isnan(visit_counts).any():
+            visit_counts = visit_counts.astype(np.int64)
+
+        columns = {'agent': agents, 'iterations': iterations}
 
-        report  = []
+        for header, state_column in zip(self._state_headers, self._state_columns):
+            columns[header] = np.tile(state_column, snapshot_total)
 
-        for state in self._report_states:
-            for action in self._report_actions:
+        columns['action'] = np.tile(self._action_column, snapshot_total)
+        columns['visit_count'] = visit_counts
+        columns['value'] = concatenate([snapshots.get_values() for snapshots in self._report_list], np.float64)
 
-                value = value_getter(state, action)
+        return pd.DataFrame(columns, columns=self._column_names)
 
-                if visit_count_getter:
-                    visit_count = visit_count_getter(state, action)
-                else:
-                    visit_count = None
 
-                report_row: list[Union[str, int, float, None]]
+    def report_at(self, method_name: str, current_iteration: int,
+                  values_getter: TypeValuesGetter,
+                  visit_counts_getter: TypeVisitCountsGetter|None = None) -> None:
+        """Snapshot values of report state-action pairs with one batched query"""
+
+        if not self._report_list or self._report_list[-1].agent != method_name:
+            self._report_list.append(ReportSnapshots(method_name, len(self._pair_actions)))
 
-                report_row = [method_name, current_iteration]
-                report_row.extend([item for item in state])
-                report_row.append(action)
-                report_row.append(visit_count)
-                report_row.append(value)
+        values = values_getter(self._pair_states, self._pair_actions)
 
-                report.append(report_row)
+        visit_counts = None
+        if visit_counts_getter:
+            visit_counts = visit_counts_getter(self._pair_states, self._pair_actions)
 
-        self._report_list.extend(report)
+        self._report_list[-1].append(current_iteration, values, visit_counts)
 
 
 class SharedReporting():
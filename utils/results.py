@@ -0,0 +1,151 @@
+import importlib.util
+import json
+import pickle
+from pathlib import Path
+from typing import Any
+
+import pandas as pd # type: ignore[import]
+
+
+RESULT_FORMATS = ("pickle", "parquet", "feather")
+
+MANIFEST_FILE = "manifest.json"
+OBJECTS_FILE = "objects.pik"
+
+
+def check_result_format(result_format: str) -> None:
+
+    if result_format not in RESULT_FORMATS:
+        raise SystemExit(f"Unknown result format {result_format}, expected one of {RESULT_FORMATS}")
+
+    if result_format != "pickle" and importlib.util.find_spec("pyarrow") is None:
+        raise SystemExit(f"Result format {result_format} needs package pyarrow, "
+                         f"install it or use result format pickle")
+
+
+def get_result_path(report_path: Path, result_format: str) -> Path:
+    """Pickle results go to the report file, columnar results to a run folder named after it"""
+
+    if result_format == "pickle":
+        return report_path
+
+    return report_path.with_suffix("")
+
+
+def _to_columnar_frame(df_frame: pd.DataFrame) -> pd.DataFrame:
+    """Frame with string columns as categoricals and a default index, as Feather requires"""
+
+    df_columnar = df_frame.reset_index(drop=True)
+
+    for column in df_columnar.columns:
+        if pd.api.types.is_string_dtype(df_columnar[column]) or df_columnar[column].dtype == object:
+            df_columnar[column] = df_columnar[column].astype("category")
+
+    return df_columnar
+
+
+def write_results(result_dict: dict[str, Any], result_path: Path, result_format: str) -> None:
+    """Write results as a single pickle, or a run folder with one columnar file per frame
+
+    In a run folder, manifest.json lists the frames with their files, rows and columns, and
+    other results (agent definitions, seed, maze config) are pickled to objects.pik
+    """
+
+    check_result_format(result_format)
+
+    if result_format == "pickle":
+        with open(result_path, 'wb') as file:
+            pickle.dump(result_dict, file)
+        return
+
+    result_path.mkdir(exist_ok=True)
+
+    manifest: dict[str, Any] = {'format': result_format, 'frames': {}, 'objects': []}
+    objects = {}
+
+    for key, value in result_dict.items():
+
+        if isinstance(value, pd.DataFrame):
+            df_columnar = _to_columnar_frame(value)
+            file_name = f"{key}.{result_format}"
+
+            if result_format == "parquet":
+                df_columnar.to_parquet(result_path / file_name, index=False)
+            else:
+                df_columnar.to_feather(result_path / file_name)
+
+            manifest['frames'][key] = {
+                'file': file_name,
+                'rows': len(df_columnar),
+                'columns': [str(column) for column in df_columnar.columns]
+            }
+        else:
+            objects[key] = value
+            manifest['objects'].append(key)
+
+    with open(result_path / OBJECTS_FILE, 'wb') as file:
+        pickle.dump(objects, file)
+
+    with open(result_path / MANIFEST_FILE, 'w', encoding="utf-8") as file:
+        json.dump(manifest, file, indent=2)
+
+
+def read_manifest(result_path: Path) -> dict[str, Any]:
+
+    with open(result_path / MANIFEST_FILE, 'r', encoding="utf-8") as file:
+        manifest: dict[str, Any] = json.load(file)
+
+    return manifest
+
+
+def read_frame(result_path: Path, frame: str, columns: list[str]|None = None,
+               agents: list[str]|None = None) -> pd.DataFrame:
+    """Read one frame of a run folder, optionally only given columns and rows of given agents"""
+
+    manifest = read_manifest(result_path)
+
+    if frame not in manifest['frames']:
+        raise SystemExit(f"No frame {frame} in results {result_path}, "
+                         f"available frames are {list(manifest['frames'])}")
+
+    file_path = result_path / manifest['frames'][frame]['file']
+
+    read_columns = columns
+    if columns is not None and agents is not None and 'agent' not in columns:
+        read_columns = columns + ['agent']
+
+    if manifest['format'] == "parquet":
+        filters = [('agent', 'in', agents)] if agents is not None else None
+        df_frame = pd.read_parquet(file_path, columns=read_columns, filters=filters)
+    else:
+        df_frame = pd.read_feather(file_path, columns=read_columns)
+
+        if agents is not None:
+            df_frame = df_frame[df_frame['agent'].isin(agents)].reset_index(drop=True)
+
+    if agents is not None and 'agent' in df_frame.columns:
+        df_frame['agent'] = df_frame['agent'].cat.remove_unused_categories()
+
+    if columns is not None:
+        df_frame = df_frame[columns]
+
+    return df_frame
+
+
+def read_results(result_path: Path) -> dict[str, Any]:
+    """All results as a dict, from a pickle file or a run folder"""
+
+    if not result_path.is_dir():
+        with open(result_path, 'rb') as file:
+            result_dict: dict[str, Any] = pickle.load(file)
+        return result_dict
+
+    manifest = read_manifest(result_path)
+
+    with open(result_path / OBJECTS_FILE, 'rb') as file:
+        result_dict = pickle.load(file)
+
+    for frame in manifest['frames']:
+        result_dict[frame] = read_frame(result_path, frame)
+
+    return result_dict
@@ -0,0 +1,112 @@
+import zlib
+from typing import Sequence, TypeVar
+
+import numpy as np
+
+import utils.constants as constants  # pylint: disable=consider-using-from-import
+
+
+TypeItem = TypeVar("TypeItem")
+
+
+class RandomStream:
+    """Random draws of one component from its own NumPy generator
+
+    Scalar draws are served from buffers refilled in bulk, a buffer of uniforms and a buffer
+    of integers for each upper limit. Array draws go to generator directly. A stream is
+    pickled with its generator state and buffers, so a restored stream continues the same draws
+    """
+
+    def __init__(self, seed_sequence: np.random.SeedSequence,
+                 buffer_size: int = constants.RANDOM_BUFFER_SIZE) -> None:
+
+        self.generator: np.random.Generator = np.random.default_rng(seed_sequence)
+        self._buffer_size: int = buffer_size
+
+        self._uniforms: list[float] = []
+        self._uniform_position: int = 0
+
+        self._integers: dict[int, list[int]] = {}
+        self._integer_positions: dict[int, int] = {}
+
+
+    def reseed(self, seed: int) -> None:
+        """Restart the stream from seed, e.g. in a worker process with a copy of the stream"""
+
+        self.generator = np.random.default_rng(seed)
+
+        self._uniforms = []
+        self._uniform_position = 0
+
+        self._integers = {}
+        self._integer_positions = {}
+
+
+    def draw_seed(self) -> int:
+        """Seed for another stream, e.g. of a copy of a component in a worker process"""
+        return int(self.generator.integers(0, 2**63 - 1))
+
+
+    def random(self) -> float:
+        """Uniform float in [0, 1)"""
+
+        if self._uniform_position == len(self._uniforms):
+            self._uniforms = self.generator.random(self._buffer_size).tolist()
+            self._uniform_position = 0
+
+        value = self._uniforms[self._uniform_position]
+        self._uniform_position += 1
+
+        return value
+
+
+    def integer(self, high: int) -> int:
+        """Uniform integer in [0, high)"""
+
+        position = self._integer_positions.get(high, self._buffer_size)
+
+        if position == self._buffer_size:
+            self._integers[high] = self.generator.integers(0, high, size=self._buffer_size).tolist()
+            position = 0
+
+        self._integer_positions[high] = position + 1
+
+        return self._integers[high][position]
+
+
+    def choice(self, items: Sequence[TypeItem]) -> TypeItem:
+        return items[self.integer(len(items))]
+
+
+class RandomStreams:
+    """Independent random streams for components of an agent, derived from a run seed
+
+    A stream is derived from the seed and the name of the component, and a count of streams
+    with the same name, so components get the same streams in any process when created in the
+    same order
+    """
+
+    def __init__(self) -> None:
+        self._entropy: int = 0
+        self._name_counts: dict[str, int] = {}
+        self.seed(None)
+
+
+    def seed(self, seed: int|None) -> None:
+        """Start deriving streams from seed, from OS entropy if no seed is given"""
+
+        self._entropy = int(np.random.SeedSequence(seed).entropy)  # type: ignore[arg-type]
+        self._name_counts = {}
+
+
+    def get_stream(self, name: str) -> RandomStream:
+
+        count = self._name_counts.get(name, 0)
+        self._name_counts[name] = count + 1
+
+        spawn_key = (zlib.crc32(name.encode("utf-8")), count)
+
+        return RandomStream(np.random.SeedSequence(self._entropy, spawn_key=spawn_key))
+
+
+random_streams = RandomStreams()
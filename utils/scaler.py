@@ -33,6 +33,10 @@ class Scaler:
         self._scales[key] = MinMaxScale(scale_min, scale_max, coeff_a, coeff_b)
 
 
+    def clear(self) -> None:
+        self._scales = {}
+
+
     def get_scale(self, key: str) -> MinMaxScale:
         return self._scales[key]
 
@@ -0,0 +1,63 @@
+import itertools
+
+import numpy as np
+
+from utils.type_aliases import TypeValidState, TypeNDarrayInt
+
+
+class StateIndexer:
+    """Maps states of a small, enumerable state space to contiguous integer ids
+
+    States are tuples of ints (or bools), e.g. blackjack (dealer, player, soft) or maze (row, col).
+    An id is the mixed-radix number of the state components within the bounding box
+    of the given states. Arrays of states are indexed arithmetically, single states
+    through a lookup dict over the bounding box, which is faster for a tuple in Python
+    """
+
+    def __init__(self, states: list[TypeValidState]) -> None:
+
+        values: TypeNDarrayInt = np.array(states, dtype=np.int64)
+
+        mins = values.min(axis=0)
+        sizes = values.max(axis=0) - mins + 1
+        strides = np.ones(len(sizes), dtype=np.int64)
+        strides[:-1] = np.cumprod(sizes[::-1])[-2::-1]
+
+        self.state_count: int = int(np.prod(sizes))
+
+        self._mins: TypeNDarrayInt = mins
+        self._sizes: TypeNDarrayInt = sizes
+        self._strides: TypeNDarrayInt = strides
+
+        self._min_list: list[int] = mins.tolist()
+        self._stride_list: list[int] = strides.tolist()
+        self._component_types: list[type] = [type(value) for value in states[0]]
+
+        box = itertools.product(*[range(minimum, minimum + size)
+                                  for minimum, size in zip(self._min_list, sizes.tolist())])
+
+        self._ids: dict[TypeValidState, int] = {state: index for index, state in enumerate(box)}
+
+
+    def get_index(self, state: TypeValidState) -> int:
+        return self._ids[state]
+
+
+    def get_indices(self, states: TypeNDarrayInt) -> TypeNDarrayInt:
+        """Ids for an array of states, one state per row"""
+
+        indices: TypeNDarrayInt = (states - self._mins) @ self._strides
+
+        return indices
+
+
+    def get_state(self, index: int) -> TypeValidState:
+
+        state = []
+
+        for minimum, stride, component_type in zip(self._min_list, self._stride_list,
+                                                   self._component_types):
+            value, index = divmod(index, stride)
+            state.append(component_type(value + minimum))
+
+        return tuple(state)
@@ -1,4 +1,4 @@
-from typing import Any, TypeGuard, Union, Callable, TypedDict, TypeAlias
+from typing import Any, TypeGuard, Union, Callable, Sequence, TypedDict, TypeAlias
 
 import numpy as np
 
@@ -20,6 +20,11 @@ class TypeAgentConfig(TypedDict):
     alpha_target_iterations: int|None
     alpha_target: float|None
     gamma: float
+    storage: str|None
+    lspi_solver: str|None
+    lspi_regularization: float|None
+    lspi_refresh_interval: int|None
+    batch_chunk_episodes: int|None
 
 
 # Maze configurations
@@ -104,6 +109,7 @@ TypeStorageDict: TypeAlias = dict[str, Union[int, float]]
 
 TypeNDarray64: TypeAlias = np.ndarray[Any, np.dtype[np.float64]]
 TypeNDarrayBool: TypeAlias = np.ndarray[Any, np.dtype[np.bool_]]
+TypeNDarrayInt: TypeAlias = np.ndarray[Any, np.dtype[np.int64]]
 
 def is_scalar_64_tg(value: TypeNDarray64) -> TypeGuard[np.float64]:
     return np.isscalar(value) and (type(value) in (np.int64,np.float64))
@@ -117,44 +123,17 @@ class TypeSars(TypedDict):
     reward: float
     next_state: TypeState
 
-class TypeWeightedSars(TypedDict):
-    state: TypeValidState
-    action: TypeAction
-    reward: float
-    next_state: TypeState
-    prob: float
-
-class TypeSarsa(TypedDict):
-    state: TypeValidState
-    action: TypeAction
-    reward: float
-    next_state: TypeState
-    next_action: TypeAction|None
-
-class TypeSarsaE(TypedDict):
-    state: TypeValidState
-    action: TypeAction
-    reward: float
-    next_state: TypeState
-    next_state_value: float
-
-TypeEpisode: TypeAlias  = Union[list[TypeSars], list[TypeWeightedSars],
-                                list[TypeSarsa], list[TypeSarsaE]]
-
-TypeWeightedEpisode: TypeAlias = list[TypeWeightedSars]
-TypeEpisodeSarsa: TypeAlias  = list[TypeSarsa]
-
 
 # samples, results and reports
 
-TypeSample: TypeAlias  = list[TypeSars]
 TypeRewardsAtIterations: TypeAlias = list[list[object]]
 TypeEpisodeLenghts: TypeAlias = dict[str, int|float]
 TypeLearnResult: TypeAlias = tuple[TypeRewardsAtIterations, TypeEpisodeLenghts]
-TypeReportList: TypeAlias = list[list[Union[str, int, float, None]]]
+TypeAgentResult: TypeAlias = tuple[TypeRewardsAtIterations, TypeEpisodeLenghts,
+                                   float, TypeEpisodeLenghts, float]
 
 
 # interface functions
 
-TypeValueGetter: TypeAlias = Callable[[TypeValidState, TypeAction], float]
-TypeVisitCountGetter: TypeAlias = Callable[[TypeValidState, TypeAction], int]
+TypeValuesGetter: TypeAlias = Callable[[Sequence[TypeValidState], Sequence[TypeAction]], TypeNDarray64]
+TypeVisitCountsGetter: TypeAlias = Callable[[Sequence[TypeValidState], Sequence[TypeAction]], TypeNDarrayInt]
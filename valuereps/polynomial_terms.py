@@ -7,6 +7,28 @@ class StateAction(NamedTuple):
     s: int
     a: int
 
+TERM_VARIABLES = ('dealer', 'player', 'soft', 'action')
+
+
+def get_term_exponents(name: str) -> list[int]:
+    """Exponents of TERM_VARIABLES in a term name, e.g. 'dealer^2*player*soft' -> [2, 1, 1, 0]"""
+
+    exponents = [0] * len(TERM_VARIABLES)
+
+    if name == 'constant':
+        return exponents
+
+    for factor in name.split('*'):
+        variable, _, power = factor.partition('^')
+
+        if variable not in TERM_VARIABLES:
+            raise SystemExit(f"Polynomial term {name}: unknown variable {variable}")
+
+        exponents[TERM_VARIABLES.index(variable)] = int(power) if power else 1
+
+    return exponents
+
+
 class Feature(TypedDict):
     name: str
     func: Callable[[StateAction], float]
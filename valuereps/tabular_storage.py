@@ -1,9 +1,80 @@
-from utils.type_aliases import (TypeState, TypeValidState, TypeAction, TypeStateAction,
-                                TypeStorageDict, is_valid_state_tg)
+from abc import ABC, abstractmethod
+from typing import Any, Sequence, Union
 
-class TabularStateAction:
+import numpy as np
+
+from utils.state_indexer import StateIndexer
+from utils.type_aliases import (TypeState, TypeValidState, TypeAction, TypeActions, TypeStateAction,
+                                TypeStorageDict, TypeNDarray64, is_valid_state_tg)
+
+
+class TabularStorage(ABC):
+
+    _parameter_types: dict[str, type] = {
+        'value': np.float64,
+        'visit_count': np.int64,
+        'cumulative_count': np.float64
+    }
+
+    def __init__(self, initial_values: TypeStorageDict) -> None:
+        self._initial_values: TypeStorageDict = initial_values
+
+
+    @abstractmethod
+    def get_value(self, state: TypeValidState, action: TypeAction) -> float:
+        pass
+
+
+    def get_values(self, states: Sequence[TypeValidState], actions: Sequence[TypeAction]) -> TypeNDarray64:
+
+        return np.array([self.get_value(state, action) for state, action in zip(states, actions)],
+                        dtype=np.float64)
+
+
+    def get_action_values(self, state: TypeValidState, actions: TypeActions) -> TypeNDarray64:
+        return np.array([self.get_value(state, action) for action in actions], dtype=np.float64)
+
+
+    def get_parameter_values(self, states: Sequence[TypeValidState], actions: Sequence[TypeAction],
+                             key: str) -> np.ndarray[Any, Any]:
+        """Values of one parameter for state-action pairs (states[i], actions[i])"""
+
+        return np.array([self.get_parameters(state, action, key)[0] for state, action in zip(states, actions)])
+
+
+    @abstractmethod
+    def get_parameters(self, state: TypeValidState, action: TypeAction,
+                       *return_values: str) -> tuple[Any,...]:
+        pass
+
+
+    @abstractmethod
+    def update_parameters(self, state: TypeState, action: TypeAction,
+                          **update_values: Union[int, float]) -> None:
+        pass
+
+
+    @abstractmethod
+    def get_stored_states(self) -> list[TypeValidState]:
+        pass
+
+
+    @abstractmethod
+    def get_arrays(self) -> dict[str, np.ndarray[Any, Any]]:
+        pass
+
+
+    @abstractmethod
+    def set_arrays(self, arrays: dict[str, np.ndarray[Any, Any]]) -> None:
+        pass
+
+
+class TabularStateAction(TabularStorage):
+
+    def __init__(self, initial_values: TypeStorageDict) -> None:
+
+        super().__init__(initial_values)
 
-    def __init__(self) -> None:
         self._action_value_dict: dict[TypeStateAction, TypeStorageDict] = {}
 
 
@@ -32,3 +103,250 @@ class TabularStateAction:
             return self._action_value_dict[storage_key]
 
         return None
+
+
+    def get_value(self, state: TypeValidState, action: TypeAction) -> float:
+
+        node = self.get_node(state, action)
+
+        if node:
+            return node['value']
+        else:
+            return self._initial_values['value']
+
+
+    def get_action_values(self, state: TypeValidState, actions: TypeActions) -> TypeNDarray64:
+
+        values = []
+
+        for action in actions:
+            node = self._action_value_dict.get(state + (action,))
+            values.append(node['value'] if node else self._initial_values['value'])
+
+        return np.array(values, dtype=np.float64)
+
+
+    def get_parameters(self, state: TypeValidState, action: TypeAction,
+                       *return_values: str) -> tuple[Any,...]:
+
+        node = self.get_node(state, action)
+        values = []
+
+        if not node:
+            node = self._initial_values
+
+        for return_key in return_values:
+            if return_key in node:
+                values.append(node[return_key])
+            else:
+                raise SystemExit(f"No requested key {return_key} stored "
+                                 f"in tabular storage for {node}")
+
+        return tuple(values)
+
+
+    def update_parameters(self, state: TypeState, action: TypeAction,
+                          **update_values: Union[int, float]) -> None:
+
+        node = self.get_node(state, action)
+
+        if not node:
+            node = {}
+
+        for key, _ in update_values.items():
+            node[key] = update_values[key]
+
+        self.add_node(state, action, node)
+
+
+    def get_stored_states(self) -> list[TypeValidState]:
+        """States with at least one stored state-action pair"""
+        return list(dict.fromkeys(storage_key[:-1] for storage_key in self._action_value_dict))
+
+
+    def get_arrays(self) -> dict[str, np.ndarray[Any, Any]]:
+        """Stored state-action pairs as rows of integers, with a column per parameter
+
+        Parameters missing from a node are stored with their initial values. Components of
+        state-action pairs are integers or booleans, key_is_bool tells which are booleans
+        """
+
+        storage_keys = list(self._action_value_dict)
+        nodes = list(self._action_value_dict.values())
+
+        key_length = len(storage_keys[0]) if storage_keys else 0
+
+        arrays: dict[str, np.ndarray[Any, Any]] = {
+            'keys': np.array(storage_keys, dtype=np.int64).reshape(len(storage_keys), key_length),
+            'key_is_bool': np.array([isinstance(component, bool) for component in storage_keys[0]]
+                                    if storage_keys else [], dtype=np.bool_)
+        }
+
+        for key, dtype in self._parameter_types.items():
+            arrays[key] = np.array([node.get(key, self._initial_values[key]) for node in nodes], dtype=dtype)
+
+        return arrays
+
+
+    def set_arrays(self, arrays: dict[str, np.ndarray[Any, Any]]) -> None:
+
+        if 'keys' not in arrays:
+            raise SystemExit("Cannot set dict tabular storage from arrays of dense storage")
+
+        key_is_bool = arrays['key_is_bool'].tolist()
+
+        storage_keys = [tuple(bool(component) if is_bool else component
+                              for component, is_bool in zip(row, key_is_bool))
+                        for row in arrays['keys'].tolist()]
+
+        columns = {key: arrays[key].tolist() for key in self._parameter_types}
+
+        self._action_value_dict = {
+            storage_key: {key: column[i] for key, column in columns.items()}
+            for i, storage_key in enumerate(storage_keys)
+        }
+
+
+class DenseTabularStateAction(TabularStorage):
+    """Tabular storage as parallel NumPy arrays, one element per state-action pair
+
+    State-action pairs are mapped to array positions with a StateIndexer,
+    all parameters are allocated up front with their initial values. Single elements are
+    read and written through memoryviews of the arrays, which is faster than NumPy
+    scalar indexing, and arrays are used directly for batched lookups
+    """
+
+    def __init__(self, initial_values: TypeStorageDict, indexer: StateIndexer,
+                 actions: TypeActions) -> None:
+
+        super().__init__(initial_values)
+
+        self._indexer: StateIndexer = indexer
+        self._action_indexes: dict[TypeAction, int] = {action: i for i, action in enumerate(actions)}
+        self._action_count: int = len(actions)
+
+        # position of the first action of each state, one dict lookup per state-action pair
+        self._state_offsets: dict[TypeValidState, int] = {
+            indexer.get_state(index): index * self._action_count for index in range(indexer.state_count)
+        }
+
+        size = indexer.state_count * self._action_count
+
+        self._arrays: dict[str, np.ndarray[Any, Any]] = {
+            key: np.full(size, initial_values[key], dtype=self._parameter_types[key])
+            for key in self._parameter_types
+        }
+        self._values: np.ndarray[Any, Any] = self._arrays['value']
+
+        self._views: dict[str, memoryview[Any]] = {}
+        self._value_view: memoryview[Any]
+        self._set_views()
+
+
+    def _set_views(self) -> None:
+        self._views = {key: array.data for key, array in self._arrays.items()}
+        self._value_view = self._views['value']
+
+
+    def __getstate__(self) -> dict[str, Any]:
+        """Memoryviews are not pickled, they are created again from the arrays"""
+
+        state = self.__dict__.copy()
+        del state['_views']
+        del state['_value_view']
+
+        return state
+
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._set_views()
+
+
+    def _get_index(self, state: TypeValidState, action: TypeAction) -> int:
+        return self._state_offsets[state] + self._action_indexes[action]
+
+
+    def get_value(self, state: TypeValidState, action: TypeAction) -> float:
+
+        value: float = self._value_view[self._get_index(state, action)]
+
+        return value
+
+
+    def get_values(self, states: Sequence[TypeValidState], actions: Sequence[TypeAction]) -> TypeNDarray64:
+
+        indices = [self._get_index(state, action) for state, action in zip(states, actions)]
+        values: TypeNDarray64 = self._values[indices]
+
+        return values
+
+
+    def get_action_values(self, state: TypeValidState, actions: TypeActions) -> TypeNDarray64:
+        """Values of state for actions given at creation, stored next to each other"""
+
+        start = self._state_offsets[state]
+        values: TypeNDarray64 = self._values[start:start + self._action_count].copy()
+
+        return values
+
+
+    def get_parameter_values(self, states: Sequence[TypeValidState], actions: Sequence[TypeAction],
+                             key: str) -> np.ndarray[Any, Any]:
+
+        indices = [self._get_index(state, action) for state, action in zip(states, actions)]
+
+        try:
+            return self._arrays[key][indices]
+        except KeyError as exc:
+            raise SystemExit(f"No requested key {exc} stored in dense tabular storage") from exc
+
+
+    def get_parameters(self, state: TypeValidState, action: TypeAction,
+                       *return_values: str) -> tuple[Any,...]:
+
+        index = self._get_index(state, action)
+
+        try:
+            return tuple([self._views[return_key][index] for return_key in return_values])
+        except KeyError as exc:
+            raise SystemExit(f"No requested key {exc} stored in dense tabular storage") from exc
+
+
+    def update_parameters(self, state: TypeState, action: TypeAction,
+                          **update_values: Union[int, float]) -> None:
+
+        if is_valid_state_tg(state): # -> TypeGuard[TypeValidState]
+            index = self._get_index(state, action)
+
+            views = self._views
+
+            try:
+                for key, value in update_values.items():
+                    views[key][index] = value
+            except KeyError as exc:
+                raise SystemExit(f"Cannot store key {exc} in dense tabular storage") from exc
+
+
+    def get_stored_states(self) -> list[TypeValidState]:
+        """All states of the indexed bounding box"""
+        return [self._indexer.get_state(index) for index in range(self._indexer.state_count)]
+
+
+    def get_arrays(self) -> dict[str, np.ndarray[Any, Any]]:
+        return self._arrays
+
+
+    def set_arrays(self, arrays: dict[str, np.ndarray[Any, Any]]) -> None:
+
+        if 'keys' in arrays:
+            raise SystemExit("Cannot set dense tabular storage from arrays of dict storage")
+
+        for key, array in self._arrays.items():
+            if arrays[key].shape != array.shape:
+                raise SystemExit(f"Cannot set {key} of shape {arrays[key].shape} in dense tabular storage "
+                                 f"of shape {array.shape}")
+
+        self._arrays = {key: arrays[key] for key in self._parameter_types}
+        self._values = self._arrays['value']
+        self._set_views()
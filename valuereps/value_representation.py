@@ -1,9 +1,12 @@
-import math
 from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Sequence
 
-import random
+import numpy as np
 
-from utils.type_aliases import TypeValidState, TypeActions, TypeAction
+from utils.array_store import save_arrays, load_arrays
+from utils.rng import RandomStream, random_streams
+from utils.type_aliases import TypeValidState, TypeActions, TypeAction, TypeNDarray64
 
 
 class ValueRepresentation(ABC):
@@ -12,6 +15,8 @@ class ValueRepresentation(ABC):
 
         self.actions: TypeActions|None = None
 
+        self._random_stream: RandomStream = random_streams.get_stream("valuerep")
+
 
     def set_actions(self, actions: TypeActions) -> None:
         self.actions = actions
@@ -20,7 +25,7 @@ class ValueRepresentation(ABC):
 
         assert self.actions is not None  # assert for type checking
 
-        random_action: TypeAction = random.choice(self.actions)
+        random_action: TypeAction = self._random_stream.choice(self.actions)
 
         return random_action
 
@@ -29,26 +34,57 @@ class ValueRepresentation(ABC):
 
         assert self.actions is not None  # assert for type checking
 
-        best_value = -math.inf
-        best_actions: list[TypeAction] = []
+        # action sets are small, comparisons are faster on a list than on an array
+        values = self.get_action_values(state).tolist()
+        best_value = max(values)
 
-        for this_action in self.actions:
+        best_actions = [action for action, value in zip(self.actions, values) if value == best_value]
 
-            state_action_value_q = self.get_value(state, this_action)
+        best_action: TypeAction = self._random_stream.choice(best_actions)
 
+        return best_action
 
-            if state_action_value_q > best_value:
-                best_value = state_action_value_q
-                best_actions = [ this_action ]
 
-            elif state_action_value_q == best_value:
-                best_actions.append(this_action)
+    def get_values(self, states: Sequence[TypeValidState], actions: Sequence[TypeAction]) -> TypeNDarray64:
+        """Values of state-action pairs (states[i], actions[i])"""
 
-        assert best_actions is not None
+        return np.array([self.get_value(state, action) for state, action in zip(states, actions)],
+                        dtype=np.float64)
 
-        best_action: TypeAction = random.choice(best_actions)
 
-        return best_action
+    def get_action_values(self, state: TypeValidState) -> TypeNDarray64:
+        """Values of all actions in state, in the order of actions"""
+
+        assert self.actions is not None  # assert for type checking
+
+        return self.get_values([state] * len(self.actions), self.actions)
+
+
+    def save(self, path: Path) -> None:
+        """Learned state as NumPy arrays in folder path"""
+
+        save_arrays(path, self.get_state_arrays(), {'class': type(self).__name__})
+
+
+    def load(self, path: Path, mmap: bool = True) -> None:
+        """Learned state saved with save, memory-mapped copy-on-write with mmap"""
+
+        arrays, meta = load_arrays(path, mmap)
+
+        if meta['class'] != type(self).__name__:
+            raise SystemExit(f"Cannot load {meta['class']} saved in '{path}' to {type(self).__name__}")
+
+        self.set_state_arrays(arrays)
+
+
+    @abstractmethod
+    def get_state_arrays(self) -> dict[str, np.ndarray[Any, Any]]:
+        pass
+
+
+    @abstractmethod
+    def set_state_arrays(self, arrays: dict[str, np.ndarray[Any, Any]]) -> None:
+        pass
 
 
     @abstractmethod
@@ -1,4 +1,5 @@
 from abc import abstractmethod
+from typing import Any, NamedTuple, Sequence
 
 import numpy as np
 
@@ -7,10 +8,23 @@ from utils.scaler import scaler
 from utils.reporting import reporter
 
 import utils.constants as constants # pylint: disable=consider-using-from-import
-from utils.type_aliases import TypeValidState, TypeAction, TypeNDarray64, is_scalar_64_tg
+from utils.type_aliases import TypeValidState, TypeAction, TypeNDarray64, TypeNDarrayInt
+
+
+class SparseFeatures(NamedTuple):
+    """Non-zero elements of a feature vector, the vector is zero elsewhere"""
+
+    indices: TypeNDarrayInt
+    values: TypeNDarray64
 
 
 class VrApproximateLinear(ValueRepresentation):
+    """Linear action-value approximation, value is the dot product of weights and features
+
+    Values and gradient updates use sparse features, so their cost depends on the number of
+    non-zero features, not on the feature dimension. Representations with known sparsity
+    structure override get_sparse_features
+    """
 
     def __init__(self) -> None:
 
@@ -18,36 +32,55 @@ class VrApproximateLinear(ValueRepresentation):
 
         self.scale_value = scaler.get_scaler()
 
-        self._report_at = reporter.get_reporting_handle()
-
         self._weights: TypeNDarray64
 
 
     def get_value(self, state: TypeValidState, action: TypeAction) -> float:
 
+        features = self.get_sparse_features(state, action)
 
-        features = self.get_features(state, action)
-        state_action_value_q = np.dot(self._weights, features)
+        return float(self._weights[features.indices] @ features.values)
+
+
+    def get_values(self, states: Sequence[TypeValidState], actions: Sequence[TypeAction]) -> TypeNDarray64:
+
+        features = np.array([self.get_features(state, action) for state, action in zip(states, actions)],
+                            dtype=np.float64).reshape(len(states), -1)
 
-        if is_scalar_64_tg (state_action_value_q): # -> TypeGuard[np.float64]
-            return state_action_value_q.item()
-        else:
-            raise SystemExit("VrApproximateLinear: get_value: Assumed a scalar from dot product")
+        values: TypeNDarray64 = features @ self._weights
 
+        return values
 
-    def get_gradient(self, state: TypeValidState, action: TypeAction) -> list[float]:
+
+    def get_gradient(self, state: TypeValidState, action: TypeAction) -> TypeNDarray64:
         return self.get_features(state, action)
 
 
     @abstractmethod
-    def get_features(self, state: TypeValidState, action: TypeAction) -> list[float]:
+    def get_features(self, state: TypeValidState, action: TypeAction) -> TypeNDarray64:
         pass
 
 
+    def get_sparse_features(self, state: TypeValidState, action: TypeAction) -> SparseFeatures:
+
+        features = self.get_features(state, action)
+        indices: TypeNDarrayInt = np.flatnonzero(features)
+
+        return SparseFeatures(indices, features[indices])
+
+
+    def get_sparse_gradient(self, state: TypeValidState, action: TypeAction) -> SparseFeatures:
+        return self.get_sparse_features(state, action)
+
+
     def get_feature_dimension(self) -> int:
         return len(self._weights)
 
 
+    def get_weights(self) -> TypeNDarray64:
+        return np.asarray(self._weights, dtype=np.float64)
+
+
     def update_weights_by(self, update: TypeNDarray64) -> None:
         max_update = np.linalg.norm(update, ord=np.inf)
 
@@ -57,6 +90,20 @@ class VrApproximateLinear(ValueRepresentation):
         self._weights = np.add(self._weights, update)
 
 
+    def update_weights_along_gradient(self, state: TypeValidState, action: TypeAction, step: float) -> None:
+        """Add step times the gradient at state-action to weights, only non-zero elements are touched"""
+
+        gradient = self.get_sparse_gradient(state, action)
+        update = step * gradient.values
+
+        max_update = np.abs(update).max(initial=0.0)
+
+        if max_update > constants.MAX_UPDATE_WARN_LIMIT:
+            print(f"Warning: a large update to weights, max change is: {max_update}")
+
+        self._weights[gradient.indices] += update
+
+
     def set_weights_to(self, new_weights: TypeNDarray64) -> float:
         dist = np.linalg.norm(np.subtract(self._weights, new_weights), ord=np.inf)
 
@@ -68,5 +115,22 @@ class VrApproximateLinear(ValueRepresentation):
         return dist.item()
 
 
+    def get_state_arrays(self) -> dict[str, np.ndarray[Any, Any]]:
+        # features are defined by the representation, only weights are learned
+        return {'weights': self._weights}
+
+
+    def set_state_arrays(self, arrays: dict[str, np.ndarray[Any, Any]]) -> None:
+
+        if arrays['weights'].shape != self._weights.shape:
+            raise SystemExit(f"{type(self).__name__}: cannot set weights of shape {arrays['weights'].shape}, "
+                             f"expected {self._weights.shape}")
+
+        self._weights = arrays['weights']
+
+
     def report(self, name: str, iteration: int) -> None:
-        self._report_at(name, iteration, self.get_value)
+        # handle looked up at each report, a representation restored from a checkpoint reports
+        # to the current reporting instance
+        report_at = reporter.get_reporting_handle()
+        report_at(name, iteration, self.get_values)
@@ -0,0 +1,110 @@
+from abc import abstractmethod
+import itertools
+
+import numpy as np
+
+from valuereps.vr_approximate import VrApproximateLinear, SparseFeatures
+import utils.constants as constants # pylint: disable=consider-using-from-import
+
+from utils.type_aliases import TypeValidState, TypeAction, TypeStateAction, TypeNDarray64, TypeNDarrayInt
+
+
+class VrFourierCosine(VrApproximateLinear):
+    """Fourier cosine basis over two scaled state variables, one block of weights per zone
+
+    Feature vectors are computed once per state-action pair and cached, the state and
+    action spaces of the environments are small and finite. Only the block of the zone
+    of a state-action pair is non-zero, sparse features hold that block
+    """
+
+    def __init__(self, *, order: int, zone_count: int) -> None:
+
+        super().__init__()
+
+        self._order = order
+        self._zone_count = zone_count
+        self._initial_weight: float = constants.INITIAL_WEIGHT
+
+        self._c = list(itertools.product(range(0, self._order+1), # pylint: disable=invalid-name
+                                        range(0, self._order+1)))
+
+        # for order = 4
+        # self._c = [[0,0], [0,1], [0,2], [0,3], [1,0], [1,1], .... [4,3],[4,4]]
+
+        self._frequencies: TypeNDarray64 = np.pi * np.array(self._c, dtype=np.float64)
+
+        self._weights: TypeNDarray64 = np.full(len(self._c) * self._zone_count, self._initial_weight,
+                                               dtype=np.float64)
+
+        self._feature_cache: dict[TypeStateAction, TypeNDarray64] = {}
+        self._sparse_feature_cache: dict[TypeStateAction, SparseFeatures] = {}
+        self._action_feature_cache: dict[TypeValidState, TypeNDarray64] = {}
+
+
+    @abstractmethod
+    def _get_scaled_state(self, state: TypeValidState) -> tuple[float, float]:
+        pass
+
+
+    @abstractmethod
+    def _get_zone_index(self, state: TypeValidState, action: TypeAction) -> int:
+        pass
+
+
+    def _compute_sparse_features(self, state: TypeValidState, action: TypeAction) -> SparseFeatures:
+
+        len_c = len(self._c)
+        start = self._get_zone_index(state, action) * len_c
+
+        indices: TypeNDarrayInt = np.arange(start, start + len_c, dtype=np.int64)
+        values: TypeNDarray64 = np.cos(self._frequencies @ self._get_scaled_state(state))
+
+        # cached arrays are shared between callers
+        indices.flags.writeable = False
+        values.flags.writeable = False
+
+        return SparseFeatures(indices, values)
+
+
+    def get_sparse_features(self, state: TypeValidState, action: TypeAction) -> SparseFeatures:
+
+        key = state + (action,)
+        features = self._sparse_feature_cache.get(key)
+
+        if features is None:
+            features = self._compute_sparse_features(state, action)
+            self._sparse_feature_cache[key] = features
+
+        return features
+
+
+    def get_features(self, state: TypeValidState, action: TypeAction) -> TypeNDarray64:
+
+        key = state + (action,)
+        features = self._feature_cache.get(key)
+
+        if features is None:
+            sparse_features = self.get_sparse_features(state, action)
+
+            features = np.zeros(len(self._weights), dtype=np.float64)
+            features[sparse_features.indices] = sparse_features.values
+
+            features.flags.writeable = False
+            self._feature_cache[key] = features
+
+        return features
+
+
+    def get_action_values(self, state: TypeValidState) -> TypeNDarray64:
+
+        assert self.actions is not None  # assert for type checking
+
+        action_features = self._action_feature_cache.get(state)
+
+        if action_features is None:
+            action_features = np.vstack([self.get_features(state, action) for action in self.actions])
+            self._action_feature_cache[state] = action_features
+
+        values: TypeNDarray64 = action_features @ self._weights
+
+        return values
@@ -1,14 +1,22 @@
+from typing import Sequence
+
 import numpy as np
 
-from valuereps.vr_approximate import VrApproximateLinear
-from valuereps.polynomial_terms import StateAction, Feature, AVAILABLE_FEATURES
+from valuereps.vr_approximate import VrApproximateLinear, SparseFeatures
+from valuereps.polynomial_terms import Feature, AVAILABLE_FEATURES, get_term_exponents
 
+from utils.rng import random_streams
 from utils.scaler import scaler
 
-from utils.type_aliases import TypeValidState, TypeAction, TypeNDarray64
+from utils.type_aliases import TypeValidState, TypeAction, TypeStateAction, TypeNDarray64, TypeNDarrayInt
 
 
 class VrPolynomial(VrApproximateLinear):
+    """Polynomial of dealer and player sums with soft and action indicators, scaled to [0,1] per term
+
+    Selected terms are compiled to an exponent matrix and scale coefficients, features of
+    a batch of state-action pairs are evaluated with one array expression
+    """
 
     def __init__(self) -> None:
 
@@ -28,37 +36,100 @@ class VrPolynomial(VrApproximateLinear):
         # self._used_term_indexes: list[int] = [1, 3, 5, 6, 8, 13, 16, 17, 18, 19, 21, 22, 24, 36, 37, 38, 40,
         #                                      45, 60, 65, 85, 86, 87, 88, 89, 90, 91]
 
-        self._terms: list[Feature] = [AVAILABLE_FEATURES[f] for f in self._used_term_indexes]
+        # term functions are lambdas, kept local so that the representation can be pickled
+        terms: list[Feature] = [AVAILABLE_FEATURES[f] for f in self._used_term_indexes]
 
-        for feature in self._terms:
+        for feature in terms:
             scaler.register_scale(feature['name'], feature['min_value'], feature['max_value'])
 
+        self._exponents: TypeNDarrayInt = np.array([get_term_exponents(term['name']) for term in terms],
+                                                   dtype=np.int64)
+
+        # scaled value is coeff_a * value - coeff_b, terms with a constant range scale to 1
+        scales = [scaler.get_scale(term['name']) for term in terms]
+
+        self._coeff_a: TypeNDarray64 = np.array([scale.coeff_a if scale.coeff_a is not None else 0.0
+                                                 for scale in scales], dtype=np.float64)
+        self._coeff_b: TypeNDarray64 = np.array([scale.coeff_b if scale.coeff_b is not None else -1.0
+                                                 for scale in scales], dtype=np.float64)
+
+        self._indices: TypeNDarrayInt = np.arange(len(terms), dtype=np.int64)
+        self._indices.flags.writeable = False
+
+        self._feature_cache: dict[TypeStateAction, TypeNDarray64] = {}
+        self._action_feature_cache: dict[TypeValidState, TypeNDarray64] = {}
+
         #self._initial_weight = constants.INITIAL_WEIGHT
         #self._weights: TypeNDarray64 = np.asarray([ self._initial_weight ] * len(self._used_term_indexes))
+        # initial weights from a stream of their own, so that random actions and tie-breaks
+        # draw the same values as in other representations with the same seed
         weight_range = 0.2
-        self._weights: TypeNDarray64 = np.random.uniform(-weight_range, weight_range,
-                                                         len(self._used_term_indexes)).tolist()
+        init_stream = random_streams.get_stream("valuerep_init")
+        self._weights: TypeNDarray64 = init_stream.generator.uniform(-weight_range, weight_range,
+                                                                     len(self._used_term_indexes))
 
 
-    def get_features(self, state: TypeValidState, action: TypeAction)  -> list[float]:
+    def get_batch_features(self, state_actions: TypeNDarrayInt) -> TypeNDarray64:
+        """Features for rows of (dealer, player, soft, action), soft and action as 0 or 1"""
 
-        dealer = state[0]
-        player = state[1]
+        values = np.prod(state_actions[:, np.newaxis, :] ** self._exponents, axis=2)
+
+        features: TypeNDarray64 = self._coeff_a * values - self._coeff_b
+
+        return features
+
+
+    def _get_state_action_row(self, state: TypeValidState, action: TypeAction) -> list[int]:
 
         soft_ind = 1 if state[2] else 0
         action_ind = 1 if action else 0
 
-        state_action = StateAction(dealer, player, soft_ind, action_ind)
+        return [state[0], state[1], soft_ind, action_ind]
+
+
+    def get_features(self, state: TypeValidState, action: TypeAction)  -> TypeNDarray64:
+
+        key = state + (action,)
+        features = self._feature_cache.get(key)
+
+        if features is None:
+            state_actions = np.array([self._get_state_action_row(state, action)], dtype=np.int64)
+            features = self.get_batch_features(state_actions)[0]
+
+            # cached arrays are shared between callers
+            features.flags.writeable = False
+            self._feature_cache[key] = features
+
+        return features
+
+
+    def get_sparse_features(self, state: TypeValidState, action: TypeAction) -> SparseFeatures:
+        # polynomial features are dense
+        return SparseFeatures(self._indices, self.get_features(state, action))
+
+
+    def get_values(self, states: Sequence[TypeValidState], actions: Sequence[TypeAction]) -> TypeNDarray64:
+
+        state_actions = np.array([self._get_state_action_row(state, action)
+                                  for state, action in zip(states, actions)], dtype=np.int64).reshape(-1, 4)
+
+        values: TypeNDarray64 = self.get_batch_features(state_actions) @ self._weights
+
+        return values
+
+
+    def get_action_values(self, state: TypeValidState) -> TypeNDarray64:
 
-        scaled_values: list[float] = []
+        assert self.actions is not None  # assert for type checking
 
-        for term in self._terms:
-            feature_name = term['name']
-            value_func = term['func']
+        action_features = self._action_feature_cache.get(state)
 
-            feature_value = value_func(state_action)
-            scaled_value = scaler.scale_value( feature_value ,feature_name)
+        if action_features is None:
+            state_actions = np.array([self._get_state_action_row(state, action) for action in self.actions],
+                                     dtype=np.int64)
+            action_features = self.get_batch_features(state_actions)
+            self._action_feature_cache[state] = action_features
 
-            scaled_values.append(scaled_value)
+        values: TypeNDarray64 = action_features @ self._weights
 
-        return scaled_values
+        return values
@@ -1,22 +1,55 @@
-import math
+from typing import Union, Any, Sequence
 
-from typing import Union, Any
+import numpy as np
 
 from valuereps.value_representation import ValueRepresentation
-from valuereps.tabular_storage import TabularStateAction
+from valuereps.tabular_storage import TabularStorage, TabularStateAction, DenseTabularStateAction
 
 from utils.reporting import reporter
+from utils.state_indexer import StateIndexer
 import utils.constants as constants  # pylint: disable=consider-using-from-import
 
-from utils.type_aliases import TypeState, TypeValidState, TypeAction
+from utils.type_aliases import (TypeState, TypeValidState, TypeAction, TypeActions, TypeNDarray64, TypeNDarrayInt,
+                                is_valid_state_tg)
+
+
+class StateSummary:  # pylint: disable=too-few-public-methods
+    """Values and visit counts of all actions in a state, with the best actions, their value
+    and the total visit count kept up to date as parameters of the state are updated"""
+
+    __slots__ = ('values', 'visit_counts', 'best_actions', 'max_value', 'visit_total')
+
+    def __init__(self, values: list[float], visit_counts: list[int], actions: TypeActions) -> None:
+
+        self.values: list[float] = values
+        self.visit_counts: list[int] = visit_counts
+
+        self.max_value: float = max(values)
+        self.best_actions: tuple[TypeAction, ...] = tuple(action for action, value in zip(actions, values)
+                                                          if value == self.max_value)
+        self.visit_total: int = sum(visit_counts)
 
 
 class VrTabular(ValueRepresentation):
 
-    def __init__(self) -> None:
+    STORAGE_TYPES = ("dict", "dense")
+
+    def __init__(self, *, storage: str = "dict", states: list[TypeValidState]|None = None) -> None:
+        """storage 'dict' keeps a dict node per visited state-action pair,
+        'dense' preallocates arrays for all state-action pairs over given states"""
 
         super().__init__()
 
+        if storage not in VrTabular.STORAGE_TYPES:
+            raise SystemExit(f"VR Tabular: unknown storage type {storage}, "
+                             f"expected one of {VrTabular.STORAGE_TYPES}")
+
+        if storage == "dense" and not states:
+            raise SystemExit("VR Tabular: dense storage needs the states to index")
+
+        self._storage_type: str = storage
+        self._states: list[TypeValidState]|None = states
+
         self.initial_q: float = constants.DEFAULT_VALUE
 
         self._initial_values: dict[str, Union[int, float]]  = {
@@ -24,113 +57,153 @@ class VrTabular(ValueRepresentation):
             'visit_count': 0,
             'cumulative_count': 0
         }
-        self.action_value_table: TabularStateAction = TabularStateAction()
+        self.action_value_table: TabularStorage = TabularStateAction(self._initial_values)
 
-        self._report_at = reporter.get_reporting_handle()
+        # summaries of updated states, states not updated have _initial_summary
+        self._summaries: dict[TypeValidState, StateSummary] = {}
+        self._initial_summary: StateSummary|None = None
+        self._action_indexes: dict[TypeAction, int] = {}
 
 
-    def get_value(self, state: TypeValidState, action: TypeAction) -> float:
+    def set_actions(self, actions: TypeActions) -> None:
 
-        node = self.action_value_table.get_node(state, action)
+        super().set_actions(actions)
 
-        if node:
-            state_action_value_q = node['value']
-        else:
-            state_action_value_q = self._initial_values['value']
+        self._initial_summary = StateSummary([self.initial_q] * len(actions), [0] * len(actions), actions)
+        self._action_indexes = {action: i for i, action in enumerate(actions)}
 
-        return state_action_value_q
+        if self._storage_type == "dense":
+            assert self._states is not None  # assert for type checking
 
+            self.action_value_table = DenseTabularStateAction(self._initial_values,
+                                                              StateIndexer(self._states), actions)
+
+
+    def get_value(self, state: TypeValidState, action: TypeAction) -> float:
+        return self.action_value_table.get_value(state, action)
+
+
+    def get_values(self, states: Sequence[TypeValidState], actions: Sequence[TypeAction]) -> TypeNDarray64:
+        return self.action_value_table.get_values(states, actions)
 
-    def get_state_visit_count(self, state: TypeValidState) -> int:
 
-        count: int = 0
+    def _get_summary(self, state: TypeValidState) -> StateSummary:
 
-        if not self.actions:
+        summary = self._summaries.get(state, self._initial_summary)
+
+        if summary is None:
             raise SystemExit("VR Tabular: Actions not defined")
 
-        for this_action in self.actions:
+        return summary
 
-            node = self.action_value_table.get_node(state, this_action)
-            if node:
-                assert isinstance(node['visit_count'], int)
-                count += node['visit_count']
 
-        return count
+    def get_action_values(self, state: TypeValidState) -> TypeNDarray64:
+        return np.array(self._get_summary(state).values, dtype=np.float64)
 
 
-    def get_max_value(self, state: TypeValidState) -> float:
+    def get_greedy_action(self, state: TypeValidState) -> TypeAction:
 
-        best_value = -math.inf
+        best_action: TypeAction = self._random_stream.choice(self._get_summary(state).best_actions)
 
-        if not self.actions:
-            raise SystemExit("VR Tabular: Actions not defined")
+        return best_action
 
-        for this_action in self.actions:
 
-            state_action_value_q = self.get_value(state, this_action)
+    def get_state_visit_count(self, state: TypeValidState) -> int:
+        return self._get_summary(state).visit_total
 
-            if state_action_value_q > best_value:
-                best_value = state_action_value_q
 
-        return best_value
+    def get_max_value(self, state: TypeValidState) -> float:
+        return self._get_summary(state).max_value
 
 
     def is_best_action(self, state: TypeValidState, action: TypeAction) -> bool:
+        return action in self._get_summary(state).best_actions
 
-        value = self.get_value(state, action)
 
-        if not self.actions:
-            raise SystemExit("VR Tabular: Actions not defined")
+    def get_parameters(self, state: TypeValidState, action: TypeAction,
+                       *return_values: str) -> tuple[Any,...]:
+        return self.action_value_table.get_parameters(state, action, *return_values)
 
-        for this_action in self.actions:
 
-            state_action_value_q = self.get_value(state, this_action)
+    def update_parameters(self, state: TypeState, action: TypeAction,
+                          **update_values: Union[int, float] ) -> None:
 
-            if state_action_value_q > value:
-                return False
+        self.action_value_table.update_parameters(state, action, **update_values)
 
-        return True
+        if is_valid_state_tg(state): # -> TypeGuard[TypeValidState]
+            self._update_summary(state, action, update_values)
 
 
-    def get_parameters(self, state: TypeValidState, action: TypeAction,
-                       *return_values: str) -> tuple[Any,...]:
+    def _update_summary(self, state: TypeValidState, action: TypeAction,
+                        update_values: dict[str, Union[int, float]]) -> None:
 
-        node = self.action_value_table.get_node(state, action)
-        values = []
+        summary = self._summaries.get(state)
 
-        if not node:
-            node = self._initial_values
+        if summary is None:
+            summary = self._create_summary(state)
+            self._summaries[state] = summary
+            return
 
-        for return_key in return_values:
-            if return_key in node:
-                values.append(node[return_key])
-            else:
-                raise SystemExit(f"No requested key {return_key} stored "
-                                 f"in tabular storage for {node}")
+        index = self._action_indexes[action]
 
-        return tuple(values)
+        if 'visit_count' in update_values:
+            visit_count = int(update_values['visit_count'])
+            summary.visit_total += visit_count - summary.visit_counts[index]
+            summary.visit_counts[index] = visit_count
 
+        if 'value' in update_values:
 
-    def update_parameters(self, state: TypeState, action: TypeAction,
-                          **update_values: Union[int, float] ) -> None:
+            value = update_values['value']
+            was_best = action in summary.best_actions
+            summary.values[index] = value
 
-        node = self.action_value_table.get_node(state, action)
+            if value > summary.max_value:
+                summary.max_value = value
+                summary.best_actions = (action,)
 
-        if not node:
-            node = {}
+            elif value == summary.max_value or was_best:
+                # new tie for the best value, or a best action lost value
+                assert self.actions is not None  # assert for type checking
 
-        for key, _ in update_values.items():
-            node[key] = update_values[key]
+                summary.max_value = max(summary.values)
+                summary.best_actions = tuple(best_action for best_action, best_value
+                                             in zip(self.actions, summary.values)
+                                             if best_value == summary.max_value)
 
-        self.action_value_table.add_node(state, action, node)
 
+    def _create_summary(self, state: TypeValidState) -> StateSummary:
+        """Summary of state from the storage"""
 
-    def report(self, name: str, iteration: int) -> None:
+        assert self.actions is not None  # assert for type checking
+
+        values: list[float] = self.action_value_table.get_action_values(state, self.actions).tolist()
+        visit_counts = [int(self.action_value_table.get_parameters(state, action, 'visit_count')[0])
+                        for action in self.actions]
 
-        def get_state_action_visit_count(state: TypeValidState, action: TypeAction) -> int:
+        return StateSummary(values, visit_counts, self.actions)
 
-            visit_count = self.get_parameters(state, action, 'visit_count')[0]
-            assert isinstance(visit_count, int)
-            return visit_count
 
-        self._report_at(name, iteration, self.get_value, get_state_action_visit_count)
+    def get_state_arrays(self) -> dict[str, np.ndarray[Any, Any]]:
+        return self.action_value_table.get_arrays()
+
+
+    def set_state_arrays(self, arrays: dict[str, np.ndarray[Any, Any]]) -> None:
+
+        self.action_value_table.set_arrays(arrays)
+
+        self._summaries = {state: self._create_summary(state)
+                           for state in self.action_value_table.get_stored_states()}
+
+
+    def get_visit_counts(self, states: Sequence[TypeValidState], actions: Sequence[TypeAction]) -> TypeNDarrayInt:
+
+        visit_counts: TypeNDarrayInt = self.action_value_table.get_parameter_values(states, actions,
+                                                                                    'visit_count')
+        return visit_counts
+
+
+    def report(self, name: str, iteration: int) -> None:
+        # handle looked up at each report, a representation restored from a checkpoint reports
+        # to the current reporting instance
+        report_at = reporter.get_reporting_handle()
+        report_at(name, iteration, self.get_values, self.get_visit_counts)
@@ -1,88 +1,113 @@
-import itertools
 import numpy as np
 
-from valuereps.vr_approximate import VrApproximateLinear
+from valuereps.vr_approximate import VrApproximateLinear, SparseFeatures
 
 import utils.constants as constants  # pylint: disable=consider-using-from-import
-from utils.type_aliases import TypeValidState, TypeAction, TypeNDarray64
+from utils.type_aliases import TypeValidState, TypeAction, TypeNDarray64, TypeNDarrayInt
 
 
-class Tile:  # pylint: disable=too-few-public-methods
+class VrTileCoding(VrApproximateLinear):
+    """Tile coding over (dealer, player, soft, action), tile corners placed step apart in each dimension
 
-    def __init__(self, corner: tuple[float,...], sizes: TypeNDarray64) -> None:
+    Tiles are not enumerated. Along each dimension, a point is covered by the tiles with a corner
+    at most size - 1 below it, so the active tiles of a point are computed arithmetically and
+    cost does not grow with the number of tiles
+    """
 
-        self.min_corner: TypeNDarray64 = np.array(corner)
-        self.max_corner: TypeNDarray64 = np.array(corner) + sizes - 1
+    def __init__(self) -> None:
 
+        super().__init__()
 
-    def is_active(self, point: tuple[float,...]) -> bool:
-        return all(np.less_equal(self.min_corner, point) & np.greater_equal(self.max_corner, point))
+        self._initial_weight: float = constants.INITIAL_WEIGHT
 
+        ranges: TypeNDarrayInt = np.array([[2,11], [4,21], [0, 1], [0, 1]], dtype=np.int64)
+        shifts: TypeNDarrayInt = np.array([-5, -5, 0, 0], dtype=np.int64)
 
-class VrTileCoding(VrApproximateLinear):
+        self._sizes: TypeNDarrayInt = np.array([6, 6, 1, 1], dtype=np.int64)
+        self._steps: TypeNDarrayInt = np.array([3, 3, 1, 1], dtype=np.int64)
+        self._starts: TypeNDarrayInt = ranges[:, 0] + shifts
 
-    def __init__(self) -> None:
+        # tile corners at start, start + step, ... up to the end of range in each dimension
+        self._corner_counts: TypeNDarrayInt = -((self._starts - ranges[:, 1] - 1) // self._steps)
 
-        super().__init__()
+        self._strides: TypeNDarrayInt = np.ones(len(ranges), dtype=np.int64)
+        self._strides[:-1] = np.cumprod(self._corner_counts[::-1])[-2::-1]
 
-        self._initial_weight: float = constants.INITIAL_WEIGHT
+        self.tile_count: int = int(np.prod(self._corner_counts))
 
-        self.tiles: list[Tile] = self._init_tiles()
+        self._weights: TypeNDarray64 = np.full(self.tile_count, self._initial_weight, dtype=np.float64)
 
-        self._weights: TypeNDarray64 = np.asarray([ self._initial_weight ] * len(self.tiles))
+        self._active_tile_cache: dict[tuple[int,...], TypeNDarrayInt] = {}
+        self._sparse_feature_cache: dict[tuple[int,...], SparseFeatures] = {}
+        self._feature_cache: dict[tuple[int,...], TypeNDarray64] = {}
 
 
-        self._feature_cache: dict[tuple[float,...], list[float]] = {}
+    def _get_point(self, state: TypeValidState, action: TypeAction) -> tuple[int,...]:
 
+        soft_ind = 1 if state[2] else 0
+        action_ind = 1 if action else 0
 
-    def _init_tiles(self) -> list[Tile]:  # pylint: disable=too-many-locals, no-self-use
+        return (state[0], state[1], soft_ind, action_ind)
 
-        ranges: TypeNDarray64 = np.array([[2,11], [4,21], [0, 1], [0, 1]])
-        sizes: TypeNDarray64 = np.array([6, 6, 1, 1])
-        steps: TypeNDarray64 = np.array([3, 3, 1, 1])
-        shifts: TypeNDarray64 = np.array([-5, -5, 0, 0])
 
-        dimensions = len(ranges)
+    def _compute_active_tiles(self, point: tuple[int,...]) -> TypeNDarrayInt:
 
-        corners = []
+        offsets = np.array(point, dtype=np.int64) - self._starts
 
-        for i in range(0,dimensions):
+        first = np.maximum(-((self._sizes - 1 - offsets) // self._steps), 0)
+        last = np.minimum(offsets // self._steps, self._corner_counts - 1)
 
-            start = ranges[i][0] + shifts[i]
-            end = ranges[i][1] + 1
-            step = steps[i]
+        active_tiles: TypeNDarrayInt = np.zeros(1, dtype=np.int64)
 
-            corner_points = []
+        for first_corner, last_corner, stride in zip(first, last, self._strides):
+            corners = np.arange(first_corner, last_corner + 1, dtype=np.int64)
+            active_tiles = (active_tiles[:, np.newaxis] + corners * stride).ravel()
 
-            for k in range(start, end, step):
-                corner_points.append(k)
+        # cached arrays are shared between callers
+        active_tiles.flags.writeable = False
 
-            corners.append(corner_points)
+        return active_tiles
 
-        tiles = []
 
-        for corner in list(itertools.product(*corners)):
-            new_tile = Tile(corner, sizes)
-            tiles.append(new_tile)
+    def get_active_tiles(self, state: TypeValidState, action: TypeAction) -> TypeNDarrayInt:
 
-        return tiles
+        point = self._get_point(state, action)
+        active_tiles = self._active_tile_cache.get(point)
 
+        if active_tiles is None:
+            active_tiles = self._compute_active_tiles(point)
+            self._active_tile_cache[point] = active_tiles
 
-    def get_features(self, state: TypeValidState, action: TypeAction)  -> list[float]:
+        return active_tiles
 
-        dealer = state[0]
-        player = state[1]
-        soft_ind = 1 if state[2] else 0
-        action_ind = 1 if action else 0
 
-        new_state = (dealer, player, soft_ind, action_ind)
+    def get_features(self, state: TypeValidState, action: TypeAction)  -> TypeNDarray64:
+
+        point = self._get_point(state, action)
+        features = self._feature_cache.get(point)
+
+        if features is None:
+            features = np.zeros(self.tile_count, dtype=np.float64)
+            features[self.get_active_tiles(state, action)] = 1.0
+
+            features.flags.writeable = False
+            self._feature_cache[point] = features
+
+        return features
+
+
+    def get_sparse_features(self, state: TypeValidState, action: TypeAction) -> SparseFeatures:
+
+        point = self._get_point(state, action)
+        features = self._sparse_feature_cache.get(point)
+
+        if features is None:
+            active_tiles = self.get_active_tiles(state, action)
 
-        features: list[float]
+            values = np.ones(len(active_tiles), dtype=np.float64)
+            values.flags.writeable = False
 
-        if new_state in self._feature_cache:
-            features = self._feature_cache[new_state]
-        else:
-            features = [tile.is_active(new_state) * 1 for tile in self.tiles]
-            self._feature_cache[new_state] = features
+            features = SparseFeatures(active_tiles, values)
+            self._sparse_feature_cache[point] = features
 
         return features